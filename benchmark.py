@@ -0,0 +1,256 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+# Benchmarks of TasksPool scheduling overhead and end-to-end translation throughput.
+#
+# Usage: python benchmark.py [pool | e2e | all] [<number of keys>]
+#
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing as tp
+
+from typing_extensions import Self
+
+from tasks_pool import TaskPoolCoroutine, TaskPoolCoroutineList, TasksPool, AsyncTasksPool
+from translation_backends import MockServer
+
+POOL_SIZES: list[int] = [1, 6, 16, 64]
+POOL_TASKS: int = 2000
+TASK_DURATIONS: list[float] = [0.0, 0.002]
+E2E_KEYS: int = 5000
+E2E_LANGUAGES: list[str] = ["pl", "de", "fr"]
+E2E_LATENCY: float = 0.05      # median response time of the mock server in seconds
+E2E_SIGMA: float = 0.3
+E2E_RUNS: list[tuple[str, int, int]] = [   # engine, threads, strings per batch (0 - limited by bytes only)
+    ("threads", 6, 0),
+    ("threads", 16, 0),
+    ("threads", 16, 20),
+    ("async", 0, 0),
+    ("async", 0, 20),
+    ("processes", 6, 0),
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    # }
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+# }
+
+
+class SleepTask(TaskPoolCoroutine):
+    """
+    Synthetic task of controlled duration. It records the time from submission to post-processing.
+    """
+    def __init__(self, index: int):
+        super().__init__(index)
+        self.submitted: float = 0.0
+        self.latencies: list[float] = []
+    # }
+
+    def doTask(self, duration: float, submitted: float) -> Self:
+        self.submitted = submitted
+        if duration > 0:
+            time.sleep(duration)
+        # }
+        return self
+    # }
+
+    def doSaveResult(self) -> tuple[int, int]:
+        self.latencies.append(time.perf_counter() - self.submitted)
+        return 1, 0
+    # }
+
+# } SleepTask
+
+
+class SleepTaskList(TaskPoolCoroutineList):
+    def createNew(self, index: int) -> SleepTask:
+        return SleepTask(index)
+    # }
+
+# } SleepTaskList
+
+
+def run_pool(pool_class: type, pool_size: int, duration: float, tasks: int) -> dict[str, float]:
+    task_list = SleepTaskList(pool_size)
+    with pool_class(pool_size, task_list) as pool:
+        start = time.perf_counter()
+        for _ in range(tasks):
+            pool.submitTaskInPool(duration, time.perf_counter())
+        # }
+        done = pool.waitForAllTasks()
+        elapsed = time.perf_counter() - start
+    # }
+    latencies = [latency for t_obj in task_list.tasks_obj for latency in t_obj.latencies]
+    ideal = tasks * duration / pool_size
+    return {
+        "done": done,
+        "tasks_per_sec": tasks / elapsed,
+        "overhead_us": (elapsed - ideal) / tasks * 1e6,
+        "p50_ms": percentile(latencies, 0.5) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+# }
+
+
+def sleep_item(duration: float) -> float:
+    if duration > 0:
+        time.sleep(duration)
+    # }
+    return time.perf_counter()
+# }
+
+
+def run_map(pool_class: type, pool_size: int, duration: float, tasks: int) -> dict[str, float]:
+    """
+    The same tasks by pool.map() of a plain function: the latency is the time from the end of the task to its
+    result taken from the generator.
+    """
+    with pool_class(pool_size, SleepTaskList(pool_size)) as pool:
+        start = time.perf_counter()
+        latencies = [time.perf_counter() - finished for finished in pool.map(sleep_item, [duration] * tasks)]
+        elapsed = time.perf_counter() - start
+    # }
+    ideal = tasks * duration / pool_size
+    return {
+        "done": len(latencies),
+        "tasks_per_sec": tasks / elapsed,
+        "overhead_us": (elapsed - ideal) / tasks * 1e6,
+        "p50_ms": percentile(latencies, 0.5) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+# }
+
+
+def benchmark_pool() -> None:
+    print("TasksPool scheduling overhead")
+    print(f"{'pool':<15}{'size':>6}{'task ms':>9}{'tasks/s':>11}{'overhead us':>13}{'p50 ms':>9}{'p99 ms':>9}")
+    for pool_class, run, name in ((TasksPool, run_pool, "TasksPool"), (AsyncTasksPool, run_pool, "AsyncTasksPool"),
+                                  (TasksPool, run_map, "TasksPool.map")):
+        for pool_size in POOL_SIZES:
+            for duration in TASK_DURATIONS:
+                r = run(pool_class, pool_size, duration, POOL_TASKS)
+                print(f"{name:<15}{pool_size:>6}{duration * 1e3:>9.1f}{r['tasks_per_sec']:>11.0f}"
+                      f"{r['overhead_us']:>13.1f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+            # }
+        # }
+    # }
+# }
+
+
+def make_translations(file_name: str, keys: int, languages: list[str]) -> None:
+    """
+    Generate Translations.json with the source language "en" and empty target languages.
+    """
+    words = ["Date", "Amount", "Invoice", "Customer", "Balance {0}", "Tax code", "Payment from {0} on {1}"]
+    rnd = random.Random(1)
+    strings = {f"Key{i:06d}": f"{rnd.choice(words)} {i}" for i in range(keys)}
+    translations = {"en": {"Percentage": 100, "Strings": strings}}
+    for lang in languages:
+        translations[lang] = {"Percentage": 0, "Strings": {}}
+    # }
+    with open(file=file_name, mode="w", encoding="utf-8") as f:
+        json.dump(translations, f, ensure_ascii=False, indent="\t")
+    # }
+# }
+
+
+def load_translator() -> tp.Any:
+    file_name = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manager-io-translator.py")
+    spec = importlib.util.spec_from_file_location("manager_io_translator", file_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["manager_io_translator"] = module   # the worker processes import TaskPacketTranslation by the name
+    spec.loader.exec_module(module)
+    return module
+# }
+
+
+def batch_run_times(metrics_log: str) -> list[float]:
+    """
+    Returns the run times of the finished batches measured by the pool on the client side: masking, the request
+    with its connection and queueing at the server, decoding and validation of the batch.
+    """
+    with open(file=metrics_log, mode="r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    # }
+    return [record["run"] for record in records if record["event"] == "finished"]
+# }
+
+
+def run_e2e(translator: tp.Any, folder: str, engine: str, threads: int, strings_per_batch: int,
+            keys: int) -> dict[str, float]:
+    source = os.path.join(folder, "Translations.json")
+    metrics_log = os.path.join(folder, "metrics.jsonl")
+    make_translations(source, keys, E2E_LANGUAGES)
+    mock_server = MockServer(0, E2E_LATENCY, E2E_SIGMA).start()
+    translator.STR_PER_BATCH = strings_per_batch
+    sys.argv = ["manager-io-translator.py", "-from", "en", "-to", ",".join(E2E_LANGUAGES), "-fromfile", source,
+                "-no-memory", "-backend", f"mock:{mock_server.url}", "-engine", engine, "-metrics-log", metrics_log]
+    if threads > 0:
+        sys.argv += ["-threads", str(threads)]
+    # }
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        translator.main()
+    # }
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mock_server.stop()
+    run_times = batch_run_times(metrics_log)
+    for name in os.listdir(folder):
+        os.remove(os.path.join(folder, name))
+    # }
+    strings = keys * len(E2E_LANGUAGES)
+    return {
+        "seconds": elapsed,
+        "strings_per_sec": strings / elapsed,
+        "requests": mock_server.requests,
+        "p50_ms": percentile(run_times, 0.5) * 1e3,
+        "p99_ms": percentile(run_times, 0.99) * 1e3,
+        "peak_mb": peak / 2 ** 20,
+    }
+# }
+
+
+def benchmark_e2e(keys: int) -> None:
+    print(f"End-to-end translation of {keys} keys into {len(E2E_LANGUAGES)} languages, "
+          f"mock latency {E2E_LATENCY * 1e3:.0f} ms")
+    print(f"{'engine':<9}{'threads':>8}{'batch':>7}{'seconds':>9}{'strings/s':>11}{'requests':>10}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'peak MB':>9}")
+    translator = load_translator()
+    argv = sys.argv
+    with tempfile.TemporaryDirectory() as folder:
+        for engine, threads, strings_per_batch in E2E_RUNS:
+            r = run_e2e(translator, folder, engine, threads, strings_per_batch, keys)
+            print(f"{engine:<9}{threads or translator.MAX_ASYNC_TASKS:>8}{strings_per_batch:>7}{r['seconds']:>9.2f}"
+                  f"{r['strings_per_sec']:>11.0f}{r['requests']:>10}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+                  f"{r['peak_mb']:>9.1f}")
+        # }
+    # }
+    sys.argv = argv
+# }
+
+
+#
+if __name__ == '__main__':
+    mode = sys.argv[1] if len(sys.argv) > 1 else "all"
+    if mode in ("pool", "all"):
+        benchmark_pool()
+    # }
+    if mode in ("e2e", "all"):
+        benchmark_e2e(int(sys.argv[2]) if len(sys.argv) > 2 else E2E_KEYS)
+    # }
+# }
@@ -1,167 +1,1064 @@
 # author Oleksander Kechedzhy
 # version 1.0b
 #
+import asyncio
+import functools
+import heapq
 import json
 import os
 import re
+import signal
 import sys
 import time
 import typing as tp
 from random import random
 
-import deep_translator as dt
 from typing_extensions import Self
 
-from tasks_pool import TaskPoolCoroutine, TasksPool, TaskPoolCoroutineList
+from tasks_metrics import JsonLinesMetrics, PrometheusMetrics
+from tasks_pool import TaskPoolCoroutine, TasksPool, TaskPoolCoroutineList, AsyncTasksPool, TasksPoolStopped
+from translation_journal import TranslationJournal
+from translation_manifest import TranslationManifest
+from translation_planner import SourcePlanner
+from translation_catalog import CatalogColumn, StringCatalog
+from translation_backends import BatchCodec, HttpSession, MockServer, TranslationBackend, create_backend, MARKER
+from translation_memory import TranslationMemory
+from translation_priority import KeyPriorities
+from translation_validator import TranslationValidator
+from translations_file import OutputWriter, TranslationsFile
 
 TEST_MODE: bool = False
 # True - for testing purposes. It copies source language
 # strings without translation to the target JSON file.
-# False - normal translation through deep_translator
+# False - normal translation through the translation backend
 
 STR_LIMIT: int = 0          # limits the number of the strings to translate
+TIME_BUDGET: float = 0.0    # stop sending new batches after TIME_BUDGET seconds, 0 - no limit
 MAX_THERADS: int = 6        # Max threads in pool
-STR_PER_BATCH: int = 20     # number of strings per batch
+MAX_ASYNC_TASKS: int = 64   # Max tasks in flight for the async engine
+MAX_RATE: float = 0.0       # Max requests per second to the translator, 0 - no limit
+STR_PER_BATCH: int = 0      # max number of strings per batch, 0 - limited by BYTES_PER_BATCH only
 MAX_ATTEMPTS: int = 3       # run translation MAX_ATTEMPTS times until all strings will be translated.
+MAX_RETRIES: int = 4        # retry a failed batch MAX_RETRIES times before the next attempt
+RETRY_BACKOFF: float = 0.5  # the delay before the first retry of a failed batch in seconds, doubled on each retry
+RETRY_BACKOFF_MAX: float = 30.0
+TASK_TIMEOUT: float = 180.0  # a batch not translated in TASK_TIMEOUT seconds is retried, 0 - no limit
+DRAIN_TIMEOUT: float = 30.0  # on SIGINT/SIGTERM wait for the batches in flight DRAIN_TIMEOUT seconds
+WATCH_INTERVAL: float = 2.0  # -watch polls the modification time of the source file every WATCH_INTERVAL seconds
+MEMORY_FILE: str = "TranslationMemory.db"   # translation memory in the folder of the source file
+MANIFEST_SUFFIX: str = ".manifest"          # hashes of the translated source strings next to the source file
+BACKEND: str = "google"     # translation backend, see translation_backends.PROVIDERS
 
 ENCODING = "utf-8"
 BYTES_PER_BATCH = 4999
 JSON_INDENT = "\t"
 LINE_CLEAR = '\033[K'
-EOL = ".§ "             # "\n" .<br> *
-EOL2 = r"\.\s*§\s*"
+SENTENCE_END = re.compile(r"(?<=[.!?])(\s+)")
+WORD_SPACE = re.compile(r"(\s+)")
 test_mode: bool = TEST_MODE
+process_packet: tp.Any = None   # TaskPacketTranslation of a worker process of the processes engine
 
 
-def do_translation(text: str, csr_lang: str, translator: tp.Any, count: int) -> str:
-    try:
-        result: str = translator.translate(text)
-    except Exception as exc:
-        print(f'do_translation() exception: {exc!r}')
-        result = ""
+class TranslationTarget:
+    """
+    The state of the translation into one target language: the dict of the translated strings, output files
+    and counters. A single run can translate into several target languages on one shared pool.
+
+    Args:
+        tgt_lang: str - target language code.
+        tg_tr: CatalogColumn - the column of the target language strings to be filled in with translations.
+        translations_tg: previously loaded content of the target file or None.
+        json_to_file: str | None - the Translations_xx.json (or Strings_xx.json) file name to save results.
+        strings_json_to_file: str | None - the Strings_xx.json file name to save results or None.
+        csr_lang: str - source language code.
+        memory: TranslationMemory | None - translation memory to reuse and save translations or None.
+        retry_queue: BatchRetryQueue | None - the queue to retry failed batches or None.
+        journal: TranslationJournal | None - the journal to write translated strings or None.
+        manifest: TranslationManifest | None - the hashes of the source strings of the translations or None.
+        source_hashes: dict | None - the hashes of the current source strings by key for the manifest.
+    """
+    def __init__(self, tgt_lang: str, tg_tr: CatalogColumn, translations_tg: tp.Any,
+                 json_to_file: str | None, strings_json_to_file: str | None, csr_lang: str = "",
+                 memory: TranslationMemory | None = None, retry_queue: tp.Any = None,
+                 journal: TranslationJournal | None = None, manifest: TranslationManifest | None = None,
+                 source_hashes: dict[str, str] | None = None):
+        self.tgt_lang: str = tgt_lang
+        self.csr_lang: str = csr_lang
+        self.memory: TranslationMemory | None = memory
+        self.retry_queue: BatchRetryQueue | None = retry_queue
+        self.journal: TranslationJournal | None = journal
+        self.manifest: TranslationManifest | None = manifest
+        self.source_hashes: dict[str, str] = source_hashes or {}
+        self.changed: set[str] = set()              # translated keys which source text was changed
+        self.changed_count: int = 0
+        self.pruned: int = 0
+        self.scan_ids: list[int] | None = None      # ids of the keys to scan in the next attempt or None for all
+        self.queued: dict[str, list[str]] = {}      # source text in batches -> other keys with the same text
+        self.parts: dict[str, list[tp.Any]] = {}    # key of the split string -> translated parts
+        self.parts_text: dict[str, tuple[str, list[str]]] = {}  # key of the split string -> source and separators
+        self.packed_batches: int = 0
+        self.packed_bytes: int = 0
+        self.tg_tr: CatalogColumn = tg_tr
+        self.base_tr: CatalogColumn | None = None   # the strings of the language in the source Translations.json
+        self.source_langs: dict[str, str] = {}      # key -> fallback language of the keys absent in the source
+        self.pivot_lang: str = ""
+        self.pivot_tr: CatalogColumn | None = None  # the strings of the pivot language to translate from
+        self.pivot_target: TranslationTarget | None = None  # the pivot translated in the run, waited for
+        self.translations_tg: tp.Any = translations_tg
+        self.tg_fields: dict[str, tp.Any] | None = None     # the fields of the language saved in the target file
+        self.json_to_file: str | None = json_to_file
+        self.strings_json_to_file: str | None = strings_json_to_file
+        self.tg_len: int = len(tg_tr)
+        self.max_strings: int = 0
+        self.total_done: int = 0
+        self.attempt_done: int = 0
+        self.attempt_fault: int = 0
+        self.clone: int = 0
+        self.copies: int = 0
+        self.attempts: int = 0
+        self.pending: int = 0
+        self.scanned: bool = False
+        self.saved: bool = False
+        self.on_complete: tp.Callable[[Self], None] | None = None
     # }
-    return result
-# }
+
+    def isUnfinished(self, sc_len: int) -> bool:
+        return (not self.saved and self.total_done + self.clone + self.tg_len < sc_len + self.changed_count and
+                self.attempts < MAX_ATTEMPTS and self.total_done < self.max_strings)
+    # }
+
+    def startAttempt(self) -> None:
+        self.attempt_done = 0
+        self.attempt_fault = 0
+        self.scanned = False
+        self.queued = {}
+        self.parts = {}
+        self.parts_text = {}
+    # }
+
+    def expectParts(self, key: str, origin: str, separators: list[str], count: int) -> None:
+        """
+        The string of the key is split by BatchPacker in count parts to be joined by separators.
+        """
+        self.parts[key] = [None] * count
+        self.parts_text[key] = (origin, separators)
+    # }
+
+    def savePart(self, key: str, part: int, translation: str, src_lang: str = "") -> int:
+        """
+        Save the translation of a part of the split string. When all parts are translated the string is saved.
+        Returns the count of the saved keys except the part itself like saveTranslation().
+        """
+        parts = self.parts.get(key)
+        if parts is None:
+            return -1
+        # }
+        parts[part] = translation.strip()
+        if any(p is None for p in parts):
+            return -1
+        # }
+        origin, separators = self.parts_text.pop(key)
+        del self.parts[key]
+        text = parts[0] + "".join(sep + p for sep, p in zip(separators, parts[1:]))
+        return self.saveTranslation(key, origin, text, src_lang)
+    # }
+
+    def getFromMemory(self, text: str, src_lang: str = "") -> str | None:
+        if self.memory is None:
+            return None
+        # }
+        return self.memory.get(src_lang or self.csr_lang, self.tgt_lang, text)
+    # }
+
+    def setTranslation(self, key: str, translation: str) -> None:
+        self.tg_tr[key] = translation
+        if self.journal is not None:
+            self.journal.write(self.tgt_lang, key, translation)
+        # }
+        self.markTranslated(key)
+    # }
+
+    def markTranslated(self, key: str) -> None:
+        """
+        The key is translated from its current source text.
+        """
+        self.changed.discard(key)
+        if self.manifest is not None and key in self.source_hashes:
+            self.manifest.put(self.csr_lang, self.tgt_lang, key, self.source_hashes[key])
+        # }
+    # }
+
+    def checkManifest(self, prune: bool) -> tuple[int, int]:
+        """
+        Find the translated keys which source text was changed since their translation to translate them again
+        and the keys deleted from the source. If prune is true, the deleted keys are removed from the target.
+        Returns the counts of the changed and the deleted keys.
+        """
+        if self.manifest is None:
+            return 0, 0
+        # }
+        changed, deleted = self.manifest.diff(self.csr_lang, self.tgt_lang, self.source_hashes)
+        self.changed = {key for key in changed if self.tg_tr.get(key)}
+        self.changed_count = len(self.changed)
+        if prune:
+            for key in deleted:
+                if self.tg_tr.pop(key, None) is not None:
+                    self.pruned += 1
+                # }
+                self.manifest.remove(self.csr_lang, self.tgt_lang, key)
+            # }
+            self.tg_len = len(self.tg_tr)
+        # }
+        return self.changed_count, len(deleted)
+    # }
+
+    def commitManifest(self) -> None:
+        """
+        Record the hashes of the source strings of the translations which are not in the manifest yet, e.g. made
+        before the manifest was introduced. Changed keys which failed to be translated keep their old hashes.
+        """
+        if self.manifest is None:
+            return
+        # }
+        pair = self.manifest.getPair(self.csr_lang, self.tgt_lang)
+        for key, source_hash in self.source_hashes.items():
+            if key not in pair and self.tg_tr.get(key):
+                self.manifest.put(self.csr_lang, self.tgt_lang, key, source_hash)
+            # }
+        # }
+    # }
+
+    def saveTranslation(self, key: str, origin: str, translation: str, src_lang: str = "") -> int:
+        """
+        Save the translation of the key and of all the keys with the same source text queued in this attempt.
+        Returns the count of the saved keys except the key itself, -1 for a part of a split string.
+        """
+        if isinstance(key, tuple):
+            return self.savePart(key[0], key[1], translation, src_lang)
+        # }
+        self.setTranslation(key, translation)
+        if self.memory is not None:
+            self.memory.put(src_lang or self.csr_lang, self.tgt_lang, origin, translation)
+        # }
+        keys = self.queued.pop(origin, None)
+        if not keys:
+            return 0
+        # }
+        for dup_key in keys:
+            self.setTranslation(dup_key, translation)
+        # }
+        return len(keys)
+    # }
+
+    def restore(self, translations: dict[str, str]) -> int:
+        """
+        Restore the translations replayed from the journal of the interrupted run. Only the keys missing in the target
+        or with another translation in it are counted as done, e.g. the target saved before the interruption has
+        them already. Returns the count of the restored keys.
+        """
+        restored: int = 0
+        for key, translation in translations.items():
+            current = self.tg_tr.get(key)
+            if current is not None and key not in self.changed:    # the changed keys are counted in tg_len
+                if current == translation:
+                    self.markTranslated(key)
+                    continue
+                # }
+                self.tg_len -= 1    # the key is counted in total_done instead
+            # }
+            self.tg_tr[key] = translation
+            self.markTranslated(key)
+            restored += 1
+        # }
+        self.total_done += restored
+        return restored
+    # }
+
+    def batchSubmitted(self) -> None:
+        self.pending += 1
+    # }
+
+    def batchSaved(self, done: int, fault: int, duplicates: int = 0) -> None:
+        """
+        Call in the context of the main thread when a batch of the target language was post-processed.
+        """
+        self.pending -= 1
+        if self.journal is not None:
+            self.journal.flush()
+        # }
+        self.attempt_done += done
+        self.attempt_fault += fault
+        self.total_done += done + duplicates
+        self.checkComplete()
+    # }
+
+    def scanFinished(self) -> None:
+        self.scanned = True
+        self.attempts += 1
+        self.checkComplete()
+    # }
+
+    def checkComplete(self) -> None:
+        """
+        The target is complete when all its batches were submitted and saved without faults.
+        """
+        if self.scanned and self.pending == 0 and self.attempt_fault == 0 and not self.saved:
+            if self.on_complete is not None:
+                self.on_complete(self)
+            # }
+        # }
+    # }
+
+# } TranslationTarget
+
+
+class BatchRetryQueue:
+    """
+    The queue of the failed batches to be submitted again. A batch failed by the translator is retried with
+    exponential backoff, only the strings lost in the result of the batch are queued again, every one alone with
+    the same backoff, so a string which breaks the markers does not fail its neighbours again.
+    """
+    def __init__(self):
+        self.heap: list[tuple[float, int, tuple]] = []
+        self.counter: int = 0
+        self.retried: int = 0
+        self.salvaged: int = 0
+    # }
+
+    def __len__(self) -> int:
+        return len(self.heap)
+    # }
+
+    def push(self, target: TranslationTarget, text_batch: list[str], text_keys: list[str], b_number: int,
+             retry: int, delay: float = 0.0, src_lang: str = "") -> None:
+        """
+        Queue the batch to be submitted after delay seconds. The batch is counted as pending in the target.
+        """
+        target.batchSubmitted()
+        self.counter += 1
+        heapq.heappush(self.heap, (time.monotonic() + delay, self.counter,
+                                   (text_batch, target, text_keys, len(text_batch), b_number, retry, src_lang)))
+    # }
+
+    def retryBatch(self, task: "TaskPacketTranslation") -> bool:
+        """
+        Queue the failed batch of the task again. Returns false if retries of the batch are exhausted.
+        """
+        count = task.count
+        if task.retry >= MAX_RETRIES:
+            return False
+        # }
+        delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** task.retry) * (0.5 + random())
+        if task.result is not None:     # queue the lost and rejected strings only, every one alone
+            lost = [i for i, rs in enumerate(task.result) if rs is None]
+            for i in lost:
+                self.push(task.target, [task.text_batch[i]], [task.text_keys[i]], task.b_number, task.retry + 1,
+                          delay, task.src_lang)
+            # }
+            self.salvaged += 1
+            print(f"* Batch {task.tgt_lang}#{task.b_number}-{task.index}: {len(lost)} lost strings of {count} are queued again"
+                  f" alone in {delay:.1f} seconds{f' ({len(task.rejected)} rejected by validation)' if task.rejected else ''}.")
+            return True
+        # }
+        self.push(task.target, task.text_batch[:count], task.text_keys[:count], task.b_number, task.retry + 1, delay,
+                  task.src_lang)
+        self.retried += 1
+        print(f"* Batch {task.tgt_lang}#{task.b_number}-{task.index} will be retried in {delay:.1f} seconds.")
+        return True
+    # }
+
+    def clear(self) -> int:
+        """
+        Drop the queued batches. Returns their count.
+        """
+        count = len(self.heap)
+        self.heap = []
+        return count
+    # }
+
+    def submitDue(self, treads_poll: TasksPool | AsyncTasksPool, wait: bool = False) -> int:
+        """
+        Submit the batches which delay is expired to the pool. If wait is true and no batch is due, it sleeps
+        until the first one. Returns the count of the submitted batches.
+        """
+        submitted: int = 0
+        if wait and self.heap:
+            delay = self.heap[0][0] - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            # }
+        # }
+        while self.heap and self.heap[0][0] <= time.monotonic():
+            _, _, argv = heapq.heappop(self.heap)
+            treads_poll.submitTaskInPool(*argv)
+            submitted += 1
+        # }
+        return submitted
+    # }
+
+# } BatchRetryQueue
+
+
+class BatchPacker:
+    """
+    Pack the strings in batches to send as few requests as possible. Strings are placed by first fit decreasing
+    algorithm with markers counted in the size of the batch, the order of the strings in a batch is kept.
+    A string longer than the batch is split on sentence boundaries (words or characters if needed) in parts which
+    are translated separately and joined back by TranslationTarget. Strings are sized as they are sent, with format
+    placeholders and markup masked by BatchCodec.
+
+    Args:
+        max_bytes: int - maximum size of the batch in bytes.
+        max_strings: int - maximum number of the strings in the batch, 0 - as many as the markers fit in max_bytes.
+    """
+    def __init__(self, max_bytes: int, max_strings: int = 0):
+        self.max_bytes: int = max_bytes
+        self.eol_len: int = len(MARKER.format(max_strings if max_strings > 0 else max_bytes).encode(ENCODING))
+        self.max_strings: int = max_strings if max_strings > 0 else max_bytes // (self.eol_len + 1)
+        self.batches: int = 0
+        self.bytes: int = 0
+    # }
+
+    def fillRatio(self) -> float:
+        return self.bytes / (self.batches * self.max_bytes) if self.batches else 0.0
+    # }
+
+    @staticmethod
+    def encodedSize(text: str, size: int = -1) -> int:
+        """
+        Returns the size of the text in bytes as it is sent by BatchCodec. The size of the raw text may be given.
+        """
+        if "{" in text or "<" in text or "&" in text:
+            text = BatchCodec.mask(text)[0]
+        elif size >= 0:
+            return size
+        # }
+        return len(text.encode(ENCODING))
+    # }
+
+    def splitTokens(self, text: str, pattern: tp.Any) -> list[tuple[str, str]]:
+        """
+        Split the text by pattern with a capturing group. Returns the list of pieces with the separator after each.
+        """
+        pieces = pattern.split(text)
+        return list(zip(pieces[0::2], pieces[1::2] + [""]))
+    # }
+
+    def splitText(self, text: str) -> tuple[list[str], list[str]]:
+        """
+        Split the text in parts not longer than the batch. Returns parts and separators between them.
+        """
+        tokens: list[tuple[str, str]] = []
+        for sentence, sep in self.splitTokens(text, SENTENCE_END):
+            if self.encodedSize(sentence) <= self.max_bytes:
+                tokens.append((sentence, sep))
+                continue
+            # }
+            words = self.splitTokens(sentence, WORD_SPACE)
+            words[-1] = (words[-1][0], sep)
+            for word, word_sep in words:
+                if self.encodedSize(word) <= self.max_bytes:
+                    tokens.append((word, word_sep))
+                    continue
+                # }
+                step = self.max_bytes // 4      # up to 4 bytes per character in UTF-8
+                chunks = [word[n:n + step] for n in range(0, len(word), step)]
+                tokens.extend((chunk, "") for chunk in chunks[:-1])
+                tokens.append((chunks[-1], word_sep))
+            # }
+        # }
+        parts: list[str] = []
+        separators: list[str] = []
+        part, part_sep = tokens[0]
+        for token, sep in tokens[1:]:
+            joined = part + part_sep + token
+            if self.encodedSize(joined) <= self.max_bytes:
+                part = joined
+            else:
+                parts.append(part)
+                separators.append(part_sep)
+                part = token
+            # }
+            part_sep = sep
+        # }
+        parts.append(part)
+        return parts, separators
+    # }
+
+    def pack(self, items: list[tuple[str, str, int, float]],
+             target: TranslationTarget) -> tuple[list[str], list, list[tuple[int, int, float]]]:
+        """
+        Pack items (key, text, size in bytes, priority) in batches. The items of higher priority are placed first,
+        so they fill the first batches. Returns the texts and the keys laid out batch by batch, shared by all the
+        batches, and the batches as index ranges (start, end) in them with the highest priority of the batch. The key
+        of a part of a split string is a tuple (key, part index).
+        """
+        expanded: list[tuple[int, tp.Any, str, int, float]] = []
+        for key, text, size, priority in items:
+            size = self.encodedSize(text, size)
+            if size > self.max_bytes:
+                parts, separators = self.splitText(text)
+                target.expectParts(key, text, separators, len(parts))
+                for n, part in enumerate(parts):
+                    expanded.append((len(expanded), (key, n), part, self.encodedSize(part), priority))
+                # }
+            else:
+                expanded.append((len(expanded), key, text, size, priority))
+            # }
+        # }
+        expanded.sort(key=lambda item: (item[4], item[3]), reverse=True)
+        bins: list[list] = []       # [free bytes, items]
+        open_bins: list[list] = []
+        for item in expanded:
+            need = item[3] + self.eol_len
+            for b in open_bins:
+                if b[0] >= need:
+                    break
+                # }
+            else:
+                b = [self.max_bytes + 1, []]    # the first marker of the batch has no new line
+                bins.append(b)
+                open_bins.append(b)
+            # }
+            b[0] -= need
+            b[1].append(item)
+            if len(b[1]) >= self.max_strings:
+                open_bins.remove(b)
+            # }
+        # }
+        texts: list[str] = []
+        keys: list = []
+        batches: list[tuple[int, int, float]] = []
+        for free, b_items in bins:
+            priority = b_items[0][4]    # the first placed item
+            b_items.sort()
+            batches.append((len(texts), len(texts) + len(b_items), priority))
+            texts.extend(item[2] for item in b_items)
+            keys.extend(item[1] for item in b_items)
+            self.bytes += self.max_bytes - free
+        # }
+        self.batches += len(batches)
+        return texts, keys, batches
+    # }
+
+# } BatchPacker
 
 
 class TaskPacketTranslation(TaskPoolCoroutine):
-    def __init__(self, index: int, csr_lang: str, tgt_lang: str, proxies: dict[str, str] | None = None):
+    def __init__(self, index: int, csr_lang: str, proxies: dict[str, str] | None = None,
+                 backend_names: dict[str, str] | None = None, session: HttpSession | None = None,
+                 validator: TranslationValidator | None = None):
         super().__init__(index)
         self.text_batch: list[str] = []
         self.csr_lang: str = csr_lang
-        self.tgt_lang: str = tgt_lang
+        self.src_lang: str = csr_lang   # the source language of the batch: -from, a fallback or a pivot
+        self.tgt_lang: str = ""
         self.text_keys: list[str] = []
         self.count: int = 0
         self.text: str = ""
         self.count_done: int = 0
+        self.masks: list[list[str]] = []
         self.b_number: int = 0
-        self.targer: tp.Any = None
-        global test_mode
-        if not test_mode:
-            if isinstance(proxies, str):
-                proxies = {'https': proxies}
-            # }
-            self.translator = dt.GoogleTranslator(source=csr_lang, target=tgt_lang, proxies=proxies)
+        self.retry: int = 0
+        self.target: TranslationTarget | None = None
+        self.validator: TranslationValidator = validator or TranslationValidator()
+        self.rejected: dict[int, str] = {}      # index in the batch -> reason of the rejected translation
+        if isinstance(proxies, str):
+            proxies = {'https': proxies}
         # }
+        self.proxies: dict[str, str] | None = proxies
+        self.backend_names: dict[str, str] = backend_names or {}    # backend name per target language, "" - default
+        self.session: HttpSession | None = session                  # pooled connections shared by all objects
+        self.backends: dict[tuple[str, str], TranslationBackend] = {}  # backend per source and target language
     # }
 
-    def doTask(self, text_batch: list[str], targer: tp.Any, text_keys: list[str], count: int, b_number: int) -> Self:
-        self.text_batch = text_batch
-        self.targer: tp.Any = targer
-        self.text_keys = text_keys
+    def getBackend(self, tgt_lang: str, src_lang: str = "") -> TranslationBackend:
+        """
+        Returns the translation backend for the target language from the source one (default csr_lang). It is
+        created on demand in the context of the working thread, the object is used by one thread at a time.
+        """
+        src_lang = src_lang or self.csr_lang
+        backend = self.backends.get((src_lang, tgt_lang))
+        if backend is None:
+            name = self.backend_names.get(tgt_lang) or self.backend_names.get("", BACKEND)
+            backend = create_backend(name, src_lang, tgt_lang, self.proxies, self.session)
+            self.backends[(src_lang, tgt_lang)] = backend
+        # }
+        return backend
+    # }
+
+    def validate(self) -> None:
+        """
+        Validate the translated batch in the context of the working thread: the rejected strings are set to None
+        to be translated again alone.
+        """
+        self.rejected = self.validator.validate(self.text_batch[:self.count], self.result, self.retry == 0,
+                                                self.tgt_lang)
+        self.count_done = self.count - self.result.count(None)
+    # }
+
+    def setTask(self, text_batch: list[str], target: TranslationTarget, text_keys: list[str], count: int,
+                b_number: int, retry: int = 0, src_lang: str = "", start: int = 0) -> None:
+        """
+        Take the batch of count strings from start of the texts and the keys, which may be shared by the batches
+        packed together, see BatchPacker.pack().
+        """
+        self.retry = retry
+        self.src_lang = src_lang or target.csr_lang
+        self.text_batch = text_batch[start:start + count]
+        self.target = target
+        self.tgt_lang = target.tgt_lang
+        self.text_keys = text_keys[start:start + count]
         self.count = count
         self.count_done = 0
+        self.rejected = {}
         self.b_number = b_number
+        self.metrics = {"lang": self.tgt_lang, "batch": b_number, "retry": retry, "strings": count,
+                        "bytes": sum(len(text.encode(ENCODING)) for text in self.text_batch)}
+    # }
+
+    async def doTaskAsync(self, text_batch: list[str], target: TranslationTarget, text_keys: list[str], count: int,
+                          b_number: int, retry: int = 0, src_lang: str = "", start: int = 0) -> Self:
+        """
+        Coroutine of AsyncTasksPool. The backend translates the batch on the event loop if it supports it.
+        """
+        global test_mode
+        self.setTask(text_batch, target, text_keys, count, b_number, retry, src_lang, start)
+        try:
+            if test_mode:
+                await asyncio.sleep(0.5 + random() * 2)
+                self.text, self.masks = BatchCodec.encode(self.text_batch)
+                self.result = BatchCodec.decode(self.text, self.masks)
+            else:
+                self.result = await self.getBackend(self.tgt_lang, self.src_lang).translate_batch_async(self.text_batch)
+            # }
+            self.validate()
+        except Exception as exc:
+            print(f'translate_batch_async() exception: {exc!r}')
+            self.error = exc
+            self.result = None
+        # }
+        return self
+    # }
+
+    def doTask(self, text_batch: list[str], target: TranslationTarget, text_keys: list[str], count: int,
+               b_number: int, retry: int = 0, src_lang: str = "", start: int = 0) -> Self:
+        self.setTask(text_batch, target, text_keys, count, b_number, retry, src_lang, start)
         global test_mode
 
         try:
             if test_mode:
                 time.sleep(0.5 + random() * 2)
-                self.text = EOL.join(text_batch[:count])  # do_translation()
-                self.result = re.split(EOL2, self.text)
+                self.text, self.masks = BatchCodec.encode(self.text_batch)
+                self.result = BatchCodec.decode(self.text, self.masks)
             else:
-                self.text = do_translation(EOL.join(text_batch[:count]), self.csr_lang, self.translator, count)
-                self.result = re.split(EOL2, self.text)
-                # check for upper case?
-                for i, (text, rs) in enumerate(zip(self.result, text_batch[:count])):
-                    if not rs[0].isupper():
-                        if text.lstrip()[0].isupper():  # check if translation is titled
-                            self.result[i] = rs[0].upper() + rs[1:]
-                        # }
-                    # }
-                # }
+                self.result = self.getBackend(self.tgt_lang, self.src_lang).translate_batch(self.text_batch)
             # }
-            # post check 
-            self.count_done = len(self.result)
+            self.validate()
         # }
         except Exception as exc:
-            print(f'do_translation() exception: {exc!r}')
+            print(f'translate_batch() exception: {exc!r}')
+            self.error = exc
             self.result = None
         # }
         return self
     # }
 
+    def getPayload(self, text_batch: list[str], target: TranslationTarget, text_keys: list[str], count: int,
+                   b_number: int, retry: int = 0, src_lang: str = "",
+                   start: int = 0) -> tuple[str, list[str], bool, bool, str]:
+        """
+        Keep the batch in the object and return the data to translate it by processTask() in a worker process.
+        """
+        global test_mode
+        self.setTask(text_batch, target, text_keys, count, b_number, retry, src_lang, start)
+        return self.tgt_lang, self.text_batch, retry == 0, test_mode, self.src_lang
+    # }
+
+    @staticmethod
+    def processTask(payload: tuple[str, list[str], bool, bool, str]) -> tuple[list[str | None] | None, str | None,
+                                                                              dict[int, str]]:
+        """
+        Translate and validate the batch in a worker process by the backend of the process, see
+        init_translation_process(). Returns the translations, the error or None and the rejected strings.
+        """
+        tgt_lang, text_batch, first_try, test, src_lang = payload
+        try:
+            if test:
+                time.sleep(0.5 + random() * 2)
+                text, masks = BatchCodec.encode(text_batch)
+                result = BatchCodec.decode(text, masks)
+            else:
+                result = process_packet.getBackend(tgt_lang, src_lang).translate_batch(text_batch)
+            # }
+            return result, None, process_packet.validator.validate(text_batch, result, first_try, tgt_lang)
+        except Exception as exc:
+            print(f'translate_batch() exception: {exc!r}')
+            return None, repr(exc), {}      # the exception of a provider may not be picklable
+        # }
+    # }
+
+    def setResult(self, result: tuple[list[str | None] | None, str | None, dict[int, str]]) -> None:
+        self.result, self.error, self.rejected = result
+        self.count_done = 0 if self.result is None else self.count - self.result.count(None)
+    # }
+
     def doSaveResult(self) -> tuple[int, int]:
         global test_mode
         d_count: int = 0
+        strings: int = 0    # saved keys, a split string is counted once when its last part is saved
+        duplicates: int = 0
+        retried: bool = False
+        if self.result is None or self.count_done != self.count:
+            retry_queue = self.target.retry_queue
+            retried = retry_queue is not None and retry_queue.retryBatch(self)
+        # }
         if self.result is not None and self.count_done > 0:  # self.count_done==self.count:
             for rs, origin, key in zip(self.result, self.text_batch, self.text_keys):  # , self.text_batch
+                if rs is None:     # lost string
+                    continue
+                # }
                 if test_mode:
                     if origin != rs:
                         print(f"TEST ERROR: Save {key}: {origin} ---> {rs}")
                         continue
                     # }
                 # }
-                self.targer[key] = rs  # save result
+                saved = self.target.saveTranslation(key, origin, rs, self.src_lang)  # save result
+                duplicates += saved
+                strings += int(saved >= 0)
                 d_count += 1
             # }
         # }
-        if d_count != self.count:
-            print(f"* Data inconsistency on batch #{self.b_number}-{self.index}: sent: {self.count} strings, in result: {self.count_done}! {d_count} saved.")
+        fault: int = 0 if retried else self.count - d_count
+        if d_count != self.count and not retried:
+            print(f"* Data inconsistency on batch {self.tgt_lang}#{self.b_number}-{self.index}: sent: {self.count} strings, in result: {self.count_done}! {d_count} saved.")
         # }
-        return d_count, self.count - d_count
+        self.validator.count(self.rejected)
+        self.metrics["saved"] = d_count
+        self.metrics["fault"] = fault
+        self.metrics["retried"] = int(retried)
+        self.metrics["rejected"] = len(self.rejected)
+        self.target.batchSaved(d_count, fault, duplicates)
+        return strings, fault
     # }
 # } TaskPacketTranslation
 
 
 class TaskPacketTranslationList(TaskPoolCoroutineList):
-    def __init__(self, max_size: int, csr_lang: str, tgt_lang: str):
+    def __init__(self, max_size: int, csr_lang: str, backend_names: dict[str, str] | None = None,
+                 session: HttpSession | None = None, validator: TranslationValidator | None = None):
         super().__init__(max_size)
         self.csr_lang: str = csr_lang
-        self.tgt_lang: str = tgt_lang
+        self.backend_names: dict[str, str] | None = backend_names
+        self.session: HttpSession | None = session
+        self.validator: TranslationValidator = validator or TranslationValidator()
 
     # }
 
     def createNew(self, index: int) -> TaskPacketTranslation:
-        return TaskPacketTranslation(index, self.csr_lang, self.tgt_lang)
+        return TaskPacketTranslation(index, self.csr_lang, backend_names=self.backend_names, session=self.session,
+                                     validator=self.validator)
+    # }
+
+    def getProcessInitializer(self) -> tuple[tp.Callable | None, tuple]:
+        return init_translation_process, (self.csr_lang, self.backend_names, self.session is not None, self.validator)
     # }
 
 # } TaskPoolCoroutineList
 
 
+def init_translation_process(csr_lang: str, backend_names: dict[str, str] | None, use_session: bool,
+                             validator: TranslationValidator) -> None:
+    """
+    Initialize a worker process of the processes engine: the backends are created once per process on demand and
+    share the HTTP session of the process.
+    """
+    global process_packet
+    session = HttpSession(1) if use_session else None     # a worker process sends one request at a time
+    process_packet = TaskPacketTranslation(0, csr_lang, backend_names=backend_names, session=session,
+                                           validator=validator)
+# }
+
+
 class TranslateTasksPool(TasksPool):
-    def __init__(self, poll_size: int, coroutine_list: TaskPoolCoroutineList) -> None:
-        super().__init__(poll_size, coroutine_list)
+    def __init__(self, poll_size: int, coroutine_list: TaskPoolCoroutineList, rate: float = 0.0,
+                 adaptive: bool = False, processes: bool = False, task_timeout: float = 0.0) -> None:
+        super().__init__(poll_size, coroutine_list, rate, adaptive, processes=processes, task_timeout=task_timeout)
 
     # }
 
     def save_progress(self, done: int, fault: int = 0) -> None:
         if done + fault > 0:
             super().save_progress(done, fault)
-            print(LINE_CLEAR + f"Translated total {self.totalDone} strings (fault {self.totalFault}).", end="\r", flush=True)
+            print(LINE_CLEAR + f"Translated total {self.totalDone} strings (fault {self.totalFault}), "
+                               f"{self.getLimit()} batches in flight, {self.requestsPerSecond():.1f} req/s.", end="\r", flush=True)
         # }
     # }
 
 # }TranslateTasksPool
 
 
+class TranslateAsyncTasksPool(AsyncTasksPool):
+    def __init__(self, poll_size: int, coroutine_list: TaskPoolCoroutineList, task_timeout: float = 0.0) -> None:
+        super().__init__(poll_size, coroutine_list, task_timeout)
+
+    # }
+
+    def save_progress(self, done: int, fault: int = 0) -> None:
+        if done + fault > 0:
+            super().save_progress(done, fault)
+            print(LINE_CLEAR + f"Translated total {self.totalDone} strings (fault {self.totalFault}).", end="\r", flush=True)
+        # }
+    # }
+
+# }TranslateAsyncTasksPool
+
+
+class TranslatorServices:
+    """
+    The objects of the translator which live longer than a run: the translation memory, the manifest, the
+    backends with the HTTP session and the mock server, the validator, the pool of the batches and its observers.
+    A run creates them on demand, the watch mode keeps them warm between the runs, so a run pays neither the
+    startup of the pool nor the setup of the connections. The services are a context manager which closes them.
+    """
+    def __init__(self):
+        self.memory: TranslationMemory | None = None
+        self.manifest: TranslationManifest | None = None
+        self.mock_server: MockServer | None = None
+        self.session: HttpSession | None = None
+        self.validator: TranslationValidator | None = None
+        self.pool: TasksPool | AsyncTasksPool | None = None
+        self.metrics_log: JsonLinesMetrics | None = None
+        self.metrics_prom: PrometheusMetrics | None = None
+        self.engine: str = ""
+        self.task_timeout: float = 0.0
+        self.drain_timeout: float = 0.0
+        self.catalog_cache: CatalogCache | None = None  # the catalog kept by the watch mode
+    # }
+
+    def __enter__(self) -> Self:
+        return self
+    # }
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(cancel=exc_type is not None)
+    # }
+
+    def start(self, argv: list[str], csr_lang: str) -> None:
+        """
+        Create the backends, the HTTP session, the validator and the pool by the command line arguments.
+        """
+        len_argv: int = len(argv)
+        # translation backends: -backend <name> for all languages, -backend-lang <lang>=<name>,... per language
+        backend_names: dict[str, str] = {"": CheckCLParameter("-backend", argv, len_argv) or BACKEND}
+        for item in (CheckCLParameter("-backend-lang", argv, len_argv) or "").split(","):
+            if "=" in item:
+                lang, name = item.split("=", 1)
+                backend_names[lang.strip()] = name.strip()
+            # }
+        # }
+        if "mock" in backend_names.values():
+            mock_params = [float(p) for p in (CheckCLParameter("-mock", argv, len_argv) or "").split(",") if p]
+            self.mock_server = MockServer(0, *mock_params).start()
+            print(f"Mock translation server is started on {self.mock_server.url}.")
+            backend_names = {lang: f"mock:{self.mock_server.url}" if name == "mock" else name
+                             for lang, name in backend_names.items()}
+        # }
+
+        engine = CheckCLParameter("-engine", argv, len_argv) or "threads"
+        max_threads: int = MAX_ASYNC_TASKS if engine == "async" else int(CheckCLParameter("-threads", argv, len_argv) or MAX_THERADS)
+        if not test_mode:   # keep-alive connections shared by all the batches in flight
+            self.session = HttpSession(int(CheckCLParameter("-connections", argv, len_argv) or max_threads))
+        # }
+        self.task_timeout = float(CheckCLParameter("-task-timeout", argv, len_argv) or TASK_TIMEOUT)
+        self.drain_timeout = float(CheckCLParameter("-drain-timeout", argv, len_argv) or DRAIN_TIMEOUT)
+        # the mock server and the test mode return the source text as is
+        # -fix-case <langs | all>: the languages which do not capitalize the words the source has in lower case
+        fix_case: str = CheckCLParameter("-fix-case", argv, len_argv) or ""
+        fix_case_langs = {"*"} if fix_case == "all" else {lang.strip() for lang in fix_case.split(",") if lang.strip()}
+        self.validator = TranslationValidator(check_untranslated=not test_mode and not any(
+            name.startswith("mock") for name in backend_names.values()), fix_case_langs=fix_case_langs)
+        if engine == "async":
+            translation_packets = TaskPacketTranslationList(MAX_ASYNC_TASKS, csr_lang, backend_names, self.session, self.validator)
+            self.pool = TranslateAsyncTasksPool(MAX_ASYNC_TASKS, translation_packets, self.task_timeout)
+        else:
+            if engine != "processes":
+                engine = "threads"
+            # }
+            rate = float(CheckCLParameter("-rate", argv, len_argv) or MAX_RATE)
+            translation_packets = TaskPacketTranslationList(max_threads, csr_lang, backend_names, self.session, self.validator)
+            self.pool = TranslateTasksPool(max_threads, translation_packets, rate, "-adaptive" in argv,
+                                           engine == "processes", self.task_timeout)
+        # }
+        if CheckCLParameter("-metrics-log", argv, len_argv):
+            self.metrics_log = JsonLinesMetrics(CheckCLParameter("-metrics-log", argv, len_argv), ENCODING)
+            self.pool.addObserver(self.metrics_log)
+        # }
+        if CheckCLParameter("-metrics-prom", argv, len_argv):
+            self.metrics_prom = PrometheusMetrics(CheckCLParameter("-metrics-prom", argv, len_argv), "translator",
+                                                  ("lang",), ("strings", "bytes", "saved", "fault", "retried", "rejected"))
+            self.pool.addObserver(self.metrics_prom)
+        # }
+        self.engine = engine
+    # }
+
+    def close(self, cancel: bool = False) -> None:
+        """
+        Close the services and print their statistics.
+        """
+        if self.session is not None:    # the connections of the coroutines are closed before the event loop
+            self.session.closeAsync()
+        # }
+        if self.pool is not None:
+            self.pool.close(cancel)
+        # }
+        if self.metrics_log is not None:
+            self.metrics_log.close()
+        # }
+        if self.metrics_prom is not None:
+            self.metrics_prom.close()
+        # }
+        if self.session is not None:
+            requests_count, connections = self.session.getStats()
+            if requests_count > 0:
+                print(f"HTTP session: {requests_count} requests, {connections} connections were opened, "
+                      f"{requests_count - connections} requests reused a connection.")
+            # }
+            self.session.close()
+        # }
+        if self.mock_server is not None:
+            self.mock_server.stop()
+            print(f"Mock server: {self.mock_server.requests} requests, {self.mock_server.connections} connections, "
+                  f"{self.mock_server.errors} errors, {self.mock_server.throttled} throttled.")
+        # }
+        if self.memory is not None:
+            self.memory.close()
+            print(f"Translation memory: {self.memory.hits} hits, {self.memory.misses} misses, "
+                  f"{self.memory.added} new translations.")
+        # }
+        self.pool = None
+        self.session = None
+        self.mock_server = None
+        self.memory = None
+    # }
+
+# } TranslatorServices
+
+
+class CatalogCache:
+    """
+    The catalog of the keys and the columns of the languages kept warm between the runs of the watch mode. The
+    source column is updated by the next version of the source in place, so only the new keys are interned. A column
+    of a language of the source file is reused while the text of the language is the same, a column of a target
+    file while the file is not modified since the run which saved it. The cache is dropped when the
+    catalog is twice as large as the source, e.g. by the deleted keys.
+    """
+    def __init__(self):
+        self.catalog: StringCatalog | None = None
+        self.source: CatalogColumn | None = None
+        self.columns: dict[str, tuple[str, CatalogColumn]] = {}    # language -> hash of its text, column
+        # target file -> its modification time and size, the column and the other fields of the language
+        self.targets: dict[str, tuple[tuple[int, int], CatalogColumn, dict[str, tp.Any] | None]] = {}
+    # }
+
+    def getSource(self, strings: dict[str, str]) -> tuple[StringCatalog, CatalogColumn, int | None]:
+        """
+        Returns the catalog, the source column of the strings and the count of the new and changed source strings
+        since the previous run or None if the catalog is new.
+        """
+        if self.catalog is None or self.source is None or len(self.catalog) > 2 * len(strings):
+            self.catalog = StringCatalog(strings)
+            self.source = self.catalog.column(strings)
+            self.columns = {}
+            self.targets = {}
+            return self.catalog, self.source, None
+        # }
+        return self.catalog, self.source, self.source.update(strings)
+    # }
+
+    def getColumn(self, translations: TranslationsFile, lang: str) -> CatalogColumn:
+        """
+        Returns the column of the strings of the language of the source file, the language is parsed only if its
+        text is changed. The other fields of the parsed language are kept, see TranslationsFile.takeStrings().
+        """
+        raw_text = translations.rawText(lang)
+        text_hash = TranslationManifest.hashText(raw_text) if raw_text is not None else ""
+        cached = self.columns.get(lang)
+        if cached is not None and text_hash and cached[0] == text_hash:
+            return cached[1]
+        # }
+        column = self.catalog.column(translations.takeStrings(lang))
+        if text_hash:
+            self.columns[lang] = (text_hash, column)
+        # }
+        return column
+    # }
+
+    def getTarget(self, file_name: str) -> tuple[CatalogColumn, dict[str, tp.Any] | None] | None:
+        """
+        Returns the column and the other fields of the language of the target file if it is not modified since the
+        previous run.
+        """
+        cached = self.targets.get(file_name)
+        if cached is None or cached[0] != source_signature(file_name):
+            return None
+        # }
+        return cached[1], cached[2]
+    # }
+
+    def keepTargets(self, targets: list[TranslationTarget]) -> None:
+        """
+        Keep the columns of the targets saved by the run with the signatures of their files, should be called when
+        the files are written. The columns of the other targets may differ from their files, they are loaded again.
+        """
+        for target in targets:
+            if target.json_to_file is None:
+                continue
+            # }
+            signature = source_signature(target.json_to_file)
+            if signature is None or not target.saved or target.total_done + target.pruned == 0:
+                self.targets.pop(target.json_to_file, None)
+                continue
+            # }
+            self.targets[target.json_to_file] = (signature, target.tg_tr, target.tg_fields)
+        # }
+    # }
+
+# } CatalogCache
+
+
 def PrintCommandLineUsage():
     print(f"Usage: python -m translate_json [-from | -fromfile | -to | -tofile | -save-branch | -save-source] <arguments>...")
     print("-from <language code>\t-- source language code of two symbol e.g.(sl | de).")
     print("-fromfile <file name>\t-- source file name with path (default Translations.json).")
-    print("-to <language code>\t-- target language.")
+    print("-to <language codes>\t-- target language, comma separated list of languages (pl,de,fr) or 'all'.")
     print("-save-strings \t\t-- if the source Translations.json save translated strings to Strings_<xx>.json.")
     print("-save-source\t\t-- if the source Translations.json save translated strings into the source json file as well.")
+    print("-threads <number>\t-- maximum number of the batches in flight for the threads engine (default 6).")
+    print("-rate <number>\t\t-- maximum number of the requests per second to the translator.")
+    print("-adaptive\t\t-- adapt the number of the batches in flight to the latency and the errors of the translator.")
+    print("-backend <name>\t\t-- translation backend: google (default), mymemory, deepl, ..., mock or mock:<url>.")
+    print("-backend-lang <lang>=<name>,...\t-- translation backend per target language.")
+    print("-mock <latency>,<sigma>,<error rate>,<max rps>\t-- parameters of the local mock server for '-backend mock'.")
+    print("-connections <number>\t-- maximum number of the kept HTTP connections (default the number of the batches in flight).")
+    print("-engine <threads | async | processes>\t-- translation engine: thread pool (default), asyncio event loop or process pool.")
+    print("-memory <file name>\t-- translation memory file (default TranslationMemory.db in the folder of the source file).")
+    print("-no-memory\t\t-- do not use translation memory.")
+    print("-metrics-log <file name>\t-- append the events of the batches to the JSON lines file.")
+    print("-metrics-prom <file name>\t-- write the metrics of the run to the file in Prometheus text format.")
+    print("-no-manifest\t\t-- do not detect the source strings changed since their translation.")
+    print("-prune\t\t\t-- remove the keys deleted from the source since their translation from the target.")
+    print("-resume\t\t\t-- restore translations from the journal of the interrupted run.")
+    print("-priority <file name>\t-- priorities of the keys: JSON {key: priority} or lines '<key> <priority>', 'Prefix*' for prefixes.")
+    print("-time-budget <seconds>\t-- stop sending new batches after the time, the strings of higher priority are sent first.")
+    print("-task-timeout <seconds>\t-- retry a batch not translated in time (default 180, 0 - no limit).")
+    print("-sources <languages | auto>\t-- translate the keys absent in the source language from the fallbacks, 'auto' - by coverage.")
+    print("-pivot <lang>=<pivot>,...\t-- translate the target language from the related pivot one where it has the translation.")
+    print("-drain-timeout <seconds>\t-- on Ctrl+C or SIGTERM wait for the batches in flight (default 30).")
+    print("-watch [<seconds>]\t-- keep running and translate the new and changed strings when the source file is changed (poll every 2 seconds).")
+    print("-compact\t\t-- write compact JSON files without indent.")
+    print("-fix-case <languages | all>\t-- lower the first letter of the translation if the source starts with a lower case letter.")
     print("-test\t\t-- copy strings from source to target language JSON without translation.")
     print("\t\t\t   * If target file exists it will be used to load already translated strings (instead of source).")
 # }
@@ -179,49 +1076,270 @@ def CheckCLParameter(param_name: str, argv: list[str], lev_argv: int) -> str | N
 # }
 
 
-#
-def main():
-    argv: list[str] = sys.argv[1:]
-    if len(argv) == 0:
-        PrintCommandLineUsage()
+def plan_target_work(target: TranslationTarget, source: CatalogColumn,
+                     order: list[int] | None = None) -> tuple[list[int], set[int]]:
+    """
+    The planning stage of the scan of the target language. The keys are compared by the sets of the key ids once for
+    all the keys: the keys missing in the target are cloned from the base strings where they have them, the rest of
+    the missing ones and the changed ones are new, the translations equal to the source strings are copies. The keys
+    taken from the target language itself by the fallbacks are skipped. The ids of the source keys are their indexes
+    in the source column, the keys without a source value are skipped.
+    Returns the ids of the keys to translate in the scan order (the order of the previous attempt, the order of the
+    priorities or the order of the source) and the set of the new ones.
+    """
+    size = len(source.values)
+    tg_tr = target.tg_tr
+    missing = tg_tr.missingIds(size)
+    if source.count < size:     # the catalog kept by the watch mode has the keys deleted from the source
+        sc_values = source.values
+        missing = [key_id for key_id in missing if sc_values[key_id] is not None]
+    # }
+    if target.base_tr is not None and missing:
+        copied = tg_tr.copyFrom(target.base_tr, missing)
+        if copied > 0:
+            target.clone += copied
+            values = tg_tr.values
+            missing = [key_id for key_id in missing if not values[key_id]]
+        # }
+    # }
+    ids = tg_tr.catalog.ids
+    new_ids: set[int] = set(missing)
+    new_ids.update(ids[key] for key in target.changed)
+    dirty: set[int] = new_ids.union(tg_tr.sameIds(source))
+    if target.source_langs:
+        dirty.difference_update(ids[key] for key, lang in target.source_langs.items() if lang == target.tgt_lang)
+    # }
+    if target.attempts == 0:    # the copies are counted in tg_len, their translations are counted in total_done
+        target.copies = len(dirty.difference(new_ids))
+    # }
+    if target.scan_ids is not None:
+        order = target.scan_ids
+    # }
+    work = sorted(dirty) if order is None else [key_id for key_id in order if key_id in dirty]
+    return work, new_ids
+# }
+
+
+def submit_target_batches(target: TranslationTarget, source: CatalogColumn, treads_poll: TasksPool | AsyncTasksPool,
+                          strings_per_packet: int, priorities: list[float] | None = None,
+                          priority_order: list[int] | None = None) -> None:
+    """
+    Plan the work of the target language by plan_target_work(), pack the strings to translate in batches and queue
+    the batches in the pool by their priority. The next attempt scans only the keys which were pending in this one.
+    If priorities of the source keys (by key ids) are given, the keys are scanned from the highest priority
+    (priority_order), so STR_LIMIT takes the most valuable strings. A key is translated from its fallback language
+    if it is absent in the source language and from the pivot of the target if the pivot has its translation; the
+    strings are packed in batches by their source language. The sizes of the source strings in bytes are cached
+    in the source column for all the targets and attempts.
+    """
+    pending: dict[str, list[tuple[str, str, int, float]]] = {}     # source language -> strings to translate
+    added: int = 0
+    target.startAttempt()
+    work, _ = plan_target_work(target, source, priority_order)
+    catalog_keys = source.catalog.keys
+    sc_values = source.values
+    sc_sizes = source.byteSizes(work, ENCODING)
+    pivot_values = target.pivot_tr.values if target.pivot_tr is not None else []
+    source_langs = target.source_langs
+    scan_ids: list[int] | None = work
+
+    for key_id, size in zip(work, sc_sizes):
+        key_sc = catalog_keys[key_id]
+        val_sc = sc_values[key_id]
+        src_lang = source_langs.get(key_sc, target.csr_lang) if source_langs else target.csr_lang
+        if key_id < len(pivot_values):
+            val_pv = pivot_values[key_id]
+            if val_pv and val_pv != val_sc:     # the pivot has a translation, not a copy of the source
+                val_sc, src_lang = val_pv, target.pivot_lang
+                size = len(val_sc.encode(ENCODING))
+            # }
+        # }
+        keys = target.queued.get(val_sc)
+        if keys is not None:    # the same text is already in a batch
+            keys.append(key_sc)
+            continue
+        # }
+        translation = target.getFromMemory(val_sc, src_lang)
+        if translation is not None:
+            target.setTranslation(key_sc, translation)
+            target.total_done += 1
+            continue
+        # }
+        target.queued[val_sc] = []
+        pending.setdefault(src_lang, []).append((key_sc, val_sc, size,
+                                                 0.0 if priorities is None else priorities[key_id]))
+        added += 1
+        if 0 < STR_LIMIT <= added:
+            target.max_strings = -1
+            scan_ids = None
+            break
+        # }
+    # }
+
+    packer = BatchPacker(BYTES_PER_BATCH, strings_per_packet)
+    b_number: int = 0
+    for src_lang, items_lang in pending.items():
+        texts, keys, batches = packer.pack(items_lang, target)
+        for start, end, priority in batches:    # a queued batch is the range of the packed strings
+            b_number += 1
+            target.batchSubmitted()
+            treads_poll.queueTask(priority, texts, target, keys, end - start, b_number, 0, src_lang, start)
+        # }
+    # }
+    target.scan_ids = scan_ids
+    target.packed_batches += packer.batches
+    target.packed_bytes += packer.bytes
+    target.scanFinished()
+# }
+
+
+def submit_queued(treads_poll: TasksPool | AsyncTasksPool, retry_queue: BatchRetryQueue, deadline: float) -> bool:
+    """
+    Submit the batches queued in the pool from the highest priority and the retries which are due. Returns false
+    if the deadline of the time budget (by time.monotonic(), 0 - no budget) is over, the rest stay queued.
+    """
+    while treads_poll.submitQueued(1) > 0:
+        retry_queue.submitDue(treads_poll)
+        if 0 < deadline <= time.monotonic():
+            return False
+        # }
+    # }
+    return True
+# }
+
+
+def load_target_file(file_name: str | None, translation_source: bool, indent: str | None) -> tp.Any:
+    """
+    Returns the loaded target file: TranslationsFile if translation_source is true, otherwise the parsed
+    Strings_xx.json, or None if the file is absent. The files are loaded by map() of the pool, see translate().
+    """
+    if file_name is None or not os.path.isfile(file_name):
+        return None
+    # }
+    if translation_source:
+        return TranslationsFile(file_name, ENCODING, indent)
+    # }
+    with open(file=file_name, encoding=ENCODING) as f:
+        return json.load(f)
+    # }
+# }
+
+
+def save_target(target: TranslationTarget, translations: tp.Any, translation_source: bool, strings_estimated: int,
+                save_source: bool, writer: OutputWriter) -> None:
+    """
+    Sort the translated strings of the target language, serialize them once and pass the target files to the writer.
+    """
+    target.saved = True
+    if target.memory is not None:
+        target.memory.flush()
+    # }
+    if target.total_done == 0 and target.pruned == 0:
+        print(LINE_CLEAR + f"[{target.tgt_lang}] Nothing to do!")
         return
     # }
-    # print(sys.argv[1:])
+    tgt_lang = target.tgt_lang
+    # SORTING by key, the order of the keys is shared by all the languages
+    tg_new_len: int = len(target.tg_tr)
+    strings_json: str = writer.dumps(target.tg_tr.toDict())    # serialize once for all the files
+    retranslated: int = target.changed_count - len(target.changed)   # changed keys were counted in tg_len
+    tg_percentage = int(100 * (target.tg_len - target.copies - retranslated + target.total_done + target.clone) /
+                        strings_estimated)
+
+    print(LINE_CLEAR + f"[{tgt_lang}] {target.total_done} strings were successfully translated ({tg_percentage}% of total text) in {target.attempts} attempts.")
+    print(f"[{tgt_lang}] {tg_new_len} strings in the result JSON file.")
+
+    if translation_source:
+        if save_source:     # "Strings" are written from strings_json
+            translations[tgt_lang]["Strings"] = target.tg_tr
+            translations[tgt_lang]["Percentage"] = tg_percentage
+            translations.setStringsJson(tgt_lang, strings_json)
+        # }
+        if target.translations_tg is None:
+            target.translations_tg = TranslationsFile(encoding=ENCODING, indent=writer.indent)
+        # }
+        if tgt_lang not in target.translations_tg:
+            target.translations_tg[tgt_lang] = dict(translations[tgt_lang])
+        # }
+        target.translations_tg[tgt_lang]["Strings"] = target.tg_tr
+        target.translations_tg[tgt_lang]["Percentage"] = tg_percentage
+        target.translations_tg.setStringsJson(tgt_lang, strings_json)
+        writer.writeTranslations(target.translations_tg, target.json_to_file)
+        target.tg_fields = target.translations_tg[tgt_lang]
+        target.translations_tg = None   # the writer keeps it until the file is saved
+        print(f"Target language strings saved to {os.path.basename(target.json_to_file)}.")
+    # }
+
+    if target.strings_json_to_file is not None:
+        writer.writeText(target.strings_json_to_file, strings_json)
+        print(f"Target language strings saved to {os.path.basename(target.strings_json_to_file)}.")
+    # }
+# }
+
+
+def install_stop_handlers(treads_poll: TasksPool | AsyncTasksPool, drain_timeout: float) -> dict[int, tp.Any]:
+    """
+    The first SIGINT or SIGTERM stops submission of the batches and drains the batches in flight for drain_timeout
+    seconds, the second one interrupts the run at once. Returns the previous handlers to restore.
+    """
+    def on_signal(signum: int, frame: tp.Any) -> None:
+        if treads_poll.stop_requested:
+            raise KeyboardInterrupt
+        # }
+        print(LINE_CLEAR + f"Stopping: waiting for the batches in flight up to {drain_timeout:g} seconds, "
+                           f"press Ctrl+C again to abort.", flush=True)
+        treads_poll.requestStop(drain_timeout)
+    # }
+
+    previous: dict[int, tp.Any] = {}
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous[signum] = signal.signal(signum, on_signal)
+    # }
+    return previous
+# }
+
+
+#
+def translate(argv: list[str], services: TranslatorServices) -> bool:
+    """
+    One run of the translator by the command line arguments with the services kept between the runs.
+    Returns False if the run was interrupted or the arguments are wrong, so the watch mode stops.
+    """
 
     json_from_file_path: tp.Any
-    strings_json_to_file: tp.Any = None
-    json_to_file: tp.Any = None
     csr_lang: str | None
-    tgt_lang: str | None
+    tgt_langs_param: str | None
+    tgt_langs: list[str]
     json_from_file_name: str
     translation_source: bool = False
     save_source: bool = False
     strings_source: bool = False
-    to_strings_file: bool = False
+    save_strings: bool = False
     tg_tr: tp.Any
     global test_mode
     len_argv: int = len(argv)
 
-    strings_per_packet: int = max(20, STR_PER_BATCH)  # Translate by strings_per_packet in one request
+    strings_per_packet: int = STR_PER_BATCH  # Translate up to strings_per_packet in one request, 0 - no limit
 
     csr_lang = CheckCLParameter("-from", argv, len_argv)
     if csr_lang is None:
         print("Please provide source language code (-sl <code>) or use 'auto' to find any language with 100 persantage translation.\n\r")
         PrintCommandLineUsage()
-        return
+        return False
     # }
 
-    tgt_lang = CheckCLParameter("-to", argv, len_argv)
-    if tgt_lang is None:
+    tgt_langs_param = CheckCLParameter("-to", argv, len_argv)
+    if tgt_langs_param is None:
         print("Please provide target language code (-tl <code>)!\n\r")
         PrintCommandLineUsage()
-        return
+        return False
     # }
 
     json_from_file_path = CheckCLParameter("-fromfile", argv, len_argv)
     if json_from_file_path is None:
         json_from_file_name = 'Translations.json'
         json_from_file_location = ""
+        json_from_file_path = json_from_file_name
         translation_source = True
     else:
         json_from_file_name = os.path.basename(json_from_file_path)
@@ -230,24 +1348,19 @@ def main():
 
     if json_from_file_name == "Strings.json":
         strings_source = True
-        to_strings_file = True
-        json_to_file = os.path.join(json_from_file_location, f'Strings_{tgt_lang}.json')
-        strings_json_to_file = json_to_file
     # }
-    
+
     if "-save-strings" in argv and not strings_source:
-        strings_json_to_file = os.path.join(json_from_file_location, f'Strings_{tgt_lang}.json')
-        to_strings_file = True
+        save_strings = True
     # }
 
     if json_from_file_name == "Translations.json":
         translation_source = True
-        json_to_file = os.path.join(json_from_file_location, f'Translations_{tgt_lang}.json')
     # }
 
     if not os.path.isfile(json_from_file_path):
         print(f"File {json_from_file_name} was not find in the path {json_from_file_location}!\n\r")
-        return
+        return False
     # }
 
     if not test_mode and "-test" in argv and translation_source:
@@ -258,36 +1371,31 @@ def main():
         save_source = True
     # }
 
-    translations_tg = None
-    with open(file=json_from_file_path, encoding=ENCODING) as f:
-        translations = json.load(f)
-
-    if os.path.isfile(json_to_file):
-        with open(file=json_to_file, encoding=ENCODING) as f:
-            translations_tg = json.load(f)
+    json_indent: str | None = None if "-compact" in argv else JSON_INDENT
+    translations: tp.Any
+    if translation_source:  # parse only the languages to be used
+        translations = TranslationsFile(json_from_file_path, ENCODING, json_indent)
+    else:
+        with open(file=json_from_file_path, encoding=ENCODING) as f:
+            translations = json.load(f)
     # }
 
     print(f"Source json file was loaded at {time.strftime('%X')}.")
 
-    if translation_source and save_source:
-        tg_tr = translations[tgt_lang]["Strings"]   # to save the same file Translations.json [and Translations_xx.json]
-    else:
-        if translations_tg is None:
-            tg_tr = dict({})    # new empty json
-        else:
-            if translation_source:
-                tg_tr = translations_tg[tgt_lang]["Strings"]    # save the same format as in Translations.json
-            else:   # if strings_source:
-                tg_tr = translations_tg
-            # }
+    if tgt_langs_param == "all":
+        if not translation_source:
+            print("Target language 'all' can be used only with Translations.json source!\n\r")
+            return False
         # }
+        tgt_langs = [lang for lang in translations if lang != csr_lang]
+    else:
+        tgt_langs = [lang.strip() for lang in tgt_langs_param.split(",") if lang.strip() and lang.strip() != csr_lang]
     # }
 
-    tg_len = len(tg_tr)
     if translation_source:
         if not translations.get(csr_lang):
             print(f"Source language {csr_lang} is absent in {json_from_file_name}!\n\r")
-            return
+            return False
         # }
         sc_tr = translations[csr_lang]["Strings"]
         sc_len = len(sc_tr)
@@ -300,116 +1408,386 @@ def main():
         sc_percentage = 100
     # }
 
-    print(f"Total {sc_len} strings in source language ({tg_len} in target language).")
+    # the keys absent in the source language are taken from the fallbacks, the targets may have pivots
+    planner = SourcePlanner(csr_lang, SourcePlanner.parsePivots(CheckCLParameter("-pivot", argv, len_argv)))
+    sources_param: str | None = CheckCLParameter("-sources", argv, len_argv)
+    if (sources_param is not None or planner.pivots) and not translation_source:
+        print("Fallback sources and pivots can be used only with Translations.json source!\n\r")
+        return False
+    # }
+    if sources_param is not None:
+        order: list[str] | None = None  # auto - by the coverage of the absent keys
+        if sources_param != "auto":
+            order = [lang.strip() for lang in sources_param.split(",") if lang.strip()]
+        # }
+        for lang in order or list(translations):
+            if lang == csr_lang or not translations.get(lang):
+                continue
+            # }
+            planner.addCandidate(lang, translations[lang].get("Strings") or {}, sc_tr,
+                                 float(translations[lang].get("Percentage") or 0))
+            if lang not in tgt_langs:
+                translations.release(lang)
+            # }
+        # }
+        planner.plan(order)
+        sc_tr = planner.mergeSource(sc_tr)
+        sc_len = len(sc_tr)
+        strings_estimated = max(strings_estimated, sc_len)
+        if planner.counts:
+            print(f"{len(planner.extra)} keys absent in {csr_lang} are translated from "
+                  + ", ".join(f"{lang} ({count})" for lang, count in planner.counts.items()) + ".")
+        # }
+    # }
+
+    cache: CatalogCache | None = services.catalog_cache
+    source_changed: int | None = None
+    if cache is not None:   # the catalog of the previous run, only the new keys are interned
+        catalog, source, source_changed = cache.getSource(sc_tr)
+    else:
+        catalog = StringCatalog(sc_tr)      # the keys are interned once for all the target languages
+        source = catalog.column(sc_tr)      # the ids of the source keys are their indexes in the column
+    # }
+    print(f"Total {sc_len} strings in source language.")
+    if source_changed is not None:
+        print(f"{source_changed} source strings were added or changed since the previous run.")
+    # }
     if sc_percentage < 100:
         print(f"The estimated total count of the strings should be {strings_estimated}.")
     # }
 
-    translation_packets = TaskPacketTranslationList(MAX_THERADS, csr_lang, tgt_lang)
-    treads_poll = TranslateTasksPool(MAX_THERADS, translation_packets)
+    if services.memory is None and "-no-memory" not in argv:
+        memory_file = CheckCLParameter("-memory", argv, len_argv) or os.path.join(json_from_file_location, MEMORY_FILE)
+        if test_mode:
+            memory_file = ":memory:"    # do not save copies of the source strings made in the test mode
+        # }
+        services.memory = TranslationMemory(memory_file)
+    # }
+    memory: TranslationMemory | None = services.memory
 
-    text_batch: list[str] = ["" for _ in range(strings_per_packet)]
-    text_keys: list[str] = ["" for _ in range(strings_per_packet)]
-    batch_len: int
-    total_batch_len: int
-    added: int
-    copies: int = 0
-    clone: int = 0
-    i: int
-    j: int
-    attempts: int = 0
-    total_done: int = 0
-    max_strings: int = STR_LIMIT or sc_len
-    while total_done+clone+tg_len < sc_len and attempts < MAX_ATTEMPTS and total_done < max_strings:
-        added = 0
-        copies = 0
-        total_batch_len, t, b_number = 0, 0, 1
-        treads_poll.reset_progress()
-
-        for key_sc, val_sc in sc_tr.items():
-            if translation_source:
-                if translations[tgt_lang]["Strings"].get(key_sc) and not tg_tr.get(key_sc):     # copy existing translation
-                    tg_tr[key_sc] = translations[tgt_lang]["Strings"][key_sc]
-                    clone += 1
-                    continue
-                # }
+    source_hashes: dict[str, str] = {}
+    if services.manifest is None and "-no-manifest" not in argv:
+        services.manifest = TranslationManifest(json_from_file_path + MANIFEST_SUFFIX, ENCODING)
+    # }
+    manifest: TranslationManifest | None = services.manifest
+    if manifest is not None:
+        source_hashes = TranslationManifest.hashStrings(sc_tr)
+    # }
+
+    journal = TranslationJournal(json_from_file_path + ".journal", ENCODING)
+    journaled: dict[str, dict[str, str]] = {}
+    if "-resume" in argv:
+        journaled = journal.replay()
+    elif journal.exists():
+        print(f"The journal of the interrupted run {os.path.basename(journal.file_name)} is discarded, use -resume to continue it.")
+    # }
+    journal.open(append="-resume" in argv)
+
+    retry_queue = BatchRetryQueue()
+    writer = OutputWriter(ENCODING, json_indent)
+    target_files: list[tuple[str, str, str | None, tp.Any]] = []
+    for tgt_lang in tgt_langs:
+        strings_json_to_file: str | None = None
+        if translation_source:
+            if not translations.has(tgt_lang):
+                print(f"Target language {tgt_lang} is absent in {json_from_file_name}!")
+                continue
             # }
-            i, j = 0, 0
-            if not tg_tr.get(key_sc):
-                i = 1
-            elif tg_tr[key_sc] == val_sc:
-                j = 1
-            # }        
-            if (i + j) > 0:  # need to translate new string from the source language
-                batch_len = len(val_sc.encode(ENCODING))
-                if total_batch_len + batch_len >= BYTES_PER_BATCH or t == strings_per_packet:
-                    treads_poll.submitTaskInPool(text_batch[:t].copy(), tg_tr, text_keys[:t].copy(), t, b_number)
-                    b_number += 1
-                    total_batch_len = 0
-                    t = 0
-                # }
-                total_batch_len += batch_len
-                text_batch[t] = val_sc
-                text_keys[t] = key_sc
-                t += 1
-                added += i
-                copies += j
-                if 0 < STR_LIMIT <= (added + copies):
-                    max_strings = -1
-                    break
-                # }
+            json_to_file = os.path.join(json_from_file_location, f'Translations_{tgt_lang}.json')
+            if save_strings:
+                strings_json_to_file = os.path.join(json_from_file_location, f'Strings_{tgt_lang}.json')
             # }
+        else:
+            json_to_file = os.path.join(json_from_file_location, f'Strings_{tgt_lang}.json')
+            strings_json_to_file = json_to_file
         # }
-        attempts += 1
-        if added + copies > 0:
-            if t > 0:
-                treads_poll.submitTaskInPool(text_batch[:t].copy(), tg_tr, text_keys[:t].copy(), t, b_number)
-            # }
-            total_done += treads_poll.waitForAllTasks()
-            #print(f"Added new {added} strings from the language \"{csr_lang}\". {added + copies} strings passed to google translater.")
+        cached = cache.getTarget(json_to_file) if cache is not None and not save_source else None
+        target_files.append((tgt_lang, json_to_file, strings_json_to_file, cached))
+    # }
+
+    # the target files are read on the pool while the columns of the files read before are built; the strings
+    # of a target saved by the previous run of the watch mode are kept in its column, its file is not parsed
+    loaded_files: tp.Iterable[tp.Any] = ()
+    if target_files:
+        if services.pool is None:
+            services.start(argv, csr_lang)
         # }
+        loaded_files = services.pool.map(
+            functools.partial(load_target_file, translation_source=translation_source, indent=json_indent),
+            [None if cached is not None and not translation_source else json_to_file
+             for _, json_to_file, _, cached in target_files])
     # }
-    
-    print(LINE_CLEAR)
+    targets: list[TranslationTarget] = []
+    for (tgt_lang, json_to_file, strings_json_to_file, cached), translations_tg in zip(target_files, loaded_files):
+        if cached is not None and translations_tg is not None:  # only the other fields of the language are set
+            translations_tg[tgt_lang] = dict(cached[1])
+        # }
 
-    if total_done > 0:
-        # SORTING by key
-        tg_tr = dict(sorted(tg_tr.items()))
-        tg_new_len: int = len(tg_tr)
-        tg_percentage = int(100 * (tg_len - copies + total_done + clone) / strings_estimated)
+        # the strings are moved to the columns of the catalog, the parsed dicts are released; the other fields of
+        # a language are kept parsed to be saved, its text is written as is until it is saved
+        base_tr: CatalogColumn | None = None
+        if translation_source and save_source:
+            tg_tr = catalog.column(translations.takeStrings(tgt_lang))  # to save the same file Translations.json [and Translations_xx.json]
+        else:
+            if cached is not None:
+                tg_tr = cached[0]
+            elif translations_tg is None:
+                tg_tr = catalog.column()    # new empty json
+            else:
+                if translation_source:
+                    tg_tr = catalog.column(translations_tg.takeStrings(tgt_lang))   # save the same format as in Translations.json
+                else:   # if strings_source:
+                    tg_tr = catalog.column(translations_tg)
+                    translations_tg = None
+                # }
+            # }
+            if translation_source:  # to copy existing translations, Translations.json is not written
+                base_tr = (cache.getColumn(translations, tgt_lang) if cache is not None else
+                           catalog.column(translations.takeStrings(tgt_lang)))
+            # }
+        # }
+        target = TranslationTarget(tgt_lang, tg_tr, translations_tg, json_to_file, strings_json_to_file, csr_lang,
+                                   memory, retry_queue, journal, manifest, source_hashes)
+        target.base_tr = base_tr
+        target.max_strings = STR_LIMIT or sc_len
+        target.on_complete = lambda tg: save_target(tg, translations, translation_source, strings_estimated, save_source,
+                                                    writer)
+        targets.append(target)
+        print(f"[{tgt_lang}] {target.tg_len} strings in target language.")
+        changed, deleted = target.checkManifest("-prune" in argv)
+        if changed + deleted > 0:
+            print(f"[{tgt_lang}] {changed} strings were changed and {deleted} deleted in the source since translation"
+                  f"{f', {target.pruned} strings were pruned' if target.pruned else ''}.")
+        # }
+        if journaled.get(tgt_lang):
+            print(f"[{tgt_lang}] {target.restore(journaled[tgt_lang])} strings restored from the journal.")
+        # }
+    # }
 
-        print(f"{total_done} strings were successfully translated ({tg_percentage}% of total text) in {attempts} attempts.")
-        print(f"{tg_new_len} strings in the result JSON file.")
+    if not targets:
+        journal.close(remove=True)
+        writer.close()
+        print(f"Nothing to do!")
+        return True
+    # }
 
-        if translation_source:
-            translations[tgt_lang]["Strings"] = tg_tr
-            translations[tgt_lang]["Percentage"] = tg_percentage
-            if save_source and not test_mode:
-                with open(file=json_from_file_name, mode="w", encoding=ENCODING) as outfile:
-                    json.dump(obj=translations, fp=outfile, skipkeys=False, ensure_ascii=False, indent=JSON_INDENT)
-                print(f"Translated strings saved to origin file {json_from_file_name}.")
-            # }
-            if translations_tg is None:
-                translations_tg = dict([(tgt_lang,None)])
-                translations_tg[tgt_lang] = translations[tgt_lang]
+    run_targets: dict[str, TranslationTarget] = {target.tgt_lang: target for target in targets}
+    for target in targets:
+        target.source_langs = planner.extra_langs
+        pivot = planner.getPivot(target.tgt_lang)
+        if pivot is None:
+            continue
+        # }
+        if pivot in run_targets:    # translated from the pivot when it is completed
+            target.pivot_target = run_targets[pivot]
+            target.pivot_tr = target.pivot_target.tg_tr
+        elif translations.has(pivot):
+            if cache is not None:
+                target.pivot_tr = cache.getColumn(translations, pivot)
             else:
-                translations_tg[tgt_lang]["Strings"] = tg_tr
-                translations_tg[tgt_lang]["Percentage"] = tg_percentage
+                target.pivot_tr = catalog.column(translations[pivot]["Strings"])
             # }
-            with open(file=json_to_file, mode="w", encoding=ENCODING) as outfile:
-                json.dump(obj=translations_tg, fp=outfile, skipkeys=False, ensure_ascii=False, indent=JSON_INDENT)
-            print(f"Target language strings saved to {os.path.basename(json_to_file)}.")
+            translations.release(pivot)
+        else:
+            print(f"Pivot language {pivot} is absent in {json_from_file_name}!")
+            continue
+        # }
+        target.pivot_lang = pivot
+        print(f"[{target.tgt_lang}] strings are translated from {pivot} where it has their translation.")
+    # }
+
+    treads_poll: TasksPool | AsyncTasksPool = services.pool
+    validator: TranslationValidator = services.validator
+    # the batches of all the target languages are sent from the highest priority of their strings
+    priorities: list[float] | None = None
+    priority_order: list[int] | None = None
+    if CheckCLParameter("-priority", argv, len_argv):
+        key_priorities = KeyPriorities(CheckCLParameter("-priority", argv, len_argv), ENCODING)
+        priorities = [key_priorities.get(key) for key in catalog.keys]     # by the key ids
+        priority_order = sorted(range(len(priorities)), key=priorities.__getitem__, reverse=True)
+        print(f"{len(key_priorities)} priorities of the keys were loaded.")
+    # }
+    time_budget: float = float(CheckCLParameter("-time-budget", argv, len_argv) or TIME_BUDGET)
+    treads_poll.resetStats()    # the pool of the watch mode reports every run alone
+    submitted_before: int = treads_poll.submitted
+    start_time: float = time.perf_counter()
+    deadline: float = time.monotonic() + time_budget if time_budget > 0 else 0.0
+    budget_over: bool = False
+    dropped: int = 0
+
+    stopped: TasksPoolStopped | None = None
+    previous_handlers = install_stop_handlers(treads_poll, services.drain_timeout)
+    try:
+        unfinished: list[TranslationTarget] = [tg for tg in targets if tg.isUnfinished(sc_len)]
+        while unfinished and not budget_over:
+            treads_poll.reset_progress()
+            # a target waits for its pivot translated in the run unless the targets wait for each other
+            ready: list[TranslationTarget] = [tg for tg in unfinished if tg.pivot_target not in unfinished] or unfinished
+            for target in ready:
+                submit_target_batches(target, source, treads_poll, strings_per_packet, priorities, priority_order)
+                if priorities is None and not budget_over:  # translate the batches while the next target is scanned
+                    budget_over = not submit_queued(treads_poll, retry_queue, deadline)
+                # }
+            # }
+            budget_over = budget_over or not submit_queued(treads_poll, retry_queue, deadline)
+            treads_poll.waitForAllTasks()
+            while retry_queue and not budget_over:
+                retry_queue.submitDue(treads_poll, wait=True)
+                treads_poll.waitForAllTasks()
+                budget_over = 0 < deadline <= time.monotonic()
+            # }
+            unfinished = [tg for tg in targets if tg.isUnfinished(sc_len)]
+        # }
+        if budget_over:     # the batches in flight are done, the rest is left for the next run
+            dropped = len(treads_poll.clearQueued()) + retry_queue.clear()
+        # }
+    except TasksPoolStopped as exc:
+        stopped = exc
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        # }
+    # }
+
+    print(LINE_CLEAR)
+    print(f"Translation took {time.perf_counter() - start_time:.2f} seconds with the {services.engine} engine.")
+    if treads_poll.timed_out > 0:
+        print(f"{treads_poll.timed_out} batches were not translated in {services.task_timeout:g} seconds and were retried.")
+    # }
+    if budget_over:
+        print(f"The time budget of {time_budget:g} seconds is over, {dropped} batches were not sent.")
+    # }
+    packed_batches: int = sum(tg.packed_batches for tg in targets)
+    if packed_batches > 0:
+        packed_bytes: int = sum(tg.packed_bytes for tg in targets)
+        print(f"{treads_poll.submitted - submitted_before} batches were sent, fill ratio {100 * packed_bytes / (packed_batches * BYTES_PER_BATCH):.1f}%.")
+    # }
+    if retry_queue.retried + retry_queue.salvaged > 0:
+        print(f"{retry_queue.retried} failed batches were retried, lost strings of {retry_queue.salvaged} batches were queued again.")
+    # }
+    if validator.rejectedTotal() > 0:
+        print(f"Validation rejected {validator.rejectedTotal()} translations: "
+              + ", ".join(f"{reason} {count}" for reason, count in validator.totals.items() if count > 0) + ".")
+    # }
+    if isinstance(treads_poll, TasksPool):
+        print(f"{treads_poll.requestsPerSecond():.1f} requests per second, {treads_poll.getLimit()} batches in flight at the end.")
+    # }
+    print(f"Slots of the pool were busy {100 * treads_poll.getUtilization():.1f}% of the time.")
+
+    if stopped is not None:     # the saved translations are kept in the journal only
+        writer.close()
+        journal.close()
+        print(f"The run is interrupted, {stopped.abandoned} batches in flight were abandoned. "
+              f"{sum(tg.total_done for tg in targets)} translated strings are kept in {os.path.basename(journal.file_name)}, "
+              f"use -resume to continue.")
+        return False
+    # }
+
+    total_done: int = 0
+    for target in targets:
+        if not target.saved:
+            save_target(target, translations, translation_source, strings_estimated, save_source, writer)
         # }
+        total_done += target.total_done + target.pruned
+        target.commitManifest()
+    # }
 
-        if to_strings_file and strings_json_to_file is not None:
-            with open(file=strings_json_to_file, mode="w", encoding=ENCODING) as outfile:
-                json.dump(obj=tg_tr, fp=outfile, skipkeys=False, ensure_ascii=False, indent=JSON_INDENT)
-            print(f"Target language strings saved to {os.path.basename(strings_json_to_file)}.")
+    journal.close(remove=True)  # all the translations are saved
+    if manifest is not None and not test_mode:
+        manifest.save()
+    # }
+
+    if memory is not None:
+        memory.flush()
+    # }
+
+    if total_done > 0:
+        if save_source and not test_mode:
+            writer.writeTranslations(translations, json_from_file_path)
+            print(f"Translated strings saved to origin file {json_from_file_name}.")
         # }
+        writer.close()    # all the files are written
         print(f"All done at {time.strftime('%X')}. Goodbye!")
     else:
+        writer.close()
         print(f"Nothing to do!")
     # }
+    if cache is not None and not save_source:
+        cache.keepTargets(targets)
+    # }
+    return True
+# }
+
+
+def source_signature(file_name: str) -> tuple[int, int] | None:
+    """
+    Returns the modification time and the size of the file or None if it is absent.
+    """
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return None
+    # }
+    return stat.st_mtime_ns, stat.st_size
+# }
+
+
+def watch_source(argv: list[str], services: TranslatorServices, interval: float) -> None:
+    """
+    The watch mode: translate the source file, then poll its modification time and size every interval seconds and
+    translate it again when it is changed. The services and the catalog of the keys are kept warm between the runs and
+    the manifest of the source hashes gives the delta: only the new and changed strings are sent to the translator. A change is translated when
+    the file was not modified for an interval, so a file being written is not read. The writes of the run itself
+    (-save-source) are not taken for a change. Ctrl+C stops the watching.
+    """
+    len_argv: int = len(argv)
+    file_name = CheckCLParameter("-fromfile", argv, len_argv) or "Translations.json"
+    print(f"Watching {file_name} every {interval:g} seconds, press Ctrl+C to stop.")
+    services.catalog_cache = CatalogCache()
+    signature: tuple[int, int] | None = None
+    try:
+        while True:
+            current = source_signature(file_name)
+            if current is not None and current != signature:
+                time.sleep(interval)    # wait until the file is written
+                if source_signature(file_name) != current:
+                    continue
+                # }
+                try:
+                    if not translate(argv, services):
+                        return
+                    # }
+                except ValueError as exc:   # the file is saved partially or broken, wait for the next change
+                    print(f"{file_name} can not be parsed: {exc}. Waiting for the next change.")
+                # }
+                signature = source_signature(file_name)
+                print(f"Watching {file_name} for changes since {time.strftime('%X')}.")
+            # }
+            time.sleep(interval)
+        # }
+    except KeyboardInterrupt:
+        print(f"Watching of {file_name} is stopped.")
+    # }
+# }
+
+
+#
+def main():
+    argv: list[str] = sys.argv[1:]
+    if len(argv) == 0:
+        PrintCommandLineUsage()
+        return
+    # }
+    # print(sys.argv[1:])
+
+    with TranslatorServices() as services:
+        if "-watch" in argv:
+            interval = CheckCLParameter("-watch", argv, len(argv))
+            watch_source(argv, services, float(interval) if interval and not interval.startswith("-") else WATCH_INTERVAL)
+        else:
+            translate(argv, services)
+        # }
+    # }
 # }
 
 
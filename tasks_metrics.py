@@ -0,0 +1,210 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+import json
+import os
+import threading
+import time
+import typing as tp
+
+from tasks_pool import TaskPoolCoroutine, TasksPoolObserver
+
+__all__ = ['JsonLinesMetrics', 'PrometheusMetrics']
+
+TIME_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class JsonLinesMetrics(TasksPoolObserver):
+    """
+    The observer which writes every event of the tasks of the pool as a line of JSON: the event, the wall-clock
+    time, the index and the sequence number of the task, its wait and run times in seconds and the tasks in flight.
+    Finished and failed events have the fields of TaskPoolCoroutine.metrics set by the task as well.
+
+    Args:
+        file_name: str - JSON lines file name, the lines are appended.
+        encoding: str - file encoding (default utf-8).
+    """
+    def __init__(self, file_name: str, encoding: str = "utf-8"):
+        self.file_name: str = file_name
+        self.lock: tp.Any = threading.Lock()     # onTaskStarted() is called from working threads
+        self.file: tp.Any = open(file=file_name, mode="a", encoding=encoding, buffering=1)
+    # }
+
+    def __del__(self):
+        self.close()
+    # }
+
+    def write(self, event: str, pool: tp.Any, tasks_obj: TaskPoolCoroutine, **fields) -> None:
+        record = {"event": event, "time": round(time.time(), 6), "task": tasks_obj.index,
+                  "sequence": tasks_obj.sequence, "in_flight": pool.in_flight, **fields}
+        line = json.dumps(record, ensure_ascii=False, default=repr) + "\n"
+        with self.lock:
+            if self.file is not None:
+                self.file.write(line)
+            # }
+        # }
+    # }
+
+    def onTaskSubmitted(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        self.write("submitted", pool, tasks_obj)
+    # }
+
+    def onTaskStarted(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        self.write("started", pool, tasks_obj, wait=round(tasks_obj.wait_time, 6))
+    # }
+
+    def onTaskFinished(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        self.write("finished", pool, tasks_obj, wait=round(tasks_obj.wait_time, 6), run=round(tasks_obj.run_time, 6),
+                   **tasks_obj.metrics)
+    # }
+
+    def onTaskFailed(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        self.write("failed", pool, tasks_obj, wait=round(tasks_obj.wait_time, 6), run=round(tasks_obj.run_time, 6),
+                   error=repr(tasks_obj.error), **tasks_obj.metrics)
+    # }
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            # }
+        # }
+    # }
+
+# } JsonLinesMetrics
+
+
+class PrometheusMetrics(TasksPoolObserver):
+    """
+    The observer which aggregates the tasks of the pool and writes them to a file in Prometheus text format, e.g.
+    for the textfile collector of node_exporter. The file is replaced atomically at most every interval seconds and
+    by close(). Metrics (with the prefix): tasks_submitted_total, tasks_finished_total, tasks_failed_total,
+    task_run_seconds and task_wait_seconds histograms, tasks_in_flight, slot_utilization and tasks_per_second
+    gauges, and <field>_total for the numeric fields of TaskPoolCoroutine.metrics listed in totals.
+
+    Args:
+        file_name: str - file name of the metrics.
+        prefix: str - prefix of the metric names (default tasks_pool).
+        labels: tuple[str, ...] - fields of TaskPoolCoroutine.metrics to label the metrics of the finished tasks with.
+        totals: tuple[str, ...] - numeric fields of TaskPoolCoroutine.metrics to sum.
+        interval: float - minimal interval between writes of the file in seconds (default 10).
+    """
+    def __init__(self, file_name: str, prefix: str = "tasks_pool", labels: tuple[str, ...] = (),
+                 totals: tuple[str, ...] = (), interval: float = 10.0):
+        self.file_name: str = file_name
+        self.prefix: str = prefix
+        self.labels: tuple[str, ...] = labels
+        self.totals: tuple[str, ...] = totals
+        self.interval: float = interval
+        self.last_write: float = 0.0
+        self.pool: tp.Any = None
+        self.counters: dict[tuple[str, str], float] = {}                # (name, labels) -> value
+        self.histograms: dict[tuple[str, str], list[float]] = {}        # (name, labels) -> bucket counts, sum, count
+    # }
+
+    def getLabels(self, tasks_obj: TaskPoolCoroutine) -> str:
+        items = [f'{name}="{tasks_obj.metrics[name]}"' for name in self.labels if name in tasks_obj.metrics]
+        return "{" + ",".join(items) + "}" if items else ""
+    # }
+
+    def add(self, name: str, labels: str, value: float = 1.0) -> None:
+        self.counters[(name, labels)] = self.counters.get((name, labels), 0.0) + value
+    # }
+
+    def observe(self, name: str, labels: str, value: float) -> None:
+        histogram = self.histograms.get((name, labels))
+        if histogram is None:
+            histogram = [0.0] * (len(TIME_BUCKETS) + 2)
+            self.histograms[(name, labels)] = histogram
+        # }
+        for i, bound in enumerate(TIME_BUCKETS):
+            if value <= bound:
+                histogram[i] += 1
+            # }
+        # }
+        histogram[-2] += value
+        histogram[-1] += 1
+    # }
+
+    def onTaskSubmitted(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        self.pool = pool
+        self.add("tasks_submitted_total", "")      # the metrics of the task are set when it is done
+    # }
+
+    def onTaskFinished(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        self.onTaskDone(pool, tasks_obj, "tasks_finished_total")
+    # }
+
+    def onTaskFailed(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        self.onTaskDone(pool, tasks_obj, "tasks_failed_total")
+    # }
+
+    def onTaskDone(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine, name: str) -> None:
+        self.pool = pool
+        labels = self.getLabels(tasks_obj)
+        self.add(name, labels)
+        self.observe("task_run_seconds", labels, tasks_obj.run_time)
+        self.observe("task_wait_seconds", labels, tasks_obj.wait_time)
+        for field in self.totals:
+            value = tasks_obj.metrics.get(field)
+            if isinstance(value, (int, float)):
+                self.add(f"{field}_total", labels, value)
+            # }
+        # }
+        if time.monotonic() - self.last_write >= self.interval:
+            self.write()
+        # }
+    # }
+
+    def write(self) -> None:
+        """
+        Write all the metrics to the file.
+        """
+        self.last_write = time.monotonic()
+        prefix = self.prefix
+        lines: list[str] = []
+        last_name: str = ""
+        for (name, labels), value in sorted(self.counters.items()):
+            if name != last_name:
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                last_name = name
+            # }
+            lines.append(f"{prefix}_{name}{labels} {value:g}")
+        # }
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if name != last_name:
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                last_name = name
+            # }
+            inner = labels[1:-1] + "," if labels else ""
+            for bound, count in zip(TIME_BUCKETS, histogram):
+                lines.append(f'{prefix}_{name}_bucket{{{inner}le="{bound:g}"}} {count:g}')
+            # }
+            lines.append(f'{prefix}_{name}_bucket{{{inner}le="+Inf"}} {histogram[-1]:g}')
+            lines.append(f"{prefix}_{name}_sum{labels} {histogram[-2]:.6f}")
+            lines.append(f"{prefix}_{name}_count{labels} {histogram[-1]:g}")
+        # }
+        if self.pool is not None:
+            lines.append(f"# TYPE {prefix}_tasks_in_flight gauge")
+            lines.append(f"{prefix}_tasks_in_flight {self.pool.in_flight}")
+            lines.append(f"# TYPE {prefix}_slot_utilization gauge")
+            lines.append(f"{prefix}_slot_utilization {self.pool.getUtilization():.4f}")
+            lines.append(f"# TYPE {prefix}_tasks_per_second gauge")
+            lines.append(f"{prefix}_tasks_per_second {self.pool.requestsPerSecond():.4f}")
+        # }
+        tmp_file_name = self.file_name + ".tmp"
+        with open(file=tmp_file_name, mode="w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        # }
+        os.replace(tmp_file_name, self.file_name)
+    # }
+
+    def close(self) -> None:
+        self.write()
+    # }
+
+# } PrometheusMetrics
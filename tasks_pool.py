@@ -4,14 +4,23 @@
 __author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
 __version__ = '1.0'
 
+import asyncio
 import concurrent.futures as cf
+import copy
+import heapq
+import queue
+import signal
+import time
 import typing as tp
+from collections import deque
+from itertools import islice
 from os import cpu_count as cpu_count
 from threading import Lock
 
 from typing_extensions import Self
 
-__all__ = ['TaskPoolCoroutine', 'TasksPool', 'TaskPoolCoroutineList']
+__all__ = ['TaskPoolCoroutine', 'TasksPool', 'TaskPoolCoroutineList', 'AsyncTasksPool', 'RateLimiter',
+           'ConcurrencyLimiter', 'TasksPoolObserver', 'TasksPoolStopped']
 
 
 class TaskPoolCoroutine:
@@ -30,6 +39,12 @@ class TaskPoolCoroutine:
         self.onRun: bool = on_run
         self.result: tp.Any = ""
         self.lock: tp.Any = Lock()
+        self.error: tp.Any = None      # doTask() sets an exception here if the job has failed
+        self.run_time: float = 0.0     # the time of the last doTask() call in seconds
+        self.sequence: int = 0         # the number of the task in the order of submission to TasksPool
+        self.submit_time: float = 0.0  # time.perf_counter() of the submission of the last task
+        self.wait_time: float = 0.0    # the time of the last task in the queue of the pool before doTask() in seconds
+        self.metrics: dict[str, tp.Any] = {}   # fields of the last task for TasksPoolObserver, e.g. its size
     # }
     
     def __del__(self):
@@ -61,6 +76,37 @@ class TaskPoolCoroutine:
         """
         ...
 
+    async def doTaskAsync(self, *argv, **kwargs) -> Self:
+        """
+        Coroutine in the context of the event loop of AsyncTasksPool. By default, it runs doTask() in the default
+        executor of the loop, overload it to do the job without threads.
+
+        Returns a self reference to TaskPoolCoroutine object.
+        """
+        return await asyncio.to_thread(self.doTask, *argv, **kwargs)
+
+    def getPayload(self, *argv, **kwargs) -> tp.Any:
+        """
+        Call in the context of the main thread instead of doTask() when TasksPool runs tasks in processes. It keeps
+        the data needed by doSaveResult() in the object and returns picklable data for processTask().
+        """
+        ...
+
+    @staticmethod
+    def processTask(payload: tp.Any) -> tp.Any:
+        """
+        Coroutine in the context of a worker process of TasksPool. It gets the payload made by getPayload() and
+        returns picklable result to be passed to setResult(). It can use only data of the worker process, see
+        TaskPoolCoroutineList.getProcessInitializer().
+        """
+        ...
+
+    def setResult(self, result: tp.Any) -> None:
+        """
+        Call in the context of the main thread to set the result returned by processTask() before doSaveResult().
+        """
+        self.result = result
+
     def doSaveResult(self) -> tuple[int, int]:
         """
         Call in the context of the main thread to post-processing the result of coroutine doTask()
@@ -131,16 +177,6 @@ class TaskPoolCoroutineList:
         return self.tasks_obj[index]
     # }
         
-    def getFreeSetRun(self) -> TaskPoolCoroutine | None:
-        for t_obj in self.tasks_obj:
-            if t_obj.lock.acquire(blocking=False):         # not t_obj.onRun
-                t_obj.onRun = True
-                return t_obj
-            # }
-        # }
-        return None
-    # }
-
     def createNew(self, index: int) -> TaskPoolCoroutine:
         """
         Create a new object inherited from TaskBoolCoroutine which represents a coroutine and its data for the
@@ -148,6 +184,24 @@ class TaskPoolCoroutineList:
         """
         return TaskPoolCoroutine(index)
     # }
+
+    def replace(self, index: int) -> TaskPoolCoroutine:
+        """
+        Replace the object by a new one created by createNew(index), e.g. if the object is abandoned by the pool
+        while its task is still running. Returns the new object.
+        """
+        tasks_obj = self.createNew(index)
+        self.tasks_obj[index] = tasks_obj
+        return tasks_obj
+    # }
+
+    def getProcessInitializer(self) -> tuple[tp.Callable | None, tuple]:
+        """
+        Returns the function and its arguments to be called once in every worker process of TasksPool, e.g. to
+        create clients used by TaskPoolCoroutine.processTask(). The function should be picklable.
+        """
+        return None, ()
+    # }
     
     def getActiveCoroutineList(self) -> list[int]:
         """
@@ -159,92 +213,1094 @@ class TaskPoolCoroutineList:
 # }
     
 
+class RateLimiter:
+    """
+    Token bucket limiter of the rate of the tasks. Tokens are added with the rate per second up to the capacity,
+    acquire() takes one token and sleeps if the bucket is empty.
+
+    Args:
+        rate: float - tokens per second.
+        capacity: float - the size of the bucket, allowed burst of the tasks (default 1).
+    """
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate: float = rate
+        self.capacity: float = max(1.0, capacity)
+        self.tokens: float = self.capacity
+        self.last_time: float = time.monotonic()
+        self.lock: tp.Any = Lock()
+    # }
+
+    def acquire(self) -> float:
+        """
+        Take a token from the bucket. Returns the time in seconds spent waiting for the token.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_time) * self.rate)
+            self.last_time = now
+            self.tokens -= 1.0
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        # }
+        if wait > 0:
+            time.sleep(wait)
+        # }
+        return wait
+    # }
+
+# } RateLimiter
+
+
+class ConcurrencyLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) control of the number of tasks in flight. The limit grows by
+    one per limit of successful tasks while the latency is not rising and it is multiplied by the decrease factor
+    when a task fails.
+
+    Args:
+        max_limit: int - maximum number of the tasks in flight.
+        limit: int - initial limit (default max_limit).
+        min_limit: int - minimum limit (default 1).
+        decrease: float - multiplicative decrease on a failure (default 0.5).
+        latency_tolerance: float - the latency is rising if the recent average latency exceeds the long term
+            average by this factor (default 1.5).
+    """
+    def __init__(self, max_limit: int, limit: int = 0, min_limit: int = 1, decrease: float = 0.5,
+                 latency_tolerance: float = 1.5):
+        self.max_limit: int = max(1, max_limit)
+        self.min_limit: int = max(1, min(min_limit, self.max_limit))
+        self.limit: float = float(min(self.max_limit, max(self.min_limit, limit or self.max_limit)))
+        self.decrease: float = decrease
+        self.latency_tolerance: float = latency_tolerance
+        self.latency_short: float = 0.0
+        self.latency_long: float = 0.0
+        self.successes: int = 0
+        self.failures: int = 0
+    # }
+
+    def getLimit(self) -> int:
+        return int(self.limit)
+    # }
+
+    def onTaskDone(self, run_time: float, failed: bool) -> None:
+        """
+        Update the limit by the result of a finished task.
+        """
+        if failed:
+            self.failures += 1
+            self.limit = max(float(self.min_limit), self.limit * self.decrease)
+            return
+        # }
+        self.successes += 1
+        if self.latency_long == 0.0:
+            self.latency_short = self.latency_long = run_time
+        else:
+            self.latency_short += 0.3 * (run_time - self.latency_short)
+            self.latency_long += 0.05 * (run_time - self.latency_long)
+        # }
+        if self.latency_short <= self.latency_long * self.latency_tolerance:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        # }
+    # }
+
+# } ConcurrencyLimiter
+
+
+class TasksPoolStopped(Exception):
+    """
+    Raised by the pool after stop was requested by requestStop(): the results finished before the drain deadline
+    are saved, the other tasks are abandoned.
+
+    Args:
+        abandoned: int - the count of the abandoned tasks.
+    """
+    def __init__(self, abandoned: int):
+        super().__init__(f"The pool is stopped, {abandoned} tasks were abandoned.")
+        self.abandoned: int = abandoned
+    # }
+
+# } TasksPoolStopped
+
+
+class TasksPoolObserver:
+    """
+    The base class of the observers of the tasks of TasksPool and AsyncTasksPool, see TasksPool.addObserver().
+    The methods are called from the main thread except onTaskStarted(), which TasksPool calls from the working
+    thread (it is not called when the tasks run in processes). TaskPoolCoroutine keeps the times of the task:
+    wait_time in the queue of the pool, run_time of doTask() and metrics set by the task itself.
+    """
+    def onTaskSubmitted(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        ...
+
+    def onTaskStarted(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        ...
+
+    def onTaskFinished(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        """
+        The task is done and its result is saved by doSaveResult().
+        """
+        ...
+
+    def onTaskFailed(self, pool: tp.Any, tasks_obj: TaskPoolCoroutine) -> None:
+        """
+        The task has set TaskPoolCoroutine.error or raised it.
+        """
+        ...
+
+# } TasksPoolObserver
+
+
+def runProcessTask(process_task: tp.Callable, payload: tp.Any) -> tuple[tp.Any, float, float]:
+    """
+    Call TaskPoolCoroutine.processTask() in the context of a worker process and measure its time. Returns the result,
+    the start time and the run time; time.perf_counter() is monotonic system-wide on the platforms of ProcessPoolExecutor.
+    """
+    start_time = time.perf_counter()
+    result = process_task(payload)
+    return result, start_time, time.perf_counter() - start_time
+# }
+
+
+def runChunk(fn: tp.Callable, chunk: list) -> list:
+    """
+    Call fn for every item of the chunk of TasksPool.map() in the context of the thread or the worker process.
+    """
+    return [fn(item) for item in chunk]
+# }
+
+
+def initProcessWorker(initializer: tp.Callable | None, initargs: tuple) -> None:
+    """
+    Initializer of a worker process: Ctrl+C is ignored by the workers, the main process stops the pool.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer(*initargs)
+    # }
+# }
+
+
 class TasksPool:
     """
     An easy wrap of concurrent.futures.ThreadPoolExecutor() to execute computations asynchronously (tasks) associated
     with the object of class TaskPoolCoroutine, which presents the coroutine and its data.
+
+    A finished task pushes its object to the ready queue by the done callback of its future, so the main thread
+    gets a free object and the results to save without scanning the pool. The results are saved by
+    TaskPoolCoroutine.doSaveResult() in the order of completion or, if ordered is true, in the order of submission.
+
+    If processes is true, the tasks run in a process pool of up to poll_size processes instead of threads: the
+    object makes picklable payload by TaskPoolCoroutine.getPayload(), TaskPoolCoroutine.processTask() does the job
+    in a worker process and the result is set back by TaskPoolCoroutine.setResult() in the main thread.
+
+    If task_timeout is set, a task which is not finished in time is abandoned: a copy of its object gets
+    TimeoutError and its result is saved as failed, and a new object takes its slot; a thread can not be killed,
+    so the abandoned task runs until it returns and its result is ignored. requestStop() can be called from a
+    signal handler to stop the pool gracefully. The pool is a context manager which shuts the executor down.
+
+    The tasks can be queued by queueTask() with a priority instead of being submitted at once: submitQueued()
+    submits them in the order of the priority, the higher first, so the most valuable tasks are done first when
+    the work is limited in time or quantity.
+
+    map() and pipeline() run a plain function over the items of an iterable on the same executor without
+    subclassing TaskPoolCoroutine: the results are yielded lazily while up to getLimit() chunks are in flight, and
+    the results of the submitted TaskPoolCoroutine tasks are saved while map() waits, not only on the next submit.
+
+    Args:
+        poll_size: int - maximum number of the tasks in flight.
+        coroutine_list: TaskPoolCoroutineList - the list to create TaskPoolCoroutine objects.
+        rate: float - maximum number of the tasks per second or 0 (default) for no limit.
+        adaptive: bool - true to control the number of the tasks in flight by ConcurrencyLimiter (default false).
+        ordered: bool - true to save the results in the order of submission (default false).
+        processes: bool - true to run the tasks in processes instead of threads (default false).
+        task_timeout: float - maximum time of a task since its submission in seconds or 0 (default) for no limit.
     """
-    def __init__(self, poll_size: int, coroutine_list: TaskPoolCoroutineList) -> None:
+    def __init__(self, poll_size: int, coroutine_list: TaskPoolCoroutineList, rate: float = 0.0,
+                 adaptive: bool = False, ordered: bool = False, processes: bool = False,
+                 task_timeout: float = 0.0) -> None:
         self.coroutine_list: TaskPoolCoroutineList = coroutine_list
-        self.poll_size: int = poll_size
-        self.tasks_list: list = []
+        self.poll_size: int = max(1, poll_size)
+        self.ordered: bool = ordered
+        self.processes: bool = processes
         self.next_index: int = 0
         self.totalDone: int = 0
         self.totalFault: int = 0
-        self.currentIndex: int = 0
+        self.in_flight: int = 0
+        self.completed: int = 0
+        self.busy_time: float = 0.0     # total run time of the finished tasks
+        self.observers: list[TasksPoolObserver] = []
+        self.submitted: int = 0
+        self.next_sequence: int = 0     # the sequence of the next result to save in the ordered mode
+        self.start_time: float = 0.0
+        self.ready: queue.SimpleQueue = queue.SimpleQueue()     # (object, future) of the finished tasks
+        self.finished: dict[int, tuple[TaskPoolCoroutine, cf.Future]] = {}     # waiting for its turn to save
+        self.free_list: list[TaskPoolCoroutine] = []
+        self.running: dict[int, tuple[TaskPoolCoroutine, cf.Future]] = {}     # sequence -> task in flight
+        self.task_timeout: float = task_timeout
+        self.deadlines: list[tuple[float, int]] = []    # heap of deadlines and sequences of the tasks in flight
+        self.timed_out: int = 0
+        self.abandoned_threads: bool = False    # a timed out task may still run in its thread
+        self.stop_requested: bool = False
+        self.stop_deadline: float = 0.0
+        self.queued: list[tuple[float, int, tuple, dict]] = []     # heap of the tasks waiting to be submitted
+        self.queued_count: int = 0
+        self.rate_limiter: RateLimiter | None = RateLimiter(rate) if rate > 0 else None
+        self.concurrency: ConcurrencyLimiter | None = None
+        if adaptive:
+            self.concurrency = ConcurrencyLimiter(self.poll_size, max(1, self.poll_size // 2))
+        # }
 
         # create pool
-        if poll_size <= 0:
-            max_workers = (cpu_count() or 2)
+        self.poolExecutor: tp.Any = None
+        if processes:
+            initializer, initargs = coroutine_list.getProcessInitializer()
+            self.poolExecutor = cf.ProcessPoolExecutor(max_workers=self.poll_size, initializer=initProcessWorker,
+                                                       initargs=(initializer, initargs))
         else:
-            max_workers = max(poll_size, (cpu_count() or 2))
+            if poll_size <= 0:
+                max_workers = (cpu_count() or 2)
+            else:
+                max_workers = max(poll_size, (cpu_count() or 2))
+            # }
+            if task_timeout > 0:
+                max_workers += self.poll_size   # abandoned tasks keep their threads until they return
+            # }
+            self.poolExecutor = cf.ThreadPoolExecutor(max_workers=max_workers)  # os.cpu_count()
         # }
-        self.poolExecutor = cf.ThreadPoolExecutor(max_workers=max_workers)  # os.cpu_count()
     # }
 
     def __del__(self) -> None:
+        self.close(cancel=True)
+    # }
+
+    def __enter__(self) -> Self:
+        return self
+    # }
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(cancel=exc_type is not None)
+    # }
+
+    def close(self, cancel: bool = False) -> None:
+        """
+        Shut the executor down. If cancel is true or there are abandoned tasks, it does not wait for running tasks and
+        cancels the tasks which are not started.
+        """
         if self.poolExecutor is not None:
-            self.poolExecutor.shutdown()
+            cancel = cancel or self.abandoned_threads
+            self.poolExecutor.shutdown(wait=not cancel, cancel_futures=cancel)
+            self.poolExecutor = None
+        # }
+    # }
+
+    def requestStop(self, drain_timeout: float) -> None:
+        """
+        Stop the pool: the next call of the pool saves the results of the tasks finished within drain_timeout seconds,
+        abandons the other tasks and raises TasksPoolStopped. It is safe to call from a signal handler.
+        """
+        self.stop_requested = True
+        self.stop_deadline = time.perf_counter() + drain_timeout
+        self.ready.put((None, None))    # wake up the main thread waiting for the ready queue
+    # }
+
+    def checkStop(self) -> None:
+        """
+        Raise TasksPoolStopped if stop was requested, after the tasks in flight were drained or abandoned.
+        """
+        if not self.stop_requested:
+            return
+        # }
+        while self.in_flight > 0 and time.perf_counter() < self.stop_deadline:
+            self.save_progress(self.saveReadyTasks(block=True))
+        # }
+        abandoned = self.in_flight
+        for _, future in self.running.values():
+            future.cancel()
+        # }
+        self.running.clear()
+        self.in_flight = 0
+        self.close(cancel=True)
+        raise TasksPoolStopped(abandoned)
+    # }
+
+    def runTask(self, tasks_obj: TaskPoolCoroutine, *argv, **kwargs) -> TaskPoolCoroutine:
+        """
+        Call TaskPoolCoroutine.doTask() in the context of the thread pool and measure its time.
+        """
+        start_time = time.perf_counter()
+        tasks_obj.wait_time = start_time - tasks_obj.submit_time
+        tasks_obj.error = None
+        for observer in self.observers:
+            observer.onTaskStarted(self, tasks_obj)
         # }
+        result = tasks_obj.doTask(*argv, **kwargs)
+        tasks_obj.run_time = time.perf_counter() - start_time
+        return result
+    # }
+
+    def addObserver(self, observer: TasksPoolObserver) -> None:
+        self.observers.append(observer)
+    # }
+
+    def getUtilization(self) -> float:
+        """
+        Returns the share of the time the slots of the pool were busy with finished tasks since the first submission.
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time > 0 else 0.0
+        return self.busy_time / (self.poll_size * elapsed) if elapsed > 0 else 0.0
+    # }
+
+    def getLimit(self) -> int:
+        """
+        Returns the current limit of the tasks in flight.
+        """
+        return self.poll_size if self.concurrency is None else min(self.poll_size, self.concurrency.getLimit())
+    # }
+
+    def requestsPerSecond(self) -> float:
+        """
+        Returns the observed rate of the finished tasks per second.
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time > 0 else 0.0
+        return self.completed / elapsed if elapsed > 0 else 0.0
     # }
 
     def submitTaskInPool(self, *argv, **kwargs) -> None:
         """
         Submit TaskPoolCoroutine.doTask(*argv, **kwargs) to execute on the thread pool.
         """
+        self.checkStop()
+        if self.start_time == 0.0:
+            self.start_time = time.perf_counter()
+        # }
+        while self.concurrency is not None and self.in_flight >= self.getLimit():
+            _, total_done = self.waitForTasks(cf.FIRST_COMPLETED)
+            self.save_progress(total_done)
+        # }
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        # }
         if self.next_index < self.poll_size:
             tasks_obj = self.coroutine_list.append()
-            tasks_obj.set_on_run()
-            self.tasks_list.append(self.poolExecutor.submit(tasks_obj.doTask, *argv, **kwargs))
             self.next_index += 1
         else:
-            total_done: int = 0
-            task_index: int
-            tasks_obj = self.coroutine_list.getFreeSetRun()
+            # save the results which are ready and wait for a free object only if there is no one
+            self.save_progress(self.saveReadyTasks(block=not self.free_list))
+            self.checkStop()
+            tasks_obj = self.free_list.pop()
+        # }
+        tasks_obj.set_on_run()
+        tasks_obj.sequence = self.submitted
+        tasks_obj.submit_time = time.perf_counter()
+        self.submitted += 1
+        self.in_flight += 1
+        for observer in self.observers:
+            observer.onTaskSubmitted(self, tasks_obj)
+        # }
+        if self.processes:
+            future = self.poolExecutor.submit(runProcessTask, type(tasks_obj).processTask,
+                                              tasks_obj.getPayload(*argv, **kwargs))
+        else:
+            future = self.poolExecutor.submit(self.runTask, tasks_obj, *argv, **kwargs)
+        # }
+        self.running[tasks_obj.sequence] = (tasks_obj, future)
+        if self.task_timeout > 0:
+            heapq.heappush(self.deadlines, (tasks_obj.submit_time + self.task_timeout, tasks_obj.sequence))
+        # }
+        future.add_done_callback(lambda f: self.ready.put((tasks_obj, f)))   # called from working thread
+    # }
+
+    def queueTask(self, priority: float, *argv, **kwargs) -> None:
+        """
+        Queue the task to be submitted by submitQueued() in the order of the priority, the tasks of the same
+        priority in the order of queueing.
+        """
+        self.queued_count += 1
+        heapq.heappush(self.queued, (-priority, self.queued_count, argv, kwargs))
+    # }
+
+    def submitQueued(self, limit: int = 0) -> int:
+        """
+        Submit up to limit (0 - all) queued tasks with the highest priority. Returns the count of the submitted tasks.
+        """
+        submitted: int = 0
+        while self.queued and (limit <= 0 or submitted < limit):
+            _, _, argv, kwargs = heapq.heappop(self.queued)
+            self.submitTaskInPool(*argv, **kwargs)
+            submitted += 1
+        # }
+        return submitted
+    # }
+
+    def clearQueued(self) -> list[tuple]:
+        """
+        Drop the queued tasks which were not submitted. Returns their arguments.
+        """
+        dropped = [argv for _, _, argv, _ in self.queued]
+        self.queued = []
+        return dropped
+    # }
+
+    def waitForAllTasks(self) -> int:
+        _, total_done = self.waitForTasks(cf.ALL_COMPLETED)
+        self.save_progress(total_done)
+        return self.totalDone
+    # }
+
+    def waitForTasks(self, return_when: str) -> tuple[int, int]:
+        """
+        Wait for any (cf.FIRST_COMPLETED) or all (cf.ALL_COMPLETED) tasks in flight and save their results.
+
+        Returns:
+            The index of a free TaskPoolCoroutine object or -1 and the count of done returned by doSaveResult().
+        """
+        total_done: int = self.saveReadyTasks(block=True)
+        while return_when == cf.ALL_COMPLETED and self.in_flight > 0 and not self.stop_requested:
+            total_done += self.saveReadyTasks(block=True)
+        # }
+        if self.stop_requested:
+            self.save_progress(total_done)
+            self.checkStop()
+        # }
+        return (self.free_list[-1].index if self.free_list else -1), total_done
+    # }
+
+    def saveReadyTasks(self, block: bool) -> int:
+        """
+        Save the results of the finished tasks from the ready queue. If block is true, it waits until at least one
+        result is saved. Returns the count of done returned by doSaveResult().
+        """
+        total_done: int = 0
+        saved: int = 0
+        while self.in_flight > 0:
+            self.expireTasks()
+            wait = block and saved == 0
+            timeout = self.getWaitTimeout() if wait else None
+            if timeout is not None:
+                if timeout <= 0 and self.stop_requested:
+                    break
+                # }
+                timeout = max(0.0, timeout)
+            # }
+            try:
+                tasks_obj, future = self.ready.get(block=wait, timeout=timeout)
+            except queue.Empty:
+                if wait:
+                    continue    # a deadline is expired
+                # }
+                break
+            # }
             if tasks_obj is None:
-                task_index, total_done = self.waitForTasks(cf.FIRST_COMPLETED)
-                tasks_obj = self.coroutine_list[task_index]
-                tasks_obj.set_on_run()
+                continue        # woken up by requestStop() or by a chunk of map()
+            # }
+            done, count = self.saveReady(tasks_obj, future)
+            total_done += done
+            saved += count
+        # }
+        return total_done
+    # }
+
+    def saveReady(self, tasks_obj: TaskPoolCoroutine, future: cf.Future | None) -> tuple[int, int]:
+        """
+        Save the result of the finished task taken from the ready queue or keep it until its turn in the ordered
+        mode. Returns the count of done returned by doSaveResult() and the count of the saved results.
+        """
+        total_done: int = 0
+        saved: int = 0
+        if future is not None and self.running.pop(tasks_obj.sequence, None) is None:
+            return 0, 0     # the late result of the abandoned task
+        # }
+        if not self.ordered:
+            return self.saveResult(tasks_obj, future), 1
+        # }
+        self.finished[tasks_obj.sequence] = (tasks_obj, future)
+        while self.next_sequence in self.finished:
+            total_done += self.saveResult(*self.finished.pop(self.next_sequence))
+            self.next_sequence += 1
+            saved += 1
+        # }
+        return total_done, saved
+    # }
+
+    def map(self, fn: tp.Callable, iterable: tp.Iterable, chunksize: int = 1, ordered: bool = True) -> tp.Iterator:
+        """
+        Call fn for every item of the iterable on the executor of the pool and yield the results lazily. The items
+        are taken by chunks of chunksize items when a slot is free, so at most getLimit() chunks are in flight and
+        a slow consumer holds the producer back. The results are yielded in the order of the items or, if ordered
+        is false, by the chunks in the order of completion. While map() waits for a chunk it saves the results of
+        the tasks submitted by submitTaskInPool(). In the processes mode fn and the items should be picklable. An
+        exception of fn is raised by the generator, the chunks in flight are cancelled when it is closed.
+
+        Args:
+            fn: tp.Callable - the function of one item.
+            iterable: tp.Iterable - the items, e.g. a generator of the previous stage.
+            chunksize: int - the count of the items sent to the executor at once (default 1).
+            ordered: bool - true (default) to yield the results in the order of the items.
+        """
+        items = iter(iterable)
+        chunksize = max(1, chunksize)
+        pending: deque[cf.Future] = deque()
+        exhausted: bool = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.getLimit():
+                    chunk = list(islice(items, chunksize))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    # }
+                    self.checkStop()
+                    if self.start_time == 0.0:
+                        self.start_time = time.perf_counter()
+                    # }
+                    future = self.poolExecutor.submit(runChunk, fn, chunk)
+                    future.add_done_callback(lambda f: self.ready.put((None, None)))   # wake up waitForMapped()
+                    pending.append(future)
+                # }
+                if not pending:
+                    return
+                # }
+                if ordered:
+                    self.waitForMapped([pending[0]])
+                    yield from pending.popleft().result()
+                    continue
+                # }
+                self.waitForMapped(pending)
+                for future in [future for future in pending if future.done()]:
+                    pending.remove(future)
+                    yield from future.result()
+                # }
+            # }
+        finally:
+            for future in pending:
+                future.cancel()
+            # }
+        # }
+    # }
+
+    def pipeline(self, iterable: tp.Iterable, *stages: tp.Callable, chunksize: int = 1,
+                 ordered: bool = True) -> tp.Iterator:
+        """
+        Chain map() of the stages: the results of a stage are the items of the next one, so all the stages run
+        at once and every stage has up to getLimit() chunks in flight. Returns the generator of the last stage.
+        """
+        for fn in stages:
+            iterable = self.map(fn, iterable, chunksize, ordered)
+        # }
+        return iter(iterable)
+    # }
+
+    def waitForMapped(self, futures: tp.Iterable[cf.Future]) -> None:
+        """
+        Wait until one of the futures of map() is done, saving the results of the tasks in flight meanwhile.
+        """
+        while not any(future.done() for future in futures):
+            if self.stop_requested:
+                self.checkStop()
+            # }
+            self.expireTasks()
+            timeout = self.getWaitTimeout()
+            try:
+                tasks_obj, future = self.ready.get(timeout=None if timeout is None else max(0.0, timeout))
+            except queue.Empty:
+                continue    # a deadline is expired
+            # }
+            if tasks_obj is not None:
+                done, _ = self.saveReady(tasks_obj, future)
+                self.save_progress(done)
+            # }
+        # }
+    # }
+
+    def getWaitTimeout(self) -> float | None:
+        """
+        Returns the time to wait for the ready queue until the nearest deadline of a task or of the stop.
+        """
+        deadlines: list[float] = []
+        if self.deadlines:
+            deadlines.append(self.deadlines[0][0])
+        # }
+        if self.stop_requested:
+            deadlines.append(self.stop_deadline)
+        # }
+        return min(deadlines) - time.perf_counter() if deadlines else None
+    # }
+
+    def expireTasks(self) -> None:
+        """
+        Abandon the tasks which deadline is expired: a copy of the object with TimeoutError is put to the ready
+        queue to be saved as failed, the late result of the task will be ignored.
+        """
+        now = time.perf_counter()
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, sequence = heapq.heappop(self.deadlines)
+            running = self.running.pop(sequence, None)
+            if running is None:
+                continue    # the task is already finished
+            # }
+            tasks_obj, future = running
+            future.cancel()
+            timed_out_obj = copy.copy(tasks_obj)
+            timed_out_obj.error = TimeoutError(f"The task was not finished in {self.task_timeout} seconds!")
+            timed_out_obj.result = None
+            timed_out_obj.run_time = self.task_timeout
+            self.timed_out += 1
+            self.abandoned_threads = True
+            self.ready.put((timed_out_obj, None))
+        # }
+    # }
+
+    def saveResult(self, tasks_obj: TaskPoolCoroutine, future: cf.Future | None) -> int:
+        """
+        Call TaskPoolCoroutine.doSaveResult() of the finished task in the main thread and free its object.
+        The future is None for the copy of the object of the abandoned task.
+        """
+        task_result_obj: TaskPoolCoroutine
+        try:
+            if future is None:
+                task_result_obj = tasks_obj
+            elif self.processes:
+                tasks_obj.error = None
+                result, start_time, tasks_obj.run_time = future.result()
+                tasks_obj.wait_time = start_time - tasks_obj.submit_time
+                tasks_obj.setResult(result)
+                task_result_obj = tasks_obj
             else:
-                task_index = tasks_obj.index
+                task_result_obj = future.result()
             # }
-            
-            # tasks_obj.lock is already blocked here do not need to call tasks_obj.set_on_run()
-            self.save_progress(total_done)
-            self.tasks_list[task_index] = self.poolExecutor.submit(tasks_obj.doTask, *argv, **kwargs)
+        except Exception as exc:
+            tasks_obj.error = exc
+            for observer in self.observers:
+                observer.onTaskFailed(self, tasks_obj)
+            # }
+            raise
+        # }
+        if task_result_obj is None:
+            raise Exception(f"A coroutine in the thread pool returns None object!")
         # }
+        if self.concurrency is not None:
+            self.concurrency.onTaskDone(task_result_obj.run_time, task_result_obj.error is not None)
+        # }
+        done, _ = task_result_obj.doSaveResult()
+        if future is None:  # the abandoned object is still in use by its task
+            self.free_list.append(self.coroutine_list.replace(tasks_obj.index))
+        else:
+            tasks_obj.set_off_run()
+            self.free_list.append(tasks_obj)
+        # }
+        self.in_flight -= 1
+        self.completed += 1
+        self.busy_time += tasks_obj.run_time
+        for observer in self.observers:
+            if tasks_obj.error is None:
+                observer.onTaskFinished(self, tasks_obj)
+            else:
+                observer.onTaskFailed(self, tasks_obj)
+            # }
+        # }
+        return done
+    # }
 
+    def resetStats(self) -> None:
+        """
+        Reset the statistics of the finished tasks, e.g. before the next run of a long-lived pool, so the rate and
+        the utilization are computed since the next submission.
+        """
+        self.start_time = 0.0
+        self.completed = 0
+        self.busy_time = 0.0
+        self.timed_out = 0
+    # }
+
+    def save_progress(self, done: int, fault: int = 0) -> None:
+        self.totalDone += done
+        self.totalFault += fault
+    # }
+
+    def reset_progress(self, done: int = 0, fault: int = 0) -> None:
+        self.totalDone = done
+        self.totalFault = fault
+    # }
+
+# } TasksPool
+
+
+class AsyncTasksPool:
+    """
+    The alternative to TasksPool driven by an asyncio event loop in the main thread. It executes
+    TaskPoolCoroutine.doTaskAsync() of up to poll_size objects concurrently, bounded by a semaphore, and calls
+    TaskPoolCoroutine.doSaveResult() in the main thread like TasksPool does. The loop runs when a new task is
+    submitted and while waiting for free objects or for all tasks, so many I/O bound tasks are handled by
+    one thread.
+
+    If task_timeout is set, doTaskAsync() which is not finished in time is cancelled and a copy of the object gets
+    TimeoutError to be saved as failed, the object is replaced like TasksPool does, because the thread of the
+    executor started by the cancelled coroutine may still use it. requestStop(), the context manager, the priority queue of the tasks
+    (queueTask() and submitQueued()), map() and pipeline() work like the ones of TasksPool; map() awaits fn if it
+    is a coroutine function or runs it in the executor of the loop otherwise.
+
+    Args:
+        poll_size: int - maximum number of the tasks in flight.
+        coroutine_list: TaskPoolCoroutineList - the list to create TaskPoolCoroutine objects.
+        task_timeout: float - maximum time of doTaskAsync() in seconds or 0 (default) for no limit.
+    """
+    def __init__(self, poll_size: int, coroutine_list: TaskPoolCoroutineList, task_timeout: float = 0.0) -> None:
+        self.coroutine_list: TaskPoolCoroutineList = coroutine_list
+        self.poll_size: int = max(1, poll_size)
+        self.next_index: int = 0
+        self.totalDone: int = 0
+        self.totalFault: int = 0
+        self.free_list: list[TaskPoolCoroutine] = []
+        self.running: set[asyncio.Task] = set()
+        self.task_objects: dict[asyncio.Task, TaskPoolCoroutine] = {}
+        self.in_flight: int = 0
+        self.completed: int = 0
+        self.submitted: int = 0
+        self.start_time: float = 0.0
+        self.busy_time: float = 0.0
+        self.observers: list[TasksPoolObserver] = []
+        self.task_timeout: float = task_timeout
+        self.timed_out: int = 0
+        self.abandoned: int = 0
+        self.abandoned_threads: bool = False    # a timed out task may still run in a thread of the executor
+        self.stop_requested: bool = False
+        self.stop_deadline: float = 0.0
+        self.queued: list[tuple[float, int, tuple, dict]] = []     # heap of the tasks waiting to be submitted
+        self.queued_count: int = 0
+        self.loop: tp.Any = asyncio.new_event_loop()
+        self.semaphore: asyncio.BoundedSemaphore = asyncio.BoundedSemaphore(self.poll_size)
+        # executor of TaskPoolCoroutine.doTaskAsync() implementations based on threads
+        max_workers = self.poll_size
+        if task_timeout > 0:
+            max_workers += self.poll_size   # abandoned tasks keep their threads until they return
+        # }
+        self.poolExecutor = cf.ThreadPoolExecutor(max_workers=max_workers)
+        self.loop.set_default_executor(self.poolExecutor)
+    # }
+
+    def __del__(self) -> None:
+        self.close(cancel=True)
+    # }
+
+    def __enter__(self) -> Self:
+        return self
+    # }
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(cancel=exc_type is not None)
+    # }
+
+    def close(self, cancel: bool = False) -> None:
+        """
+        Close the event loop and shut the executor down. The running tasks are cancelled if cancel is true or
+        awaited otherwise.
+        """
+        if self.loop is not None and not self.loop.is_closed():
+            if self.running:
+                if cancel:
+                    self.cancelTasks()
+                # }
+                self.loop.run_until_complete(asyncio.wait(self.running))
+            # }
+            self.loop.run_until_complete(asyncio.sleep(0))  # run the callbacks of the closed connections
+            self.loop.close()
+        # }
+        if self.poolExecutor is not None:
+            cancel = cancel or self.abandoned_threads
+            self.poolExecutor.shutdown(wait=not cancel, cancel_futures=cancel)
+            self.poolExecutor = None
+        # }
+    # }
+
+    def requestStop(self, drain_timeout: float) -> None:
+        """
+        Stop the pool: the tasks which are not finished within drain_timeout seconds are cancelled, the next call of
+        the pool saves the finished results and raises TasksPoolStopped. It is safe to call from a signal handler.
+        """
+        self.stop_requested = True
+        self.stop_deadline = time.perf_counter() + drain_timeout
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.scheduleCancel)
+        # }
+    # }
+
+    def scheduleCancel(self) -> None:
+        self.loop.call_later(max(0.0, self.stop_deadline - time.perf_counter()), self.cancelTasks)
+    # }
+
+    def cancelTasks(self) -> None:
+        for task in self.running:
+            task.cancel()
+        # }
+    # }
+
+    def checkStop(self) -> None:
+        """
+        Raise TasksPoolStopped if stop was requested, after the tasks in flight were drained or cancelled.
+        """
+        if not self.stop_requested:
+            return
+        # }
+        if time.perf_counter() >= self.stop_deadline:
+            self.cancelTasks()
+        # }
+        self.save_progress(self.waitForTasks(asyncio.ALL_COMPLETED))
+        raise TasksPoolStopped(self.abandoned)
+    # }
+
+    async def runTask(self, tasks_obj: TaskPoolCoroutine, argv: tuple, kwargs: dict) -> TaskPoolCoroutine:
+        async with self.semaphore:
+            start_time = time.perf_counter()
+            tasks_obj.wait_time = start_time - tasks_obj.submit_time
+            tasks_obj.error = None
+            for observer in self.observers:
+                observer.onTaskStarted(self, tasks_obj)
+            # }
+            try:
+                result = await asyncio.wait_for(tasks_obj.doTaskAsync(*argv, **kwargs), self.task_timeout or None)
+            except asyncio.TimeoutError:
+                result = copy.copy(tasks_obj)   # the object is replaced by saveFinished()
+                result.error = TimeoutError(f"The task was not finished in {self.task_timeout} seconds!")
+                result.result = None
+                self.timed_out += 1
+                self.abandoned_threads = True
+            # }
+            result.run_time = time.perf_counter() - start_time
+            return result
+        # }
+    # }
+
+    def addObserver(self, observer: TasksPoolObserver) -> None:
+        self.observers.append(observer)
+    # }
+
+    def getUtilization(self) -> float:
+        """
+        Returns the share of the time the slots of the pool were busy with finished tasks since the first submission.
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time > 0 else 0.0
+        return self.busy_time / (self.poll_size * elapsed) if elapsed > 0 else 0.0
+    # }
+
+    def requestsPerSecond(self) -> float:
+        """
+        Returns the observed rate of the finished tasks per second.
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time > 0 else 0.0
+        return self.completed / elapsed if elapsed > 0 else 0.0
+    # }
+
+    def submitTaskInPool(self, *argv, **kwargs) -> None:
+        """
+        Submit TaskPoolCoroutine.doTaskAsync(*argv, **kwargs) to execute on the event loop.
+        """
+        total_done: int = 0
+        self.checkStop()
+        if self.next_index < self.poll_size:
+            tasks_obj = self.coroutine_list.append()
+            self.next_index += 1
+        else:
+            if not self.free_list:
+                total_done = self.waitForTasks(asyncio.FIRST_COMPLETED)
+                self.save_progress(total_done)
+                total_done = 0
+                self.checkStop()
+            # }
+            tasks_obj = self.free_list.pop()
+        # }
+        tasks_obj.set_on_run()
+        self.save_progress(total_done)
+        if self.start_time == 0.0:
+            self.start_time = time.perf_counter()
+        # }
+        tasks_obj.sequence = self.submitted
+        tasks_obj.submit_time = time.perf_counter()
+        self.submitted += 1
+        self.in_flight += 1
+        for observer in self.observers:
+            observer.onTaskSubmitted(self, tasks_obj)
+        # }
+        task = self.loop.create_task(self.runTask(tasks_obj, argv, kwargs))
+        self.running.add(task)
+        self.task_objects[task] = tasks_obj
+        self.loop.run_until_complete(asyncio.sleep(0))     # start the task
+    # }
+
+    def queueTask(self, priority: float, *argv, **kwargs) -> None:
+        """
+        Queue the task to be submitted by submitQueued() in the order of the priority, the tasks of the same
+        priority in the order of queueing.
+        """
+        self.queued_count += 1
+        heapq.heappush(self.queued, (-priority, self.queued_count, argv, kwargs))
+    # }
+
+    def submitQueued(self, limit: int = 0) -> int:
+        """
+        Submit up to limit (0 - all) queued tasks with the highest priority. Returns the count of the submitted tasks.
+        """
+        submitted: int = 0
+        while self.queued and (limit <= 0 or submitted < limit):
+            _, _, argv, kwargs = heapq.heappop(self.queued)
+            self.submitTaskInPool(*argv, **kwargs)
+            submitted += 1
+        # }
+        return submitted
+    # }
+
+    def clearQueued(self) -> list[tuple]:
+        """
+        Drop the queued tasks which were not submitted. Returns their arguments.
+        """
+        dropped = [argv for _, _, argv, _ in self.queued]
+        self.queued = []
+        return dropped
     # }
 
     def waitForAllTasks(self) -> int:
-        _, total_done = self.waitForTasks(cf.ALL_COMPLETED)
+        total_done = self.waitForTasks(asyncio.ALL_COMPLETED)
         self.save_progress(total_done)
+        self.checkStop()
         return self.totalDone
     # }
 
-    def waitForTasks(self, return_when: str) -> tuple[int, int]:
-        # wait for any finished task
-        free_task_index: int = -1
+    def waitForTasks(self, return_when: str) -> int:
+        if not self.running:
+            return 0
+        # }
+        finished, self.running = self.loop.run_until_complete(asyncio.wait(self.running, return_when=return_when))
+        return self.saveFinished(finished)
+    # }
+
+    def saveFinished(self, finished: tp.Iterable[asyncio.Task]) -> int:
+        """
+        Call TaskPoolCoroutine.doSaveResult() of the finished tasks and free their objects. Returns the count of
+        done returned by doSaveResult().
+        """
         total_done: int = 0
-        total_fault: int = 0
-        done: int
-        fault: int
-        tl = [self.tasks_list[i] for i in self.coroutine_list.getActiveCoroutineList()]
-        finished, unfinished = cf.wait(tl, timeout=20, return_when=return_when)
-        for t_obj in finished:
-            task_result_obj: TaskPoolCoroutine = t_obj.result()
+        for task in finished:
+            tasks_obj = self.task_objects.pop(task)
+            if task.cancelled():    # by the stop of the pool
+                tasks_obj.set_off_run()
+                self.free_list.append(tasks_obj)
+                self.in_flight -= 1
+                self.abandoned += 1
+                continue
+            # }
+            task_result_obj: TaskPoolCoroutine = task.result()
             if task_result_obj is None:
-                raise Exception(f"A coroutine in the thread pool returns None object!")
+                raise Exception(f"A coroutine in the event loop returns None object!")
             # }
-            done, fault = task_result_obj.doSaveResult()
+            done, _ = task_result_obj.doSaveResult()
             total_done += done
-            total_fault += fault
-            free_task_index = task_result_obj.index
             task_result_obj.set_off_run()
+            if task_result_obj is not tasks_obj:    # the copy of the timed out object
+                self.free_list.append(self.coroutine_list.replace(tasks_obj.index))
+            else:
+                self.free_list.append(task_result_obj)
+            # }
+            self.in_flight -= 1
+            self.completed += 1
+            self.busy_time += task_result_obj.run_time
+            for observer in self.observers:
+                if task_result_obj.error is None:
+                    observer.onTaskFinished(self, task_result_obj)
+                else:
+                    observer.onTaskFailed(self, task_result_obj)
+                # }
+            # }
         # }
-        return free_task_index, total_done
+        return total_done
     # }
-    
+
+    @staticmethod
+    async def runChunk(fn: tp.Callable, chunk: list) -> list:
+        if asyncio.iscoroutinefunction(fn):
+            return [await fn(item) for item in chunk]
+        # }
+        return await asyncio.to_thread(runChunk, fn, chunk)
+    # }
+
+    def map(self, fn: tp.Callable, iterable: tp.Iterable, chunksize: int = 1, ordered: bool = True) -> tp.Iterator:
+        """
+        Call fn for every item of the iterable on the event loop and yield the results lazily with up to poll_size
+        chunks in flight, see TasksPool.map(). While map() waits for a chunk, the loop runs the tasks submitted
+        by submitTaskInPool() and their results are saved.
+        """
+        items = iter(iterable)
+        chunksize = max(1, chunksize)
+        pending: deque[asyncio.Task] = deque()
+        exhausted: bool = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.poll_size:
+                    chunk = list(islice(items, chunksize))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    # }
+                    self.checkStop()
+                    if self.start_time == 0.0:
+                        self.start_time = time.perf_counter()
+                    # }
+                    pending.append(self.loop.create_task(self.runChunk(fn, chunk)))
+                # }
+                if not pending:
+                    return
+                # }
+                self.waitForMapped([pending[0]] if ordered else pending)
+                for task in [task for task in pending if task.done()]:
+                    if ordered and task is not pending[0]:
+                        break
+                    # }
+                    pending.remove(task)
+                    yield from task.result()
+                # }
+            # }
+        finally:
+            for task in pending:
+                task.cancel()
+            # }
+        # }
+    # }
+
+    def pipeline(self, iterable: tp.Iterable, *stages: tp.Callable, chunksize: int = 1,
+                 ordered: bool = True) -> tp.Iterator:
+        """
+        Chain map() of the stages, see TasksPool.pipeline().
+        """
+        for fn in stages:
+            iterable = self.map(fn, iterable, chunksize, ordered)
+        # }
+        return iter(iterable)
+    # }
+
+    def waitForMapped(self, tasks: tp.Iterable[asyncio.Task]) -> None:
+        """
+        Run the loop until one of the tasks of map() is done, saving the results of the tasks in flight meanwhile.
+        """
+        tasks = set(tasks)
+        while not any(task.done() for task in tasks):
+            self.checkStop()
+            self.loop.run_until_complete(asyncio.wait(tasks | self.running, return_when=asyncio.FIRST_COMPLETED))
+            finished = {task for task in self.running if task.done()}
+            if finished:
+                self.running -= finished
+                self.save_progress(self.saveFinished(finished))
+            # }
+        # }
+    # }
+
+    def resetStats(self) -> None:
+        """
+        Reset the statistics of the finished tasks, see TasksPool.resetStats(), and the count of the abandoned tasks.
+        """
+        self.start_time = 0.0
+        self.completed = 0
+        self.busy_time = 0.0
+        self.timed_out = 0
+        self.abandoned = 0
+    # }
+
     def save_progress(self, done: int, fault: int = 0) -> None:
         self.totalDone += done
         self.totalFault += fault
@@ -255,4 +1311,4 @@ class TasksPool:
         self.totalFault = fault
     # }
 
-# } TasksPool
+# } AsyncTasksPool
@@ -0,0 +1,124 @@
+import os
+import sys
+import threading
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_backends import BatchCodec, DeepTranslatorBackend, create_backend, parse_backend_args
+
+
+class TestBatchCodec(unittest.TestCase):
+
+    def test_placeholders_masked(self):
+        text, masks = BatchCodec.encode(["Hello {0}", "<b>Bold</b> &amp; more"])
+        self.assertEqual(text, "§0§ Hello ⟨0⟩\n§1§ ⟨0⟩Bold⟨1⟩ ⟨2⟩ more")
+        self.assertEqual(masks, [["{0}"], ["<b>", "</b>", "&amp;"]])
+    # }
+
+    def test_decoded_by_markers(self):
+        texts = ["Hello {0}", "<b>Bold</b> &amp; more", "Total"]
+        text, masks = BatchCodec.encode(texts)
+        self.assertEqual(BatchCodec.decode(text, masks), texts)
+        translated = "§0§ Hallo ⟨0⟩ § 1 § ⟨0⟩Fett⟨1⟩ ⟨2⟩ mehr\n§2§ Summe"
+        self.assertEqual(BatchCodec.decode(translated, masks), ["Hallo {0}", "<b>Fett</b> &amp; mehr", "Summe"])
+    # }
+
+    def test_lost_placeholder(self):
+        _, masks = BatchCodec.encode(["{0} of {1}", "Total"])
+        self.assertEqual(BatchCodec.decode("§0§ ⟨0⟩ von\n§1§ Summe", masks), [None, "Summe"])
+    # }
+
+    def test_lost_and_duplicated_markers(self):
+        _, masks = BatchCodec.encode(["One", "Two", "Three"])
+        # the string before the lost marker may contain the next one
+        self.assertEqual(BatchCodec.decode("§0§ Eins Zwei\n§2§ Drei", masks), [None, None, "Drei"])
+        self.assertEqual(BatchCodec.decode("§0§ Eins\n§0§ Zwei\n§2§ Drei", masks), [None, None, "Drei"])
+    # }
+
+    def test_single_string_without_marker(self):
+        _, masks = BatchCodec.encode(["Hello {0}"])
+        self.assertEqual(BatchCodec.decode("Hallo ⟨0⟩", masks), ["Hallo {0}"])
+    # }
+
+# } TestBatchCodec
+
+
+class TestBackendArgs(unittest.TestCase):
+
+    def test_name_only(self):
+        self.assertEqual(parse_backend_args("google"), ("google", {}))
+    # }
+
+    def test_arguments(self):
+        with mock.patch.dict(os.environ, {"TEST_DEEPL_KEY": "secret"}):
+            provider, kwargs = parse_backend_args("deepl:api_key=$TEST_DEEPL_KEY;use_free_api=false")
+        # }
+        self.assertEqual(provider, "deepl")
+        self.assertEqual(kwargs, {"api_key": "secret", "use_free_api": False})
+    # }
+
+    def test_credentials_passed_to_provider(self):
+        backend = create_backend("papago:client_id=id;secret_key=key", "en", "ko")
+        self.assertEqual(backend.getTranslator().client_id, "id")
+        self.assertEqual(backend.getTranslator().secret_key, "key")
+    # }
+
+# } TestBackendArgs
+
+
+class StubSession:
+    """
+    The session which returns the source text as the translation of the google provider.
+    """
+    def __init__(self):
+        self.calls: list[int] = []     # the threads of the requests
+    # }
+
+    def get(self, url, **kwargs):
+        self.calls.append(threading.get_ident())
+        text = f'<div class="result-container">{kwargs["params"]["q"]}</div>'
+        return types.SimpleNamespace(status_code=200, text=text, close=lambda: None)
+    # }
+
+# } StubSession
+
+
+class TestDeepTranslatorBackend(unittest.TestCase):
+
+    def test_requests_through_session(self):
+        session = StubSession()
+        backend = DeepTranslatorBackend("google", "en", "de", session=session)
+        backend.getTranslator()._url_params["hl"] = "de"     # the untranslated text is requested again without hl
+        self.assertEqual(backend.translate("Hello"), "Hello")
+        self.assertEqual(len(session.calls), 2)
+    # }
+
+    def test_provider_per_thread(self):
+        session = StubSession()
+        backend = DeepTranslatorBackend("google", "en", "de", session=session)
+        translators = []
+
+        def translate():
+            translators.append(backend.getTranslator())
+            backend.translate("Hello")
+        # }
+        threads = [threading.Thread(target=translate) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        # }
+        for thread in threads:
+            thread.join()
+        # }
+        self.assertEqual(len(set(map(id, translators))), 2)
+        self.assertNotIn(backend.getTranslator(), translators)
+        self.assertEqual(set(session.calls), {thread.ident for thread in threads})
+    # }
+
+# } TestDeepTranslatorBackend
+
+
+if __name__ == '__main__':
+    unittest.main()
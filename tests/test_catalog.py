@@ -0,0 +1,118 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_catalog import StringCatalog
+
+
+class TestStringCatalog(unittest.TestCase):
+
+    def test_keys_interned_once(self):
+        catalog = StringCatalog(["b", "a", "b"])
+        self.assertEqual(catalog.keys, ["b", "a"])
+        self.assertEqual(catalog.intern("a"), 1)
+        self.assertEqual(catalog.intern("c"), 2)
+        self.assertEqual(len(catalog), 3)
+    # }
+
+    def test_sorted_ids_merged(self):
+        catalog = StringCatalog(["d", "b"])
+        self.assertEqual(catalog.getSortedIds(), [1, 0])
+        catalog.intern("a")
+        catalog.intern("c")
+        self.assertEqual([catalog.keys[key_id] for key_id in catalog.getSortedIds()], ["a", "b", "c", "d"])
+    # }
+
+    def test_column_of_keys_absent_in_source(self):
+        catalog = StringCatalog(["a", "b"])
+        column = catalog.column({"b": "B", "x": "X", "a": None})
+        self.assertEqual(len(column), 2)
+        self.assertEqual(column.values, [None, "B", "X"])
+        self.assertEqual(catalog.keys, ["a", "b", "x"])
+        self.assertEqual(list(column.items()), [("b", "B"), ("x", "X")])
+    # }
+
+# } TestStringCatalog
+
+
+class TestCatalogColumn(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = StringCatalog(["c", "a", "b"])
+        self.source = self.catalog.column({"c": "C", "a": "A", "b": "B"})
+    # }
+
+    def test_dict_interface(self):
+        column = self.catalog.column({"a": "A de"})
+        column["c"] = "C de"
+        column["z"] = "Z de"    # a key added to the catalog after the column was created
+        self.assertEqual(len(column), 3)
+        self.assertIn("z", column)
+        self.assertNotIn("b", column)
+        self.assertEqual(column["a"], "A de")
+        self.assertIsNone(self.source.get("z"))
+        with self.assertRaises(KeyError):
+            column["b"]
+        # }
+        self.assertEqual(column.pop("a"), "A de")
+        self.assertIsNone(column.pop("a"))
+        self.assertEqual(column.toDict(), {"c": "C de", "z": "Z de"})
+    # }
+
+    def test_missing_and_same_ids(self):
+        column = self.catalog.column({"c": "C", "a": "", "b": "B de"})
+        self.assertEqual(column.missingIds(3), [1])
+        self.assertEqual(self.catalog.column().missingIds(3), [0, 1, 2])
+        self.assertEqual(column.sameIds(self.source), [0])
+    # }
+
+    def test_copy_from(self):
+        column = self.catalog.column({"c": "C de"})
+        base = self.catalog.column({"a": "A de", "b": ""})
+        self.assertEqual(column.copyFrom(base, [1, 2]), 1)
+        self.assertEqual(column.toDict(), {"a": "A de", "c": "C de"})
+        self.assertEqual(len(column), 2)
+    # }
+
+    def test_byte_sizes_cached_until_changed(self):
+        column = self.catalog.column({"c": "Ä", "a": "A"})
+        self.assertEqual(column.byteSizes([0, 1, 2]), [2, 1, 0])
+        column["b"] = "BBB"
+        self.assertIsNone(column.sizes)
+        self.assertEqual(column.byteSizes([2, 0]), [3, 2])
+    # }
+
+# } TestCatalogColumn
+
+
+class TestCatalogColumnUpdate(unittest.TestCase):
+
+    def test_only_new_keys_interned(self):
+        strings = {"b": "B", "a": "A", "c": "C"}
+        catalog = StringCatalog(strings)
+        source = catalog.column(strings)
+        keys = list(catalog.keys)
+        self.assertEqual(source.update({"a": "A", "c": "C changed", "d": "D"}), 2)
+        self.assertEqual(catalog.keys, keys + ["d"])
+        self.assertEqual(source.values, [None, "A", "C changed", "D"])
+        self.assertEqual(len(source), 3)
+        self.assertNotIn("b", source)
+        self.assertEqual(source.toDict(), {"a": "A", "c": "C changed", "d": "D"})
+    # }
+
+    def test_sizes_of_unchanged_values_kept(self):
+        strings = {"a": "A", "b": "B"}
+        source = StringCatalog(strings).column(strings)
+        self.assertEqual(source.byteSizes([0, 1]), [1, 1])
+        source.update({"a": "A", "b": "Bb", "c": "Ccc"})
+        self.assertEqual(source.sizes, [1, -1, -1])
+        self.assertEqual(source.byteSizes([0, 1, 2]), [1, 2, 3])
+    # }
+
+# } TestCatalogColumnUpdate
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import asyncio
+import os
+import sys
+import time
+import typing as tp
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks_pool import AsyncTasksPool, TaskPoolCoroutine, TaskPoolCoroutineList, TasksPool
+
+
+class SleepTask(TaskPoolCoroutine):
+    """
+    The task sleeps in the thread for the given time and returns the value, the saved results are collected in
+    the list of TaskPoolCoroutineList.
+    """
+    def __init__(self, index: int, saved: list):
+        super().__init__(index)
+        self.saved: list = saved
+        self.value: tp.Any = None
+    # }
+
+    def doTask(self, duration: float, value: int) -> "SleepTask":
+        time.sleep(duration)
+        self.value = value
+        self.result = value
+        return self
+    # }
+
+    def doSaveResult(self) -> tuple[int, int]:
+        self.saved.append((self.value, self.result, self.error))
+        return (1, 0) if self.error is None else (0, 1)
+    # }
+
+# } SleepTask
+
+
+class SleepTaskList(TaskPoolCoroutineList):
+    def __init__(self, max_size: int):
+        super().__init__(max_size)
+        self.saved: list = []
+    # }
+
+    def createNew(self, index: int) -> SleepTask:
+        return SleepTask(index, self.saved)
+    # }
+
+# } SleepTaskList
+
+
+def square(value: int) -> int:
+    return value * value
+# }
+
+
+def sleep_item(item: tuple[int, float]) -> int:
+    value, duration = item
+    time.sleep(duration)
+    return value
+# }
+
+
+async def sleep_item_async(item: tuple[int, float]) -> int:
+    value, duration = item
+    await asyncio.sleep(duration)
+    return value
+# }
+
+
+def fail_on_three(value: int) -> int:
+    if value == 3:
+        raise ValueError(value)
+    # }
+    return value
+# }
+
+
+class TestTasksPool(unittest.TestCase):
+
+    def test_queued_by_priority(self):
+        task_list = SleepTaskList(1)
+        with TasksPool(1, task_list) as pool:
+            for priority, value in [(1, 1), (3, 3), (2, 2), (3, 4)]:
+                pool.queueTask(priority, 0.0, value)
+            # }
+            self.assertEqual(pool.submitQueued(), 4)
+            pool.waitForAllTasks()
+        # }
+        self.assertEqual([value for value, _, _ in task_list.saved], [3, 4, 2, 1])
+    # }
+
+    def test_ordered_results(self):
+        task_list = SleepTaskList(2)
+        with TasksPool(2, task_list, ordered=True) as pool:
+            pool.submitTaskInPool(0.2, 1)
+            pool.submitTaskInPool(0.0, 2)
+            pool.waitForAllTasks()
+            self.assertEqual(pool.completed, 2)
+        # }
+        self.assertEqual([value for value, _, _ in task_list.saved], [1, 2])
+    # }
+
+# } TestTasksPool
+
+
+class TestTasksPoolMap(unittest.TestCase):
+
+    def test_ordered(self):
+        with TasksPool(4, SleepTaskList(4)) as pool:
+            self.assertEqual(list(pool.map(square, range(20), chunksize=3)), [n * n for n in range(20)])
+        # }
+    # }
+
+    def test_unordered_by_completion(self):
+        with TasksPool(2, SleepTaskList(2)) as pool:
+            self.assertEqual(list(pool.map(sleep_item, [(0, 0.3), (1, 0.0)], ordered=False)), [1, 0])
+        # }
+    # }
+
+    def test_in_flight_bounded(self):
+        produced: list[int] = []
+
+        def items():
+            for n in range(20):
+                produced.append(n)
+                yield n
+            # }
+        # }
+        with TasksPool(2, SleepTaskList(2)) as pool:
+            results = pool.map(square, items())
+            self.assertEqual(next(results), 0)
+            self.assertEqual(len(produced), pool.getLimit())    # the producer waits for the consumer
+            self.assertEqual(list(results), [n * n for n in range(1, 20)])
+        # }
+    # }
+
+    def test_exception_raised_by_generator(self):
+        with TasksPool(2, SleepTaskList(2)) as pool:
+            results = pool.map(fail_on_three, range(10))
+            self.assertEqual([next(results) for _ in range(3)], [0, 1, 2])
+            with self.assertRaises(ValueError):
+                next(results)
+            # }
+        # }
+    # }
+
+    def test_pipeline(self):
+        with TasksPool(3, SleepTaskList(3)) as pool:
+            self.assertEqual(list(pool.pipeline(range(10), square, str, chunksize=2)), [str(n * n) for n in range(10)])
+        # }
+    # }
+
+    def test_tasks_saved_while_mapping(self):
+        task_list = SleepTaskList(1)
+        with TasksPool(1, task_list) as pool:
+            pool.submitTaskInPool(0.05, 7)
+            self.assertEqual(list(pool.map(sleep_item, [(1, 0.3)])), [1])
+            self.assertEqual(task_list.saved, [(7, 7, None)])
+        # }
+    # }
+
+    def test_processes(self):
+        with TasksPool(2, SleepTaskList(2), processes=True) as pool:
+            self.assertEqual(list(pool.map(square, range(10), chunksize=4)), [n * n for n in range(10)])
+        # }
+    # }
+
+# } TestTasksPoolMap
+
+
+class TestAsyncTasksPool(unittest.TestCase):
+
+    def test_timed_out_task_frees_its_slot(self):
+        task_list = SleepTaskList(1)
+        with AsyncTasksPool(1, task_list, task_timeout=0.1) as pool:
+            pool.submitTaskInPool(0.3, 1)
+            first_obj = task_list.tasks_obj[0]
+            pool.submitTaskInPool(0.01, 2)
+            pool.waitForAllTasks()
+            self.assertEqual(pool.timed_out, 1)
+            self.assertIsNot(task_list.tasks_obj[0], first_obj)
+        # }
+        errors = [type(error) for _, _, error in task_list.saved]
+        self.assertEqual(errors, [TimeoutError, type(None)])
+        self.assertEqual(task_list.saved[1][1], 2)
+    # }
+
+    def test_reset_stats(self):
+        task_list = SleepTaskList(2)
+        with AsyncTasksPool(2, task_list) as pool:
+            pool.submitTaskInPool(0.0, 1)
+            pool.waitForAllTasks()
+            pool.abandoned = 1
+            pool.resetStats()
+            self.assertEqual((pool.completed, pool.abandoned, pool.timed_out), (0, 0, 0))
+        # }
+    # }
+
+# } TestAsyncTasksPool
+
+
+class TestAsyncTasksPoolMap(unittest.TestCase):
+
+    def test_ordered_coroutine_function(self):
+        items = [(n, 0.01 * (5 - n)) for n in range(5)]
+        with AsyncTasksPool(3, SleepTaskList(3)) as pool:
+            self.assertEqual(list(pool.map(sleep_item_async, items)), list(range(5)))
+        # }
+    # }
+
+    def test_unordered_by_completion(self):
+        with AsyncTasksPool(2, SleepTaskList(2)) as pool:
+            self.assertEqual(list(pool.map(sleep_item_async, [(0, 0.3), (1, 0.0)], ordered=False)), [1, 0])
+        # }
+    # }
+
+    def test_function_in_thread(self):
+        with AsyncTasksPool(2, SleepTaskList(2)) as pool:
+            self.assertEqual(list(pool.map(square, range(10), chunksize=4)), [n * n for n in range(10)])
+        # }
+    # }
+
+    def test_exception_raised_by_generator(self):
+        with AsyncTasksPool(2, SleepTaskList(2)) as pool:
+            with self.assertRaises(ValueError):
+                list(pool.map(fail_on_three, range(10)))
+            # }
+        # }
+    # }
+
+    def test_pipeline(self):
+        with AsyncTasksPool(2, SleepTaskList(2)) as pool:
+            results = pool.pipeline([(n, 0.0) for n in range(6)], sleep_item_async, square, chunksize=2)
+            self.assertEqual(list(results), [n * n for n in range(6)])
+        # }
+    # }
+
+    def test_tasks_saved_while_mapping(self):
+        task_list = SleepTaskList(1)
+        with AsyncTasksPool(1, task_list) as pool:
+            pool.submitTaskInPool(0.05, 7)
+            self.assertEqual(list(pool.map(sleep_item_async, [(1, 0.3)])), [1])
+            self.assertEqual(task_list.saved, [(7, 7, None)])
+        # }
+    # }
+
+# } TestAsyncTasksPoolMap
+
+
+if __name__ == '__main__':
+    unittest.main()
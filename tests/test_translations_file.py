@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translations_file import TranslationsFile, dump_json
+
+TRANSLATIONS = {
+    "en": {"Percentage": 100, "Strings": {"a": "A", "b": "B"}},
+    "de": {"Percentage": 50, "Strings": {"a": "A de"}, "Name": "Deutsch"},
+}
+
+
+class TestTakeStrings(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.folder.name, "Translations.json")
+        with open(file=self.file_name, mode="w", encoding="utf-8") as f:
+            f.write(dump_json(TRANSLATIONS))
+        # }
+    # }
+
+    def tearDown(self):
+        self.folder.cleanup()
+    # }
+
+    def test_taken_language_written_as_is(self):
+        translations = TranslationsFile(self.file_name)
+        self.assertEqual(translations.takeStrings("de"), {"a": "A de"})
+        translations.write(self.file_name)
+        with open(file=self.file_name, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), TRANSLATIONS)
+        # }
+    # }
+
+    def test_saved_from_strings_json(self):
+        translations = TranslationsFile(self.file_name)
+        translations.takeStrings("de")
+        translations["de"]["Percentage"] = 100
+        translations.setStringsJson("de", dump_json({"a": "A de", "b": "B de"}))
+        translations.write(self.file_name)
+        with open(file=self.file_name, encoding="utf-8") as f:
+            saved = json.load(f)
+        # }
+        self.assertEqual(saved["de"], {"Percentage": 100, "Strings": {"a": "A de", "b": "B de"}, "Name": "Deutsch"})
+        self.assertEqual(saved["en"], TRANSLATIONS["en"])
+    # }
+
+    def test_language_not_parsed_to_check(self):
+        translations = TranslationsFile(self.file_name)
+        self.assertTrue(translations.has("de"))
+        self.assertFalse(translations.has("fr"))
+        self.assertEqual(json.loads(translations.rawText("de")), TRANSLATIONS["de"])
+        translations.takeStrings("de")
+        self.assertIsNone(translations.rawText("de"))
+        self.assertTrue(translations.has("de"))
+    # }
+
+# } TestTakeStrings
+
+
+if __name__ == '__main__':
+    unittest.main()
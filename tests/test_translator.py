@@ -0,0 +1,305 @@
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_catalog import StringCatalog
+from translation_memory import TranslationMemory
+from translations_file import TranslationsFile
+
+
+def load_translator():
+    file_name = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "manager-io-translator.py")
+    spec = importlib.util.spec_from_file_location("manager_io_translator", file_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["manager_io_translator"] = module
+    spec.loader.exec_module(module)
+    return module
+# }
+
+
+translator = load_translator()
+
+
+def run_translator(argv):
+    sys_argv = sys.argv
+    sys.argv = ["manager-io-translator.py"] + argv
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            translator.main()
+        # }
+    finally:
+        sys.argv = sys_argv
+    # }
+    return out.getvalue()
+# }
+
+
+class TestPercentage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.source = os.path.join(self.folder, "Translations.json")
+        self.memory = os.path.join(self.folder, "Memory.db")
+    # }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+    # }
+
+    def write_source(self, en, de):
+        with open(self.source, mode="w", encoding="utf-8") as f:
+            json.dump({"en": {"Percentage": 100, "Strings": en}, "de": {"Percentage": 0, "Strings": de}}, f)
+        # }
+    # }
+
+    def fill_memory(self, pairs):
+        memory = TranslationMemory(self.memory)
+        for text, translation in pairs.items():
+            memory.put("en", "de", text, translation)
+        # }
+        memory.close()
+    # }
+
+    def translate(self, *argv):
+        run_translator(["-from", "en", "-to", "de", "-fromfile", self.source, "-memory", self.memory,
+                        "-backend", "mock", "-mock", "0,0", *argv])
+        with open(os.path.join(self.folder, "Translations_de.json"), encoding="utf-8") as f:
+            return json.load(f)["de"]
+        # }
+    # }
+
+    def test_copies_from_memory(self):
+        # the target is made of untranslated copies only, all of them are in the translation memory
+        en = {"Invoice": "Invoice", "Customer": "Customer", "Amount": "Amount", "Total": "Amount"}
+        self.write_source(en, dict(en))
+        self.fill_memory({"Invoice": "Rechnung", "Customer": "Kunde", "Amount": "Betrag"})
+        de = self.translate()
+        self.assertEqual(de["Strings"], {"Amount": "Betrag", "Customer": "Kunde", "Invoice": "Rechnung",
+                                         "Total": "Betrag"})
+        self.assertEqual(de["Percentage"], 100)
+    # }
+
+    def test_copies_and_missing_from_memory(self):
+        en = {"Invoice": "Invoice", "Customer": "Customer", "Amount": "Amount"}
+        self.write_source(en, {"Invoice": "Invoice", "Customer": "Kunde"})
+        self.fill_memory({"Invoice": "Rechnung", "Amount": "Betrag"})
+        de = self.translate()
+        self.assertEqual(de["Strings"], {"Amount": "Betrag", "Customer": "Kunde", "Invoice": "Rechnung"})
+        self.assertEqual(de["Percentage"], 100)
+    # }
+
+    def write_resume(self, de, journaled):
+        with open(os.path.join(self.folder, "Translations_de.json"), mode="w", encoding="utf-8") as f:
+            json.dump({"de": {"Percentage": 0, "Strings": de}}, f)
+        # }
+        with open(self.source + ".journal", mode="w", encoding="utf-8") as f:
+            for key, translation in journaled.items():
+                f.write(json.dumps(["de", key, translation]) + "\n")
+            # }
+        # }
+    # }
+
+    def test_resume_saved_target(self):
+        # the target was saved before the interruption, its journaled keys are in the target file already
+        en = {"Invoice": "Invoice", "Customer": "Customer", "Amount": "Amount"}
+        self.write_source(en, {})
+        self.write_resume({"Invoice": "Rechnung", "Customer": "Kunde"},
+                          {"Invoice": "Rechnung", "Customer": "Kunde", "Amount": "Betrag"})
+        de = self.translate("-resume")
+        self.assertEqual(de["Strings"], {"Amount": "Betrag", "Customer": "Kunde", "Invoice": "Rechnung"})
+        self.assertEqual(de["Percentage"], 100)
+    # }
+
+    def test_resume_replaced_copy(self):
+        en = {"Invoice": "Invoice", "Customer": "Customer", "Amount": "Amount"}
+        self.write_source(en, {})
+        self.write_resume({"Invoice": "Invoice", "Customer": "Kunde"}, {"Invoice": "Rechnung", "Amount": "Betrag"})
+        de = self.translate("-resume")
+        self.assertEqual(de["Strings"], {"Amount": "Betrag", "Customer": "Kunde", "Invoice": "Rechnung"})
+        self.assertEqual(de["Percentage"], 100)
+    # }
+
+# } TestPercentage
+
+
+
+class TestProgress(unittest.TestCase):
+
+    def test_split_string_counted_once(self):
+        # the long string is split in parts translated in separate batches, the progress counts it once
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, "Translations.json")
+            long = " ".join(f"Sentence number {i} of the long help text." for i in range(300))
+            en = {"Long": long, "Short": "Invoice date", "Other": "Due date"}
+            with open(source, mode="w", encoding="utf-8") as f:
+                json.dump({"en": {"Percentage": 100, "Strings": en}, "de": {"Percentage": 0, "Strings": {}}}, f)
+            # }
+            out = run_translator(["-from", "en", "-to", "de", "-fromfile", source, "-no-memory", "-test",
+                                  "-backend", "mock", "-mock", "0,0"])
+        # }
+        totals = [int(total) for total in re.findall(r"Translated total (\d+) strings", out)]
+        self.assertTrue(totals)
+        self.assertEqual(max(totals), len(en))
+    # }
+
+# } TestProgress
+
+
+
+class TestBatchRetryQueue(unittest.TestCase):
+
+    def test_lost_strings_queued_alone_with_backoff(self):
+        catalog = StringCatalog(["a", "b", "c"])
+        target = translator.TranslationTarget("de", catalog.column(), None, None, None, "en")
+        queue = translator.BatchRetryQueue()
+        task = types.SimpleNamespace(count=3, retry=0, result=[None, "B", None], rejected={}, target=target,
+                                     text_batch=["A", "B", "C"], text_keys=["a", "b", "c"], b_number=1,
+                                     src_lang="", tgt_lang="de", index=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(queue.retryBatch(task))
+        # }
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(target.pending, 2)
+        now = time.monotonic()
+        batches = sorted(argv[:3:2] for _, _, argv in queue.heap)
+        self.assertEqual(batches, [(["A"], ["a"]), (["C"], ["c"])])
+        self.assertTrue(all(due > now for due, _, _ in queue.heap))
+        self.assertTrue(all(argv[5] == 1 for _, _, argv in queue.heap))
+    # }
+
+    def test_retries_exhausted(self):
+        catalog = StringCatalog(["a"])
+        target = translator.TranslationTarget("de", catalog.column(), None, None, None, "en")
+        queue = translator.BatchRetryQueue()
+        task = types.SimpleNamespace(count=1, retry=translator.MAX_RETRIES, result=[None], target=target)
+        self.assertFalse(queue.retryBatch(task))
+        self.assertEqual(len(queue), 0)
+    # }
+
+# } TestBatchRetryQueue
+
+
+class TestBatchPacker(unittest.TestCase):
+
+    def pack(self, packer, texts):
+        catalog = StringCatalog([f"k{n}" for n in range(len(texts))])
+        target = translator.TranslationTarget("de", catalog.column(), None, None, None, "en")
+        items = [(f"k{n}", text, len(text.encode("utf-8")), 0.0) for n, text in enumerate(texts)]
+        texts, keys, batches = packer.pack(items, target)
+        return [(texts[start:end], keys[start:end], priority) for start, end, priority in batches]
+    # }
+
+    def test_string_cap_from_byte_budget(self):
+        packer = translator.BatchPacker(4999, 0)
+        batches = self.pack(packer, ["word"] * 200)
+        self.assertEqual(len(batches), 1)
+        self.assertGreater(packer.max_strings, 200)
+        batches = self.pack(translator.BatchPacker(4999, 20), ["word"] * 200)
+        self.assertEqual(len(batches), 10)
+    # }
+
+    def test_sized_on_encoded_text(self):
+        texts = ["{0}{1}{2}{3}"] * 6 + ["plain text of a string"] * 4
+        packer = translator.BatchPacker(100, 50)
+        batches = self.pack(packer, texts)
+        for text_batch, _, _ in batches:
+            encoded, _ = translator.BatchCodec.encode(text_batch)
+            self.assertLessEqual(len(encoded.encode("utf-8")), 100)
+        # }
+        self.assertEqual(sorted(key for _, keys, _ in batches for key in keys), sorted(f"k{n}" for n in range(10)))
+    # }
+
+    def test_long_string_split_on_encoded_text(self):
+        text = " ".join(["{0} word."] * 40)
+        packer = translator.BatchPacker(120, 0)
+        batches = self.pack(packer, [text])
+        self.assertGreater(len(batches), 1)
+        for text_batch, _, _ in batches:
+            encoded, _ = translator.BatchCodec.encode(text_batch)
+            self.assertLessEqual(len(encoded.encode("utf-8")), 120)
+        # }
+    # }
+
+# } TestBatchPacker
+
+
+class TestCatalogCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.source = os.path.join(self.folder, "Translations.json")
+    # }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+    # }
+
+    def write_source(self, en, de):
+        with open(self.source, mode="w", encoding="utf-8") as f:
+            json.dump({"en": {"Percentage": 100, "Strings": en}, "de": {"Percentage": 0, "Strings": de}}, f,
+                      indent="\t")
+        # }
+    # }
+
+    def test_source_updated_in_place(self):
+        cache = translator.CatalogCache()
+        catalog, source, changed = cache.getSource({"a": "A", "b": "B"})
+        self.assertIsNone(changed)
+        self.assertEqual(cache.getSource({"a": "A", "b": "B changed", "c": "C"}), (catalog, source, 2))
+        self.assertEqual(catalog.keys, ["a", "b", "c"])
+    # }
+
+    def test_column_reused_while_text_same(self):
+        cache = translator.CatalogCache()
+        self.write_source({"a": "A"}, {"a": "A de"})
+        cache.getSource({"a": "A"})
+        column = cache.getColumn(TranslationsFile(self.source), "de")
+        self.assertEqual(column.toDict(), {"a": "A de"})
+        self.assertIs(cache.getColumn(TranslationsFile(self.source), "de"), column)
+        self.write_source({"a": "A"}, {"a": "A de changed"})
+        self.assertEqual(cache.getColumn(TranslationsFile(self.source), "de").toDict(), {"a": "A de changed"})
+    # }
+
+    def test_target_kept_between_runs(self):
+        argv = ["-from", "en", "-to", "de", "-fromfile", self.source, "-no-memory", "-backend", "mock", "-mock", "0,0"]
+        target_file = os.path.join(self.folder, "Translations_de.json")
+        self.write_source({"a": "Invoice", "b": "Customer"}, {})
+        with translator.TranslatorServices() as services, contextlib.redirect_stdout(io.StringIO()):
+            services.catalog_cache = cache = translator.CatalogCache()
+            translator.translate(argv, services)
+            column = cache.getTarget(target_file)[0]
+            self.write_source({"c": "Amount", "a": "Invoice", "b": "Customer"}, {})
+            translator.translate(argv, services)
+        # }
+        self.assertIs(cache.getTarget(target_file)[0], column)
+        self.assertEqual(cache.catalog.keys, ["a", "b", "c"])
+        with open(target_file, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["de"]["Strings"], {"a": "Invoice", "b": "Customer", "c": "Amount"})
+        # }
+    # }
+
+    def test_load_target_file(self):
+        self.write_source({"a": "A"}, {})
+        self.assertIsNone(translator.load_target_file(os.path.join(self.folder, "Strings_de.json"), False, None))
+        self.assertIsNone(translator.load_target_file(None, True, None))
+        self.assertIsInstance(translator.load_target_file(self.source, True, None), TranslationsFile)
+        self.assertEqual(translator.load_target_file(self.source, False, None)["en"]["Strings"], {"a": "A"})
+    # }
+
+# } TestCatalogCache
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_validator import TranslationValidator
+
+
+class TestFixCase(unittest.TestCase):
+
+    def test_lower_case_source(self):
+        self.assertEqual(TranslationValidator.fixCase("invoices", "Faktury"), "faktury")
+    # }
+
+    def test_upper_case_source(self):
+        self.assertEqual(TranslationValidator.fixCase("Invoices", "Faktury"), "Faktury")
+    # }
+
+    def test_placeholder_first(self):
+        self.assertEqual(TranslationValidator.fixCase("{0} invoices", "Rechnungen: {0}"), "Rechnungen: {0}")
+    # }
+
+    def test_bracket_first(self):
+        self.assertEqual(TranslationValidator.fixCase("(invoice)", "Die Rechnung"), "Die Rechnung")
+        self.assertEqual(TranslationValidator.fixCase("invoice", "(Faktura)"), "(Faktura)")
+    # }
+
+    def test_opt_in_per_language(self):
+        validator = TranslationValidator(check_untranslated=False, fix_case_langs={"pl"})
+        result = ["Faktury"]
+        validator.validate(["invoices"], result, True, "pl")
+        self.assertEqual(result, ["faktury"])
+        result = ["Rechnungen"]
+        validator.validate(["invoices"], result, True, "de")
+        self.assertEqual(result, ["Rechnungen"])
+    # }
+
+    def test_off_by_default(self):
+        result = ["Faktury"]
+        TranslationValidator().validate(["invoices"], result, True, "pl")
+        self.assertEqual(result, ["Faktury"])
+    # }
+
+# } TestFixCase
+
+
+if __name__ == '__main__':
+    unittest.main()
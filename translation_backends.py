@@ -0,0 +1,738 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+import asyncio
+import contextlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import typing as tp
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import lognormvariate, random
+
+from typing_extensions import Self
+
+__all__ = ['BatchCodec', 'TranslationBackend', 'DeepTranslatorBackend', 'MockBackend', 'MockServer',
+           'BackendThrottled', 'HttpSession', 'AsyncHttpConnections', 'create_backend', 'parse_backend_args',
+           'PROVIDERS']
+
+MARKER = "\n§{}§ "       # indexed marker before every string of the batch
+MARKER_RE = re.compile(r"\s*§\s*(\d+)\s*§\s*")
+PLACEHOLDER = "⟨{}⟩"     # masked placeholder, the same length in characters as {0}
+PLACEHOLDER_RE = re.compile(r"⟨\s*(\d+)\s*⟩")
+FORMAT_RE = re.compile(r"\{[^{}]*\}|<[^<>]+>|&#?\w+;")   # {0}, {0:N2}, markup and entities
+
+# deep_translator providers by name
+PROVIDERS: dict[str, str] = {
+    "google": "GoogleTranslator",
+    "mymemory": "MyMemoryTranslator",
+    "deepl": "DeeplTranslator",
+    "libre": "LibreTranslator",
+    "yandex": "YandexTranslator",
+    "microsoft": "MicrosoftTranslator",
+    "papago": "PapagoTranslator",
+    "qcri": "QcriTranslator",
+    "linguee": "LingueeTranslator",
+    "pons": "PonsTranslator",
+}
+
+
+class BackendThrottled(Exception):
+    """
+    The backend refused the request because of the rate limit (HTTP 429).
+    """
+    ...
+
+# } BackendThrottled
+
+
+class BatchCodec:
+    """
+    Encoding of the batch of strings to one text for the translator. Every string is prefixed by the indexed
+    marker and its format placeholders and markup are masked, so the translator does not change them. The
+    result is decoded by the indexes of the markers, a string is None if its marker or placeholders are lost.
+    """
+    @staticmethod
+    def mask(text: str) -> tuple[str, list[str]]:
+        masks: list[str] = []
+
+        def replace(match: tp.Any) -> str:
+            masks.append(match.group(0))
+            return PLACEHOLDER.format(len(masks) - 1)
+        # }
+        return FORMAT_RE.sub(replace, text), masks
+    # }
+
+    @staticmethod
+    def unmask(text: str, masks: list[str]) -> str | None:
+        found: list[int] = []
+
+        def replace(match: tp.Any) -> str:
+            n = int(match.group(1))
+            found.append(n)
+            return masks[n] if n < len(masks) else match.group(0)
+        # }
+        result = PLACEHOLDER_RE.sub(replace, text)
+        if sorted(found) != list(range(len(masks))):
+            return None
+        # }
+        return result
+    # }
+
+    @staticmethod
+    def encode(texts: list[str]) -> tuple[str, list[list[str]]]:
+        """
+        Returns the text to translate and the masked placeholders of every string.
+        """
+        parts: list[str] = []
+        masks: list[list[str]] = []
+        for n, text in enumerate(texts):
+            masked, text_masks = BatchCodec.mask(text)
+            parts.append(MARKER.format(n) + masked)
+            masks.append(text_masks)
+        # }
+        return "".join(parts).lstrip(), masks
+    # }
+
+    @staticmethod
+    def decode(text: str, masks: list[list[str]]) -> list[str | None]:
+        """
+        Returns the list of the translated strings by indexes of the markers. A string is None if it is absent,
+        duplicated, empty or its placeholders are lost.
+        """
+        count = len(masks)
+        result: list[str | None] = [None] * count
+        pieces = MARKER_RE.split(text)
+        seen: set[int] = set()
+        if count == 1 and len(pieces) == 1:     # the marker of a single string was dropped
+            pieces = ["", "0", text]
+        # }
+        indexes = [int(index) for index in pieces[1::2]]
+        for i, (n, piece) in enumerate(zip(indexes, pieces[2::2])):
+            if n >= count or n in seen:
+                if n < count:
+                    result[n] = None
+                # }
+                continue
+            # }
+            seen.add(n)
+            # the piece is trusted if the next marker is not lost, otherwise it may contain the next string
+            next_n = indexes[i + 1] if i + 1 < len(indexes) else count
+            piece = piece.strip()
+            if next_n != n + 1 or not piece:
+                continue
+            # }
+            result[n] = BatchCodec.unmask(piece, masks[n])
+        # }
+        return result
+    # }
+
+# } BatchCodec
+
+
+class TranslationBackend:
+    """
+    The base class of the translation backend. It is needed to overload translate(text). The batch is encoded
+    by BatchCodec to one request by default, a backend with a batch API may overload translate_batch().
+    A backend object is used by one thread at a time.
+
+    Args:
+        source: str - source language code.
+        target: str - target language code.
+    """
+    def __init__(self, source: str, target: str):
+        self.source: str = source
+        self.target: str = target
+    # }
+
+    def translate(self, text: str) -> str:
+        """
+        Translate the text. Raises an exception if the request fails.
+        """
+        ...
+    # }
+
+    async def translate_async(self, text: str) -> str:
+        """
+        Translate the text in the context of the event loop. By default, translate() runs in the executor.
+        """
+        return await asyncio.to_thread(self.translate, text)
+    # }
+
+    def translate_batch(self, texts: list[str]) -> list[str | None]:
+        """
+        Translate the list of strings. Returns the list of translations, None for a string lost by the translator.
+        """
+        text, masks = BatchCodec.encode(texts)
+        return BatchCodec.decode(self.translate(text), masks)
+    # }
+
+    async def translate_batch_async(self, texts: list[str]) -> list[str | None]:
+        text, masks = BatchCodec.encode(texts)
+        return BatchCodec.decode(await self.translate_async(text), masks)
+    # }
+
+# } TranslationBackend
+
+
+class AsyncHttpConnections:
+    """
+    Keep-alive HTTP/1.1 connections by asyncio streams for the coroutines of one event loop. A request takes an idle
+    connection to the host or opens a new one and puts it back when the response is read, so the requests in
+    flight hold a connection each and the next requests reuse them. An idle connection closed by the server is
+    replaced by a new one.
+    """
+    def __init__(self):
+        self.idle: dict[tuple[str, int], list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self.requests: int = 0
+        self.connections: int = 0
+    # }
+
+    async def post(self, url: str, body: bytes, headers: dict[str, str], timeout: float) -> tuple[int, bytes]:
+        """
+        Send POST request. Returns HTTP status and the body of the response.
+        """
+        parts = urllib.parse.urlparse(url)
+        host, port = parts.hostname, parts.port or 80
+        head = (f"POST {parts.path or '/'} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: keep-alive\r\n"
+                + "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+                + f"Content-Length: {len(body)}\r\n\r\n")
+        idle = self.idle.setdefault((host, port), [])
+        self.requests += 1
+        while True:
+            reused = bool(idle)
+            if reused:
+                reader, writer = idle.pop()
+            else:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                self.connections += 1
+            # }
+            try:
+                writer.write(head.encode("latin-1") + body)
+                await writer.drain()
+                status, response, keep_alive = await asyncio.wait_for(self.readResponse(reader), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused:
+                    continue    # the server has closed the idle connection
+                # }
+                raise
+            except BaseException:   # the response is not read, e.g. the task is cancelled
+                writer.close()
+                raise
+            # }
+            if keep_alive:
+                idle.append((reader, writer))
+            else:
+                writer.close()
+            # }
+            return status, response
+        # }
+    # }
+
+    @staticmethod
+    async def readResponse(reader: asyncio.StreamReader) -> tuple[int, bytes, bool]:
+        """
+        Read the response. Returns HTTP status, the body and true if the connection can be reused.
+        """
+        lines = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status_line = lines[0].split(" ", 2)
+        fields: dict[str, str] = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            fields[name.strip().lower()] = value.strip()
+        # }
+        if "content-length" not in fields:  # the body ends with the connection
+            return int(status_line[1]), await reader.read(), False
+        # }
+        body = await reader.readexactly(int(fields["content-length"]))
+        keep_alive = status_line[0] == "HTTP/1.1" and fields.get("connection", "").lower() != "close"
+        return int(status_line[1]), body, keep_alive
+    # }
+
+    def close(self) -> None:
+        """
+        Close the idle connections. It should be called while their event loop is not closed.
+        """
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+            # }
+        # }
+        self.idle = {}
+    # }
+
+# } AsyncHttpConnections
+
+
+class HttpSession:
+    """
+    The HTTP session shared by all backends and threads of a run. Every thread sends its requests through its own
+    requests.Session, the sessions share one adapter where keep-alive connections are pooled per host, so a request
+    reuses an open connection instead of paying TCP and TLS setup. The pool size
+    should match the number of the requests in flight. The requests without timeout (deep_translator providers do
+    not set it) get the default one, so a stalled connection does not hold a slot of the pool forever. The
+    coroutines of AsyncTasksPool send their requests by postAsync() through AsyncHttpConnections.
+
+    Args:
+        pool_size: int - maximum number of the kept connections per host (default 10).
+        timeout: float - default timeout of the requests in seconds (default 60).
+    """
+    def __init__(self, pool_size: int = 10, timeout: float = 60.0):
+        from requests.adapters import HTTPAdapter
+
+        self.pool_size: int = max(1, pool_size)
+        self.timeout: float = timeout
+        self.adapter: tp.Any = HTTPAdapter(pool_maxsize=self.pool_size)   # thread safe pools of urllib3
+        self.local: tp.Any = threading.local()
+        self.sessions: list[tp.Any] = []     # requests.Session of every thread
+        self.lock: tp.Any = threading.Lock()
+        self.async_connections: AsyncHttpConnections = AsyncHttpConnections()
+    # }
+
+    def getSession(self) -> tp.Any:
+        """
+        Returns requests.Session of the current thread, it is created on demand.
+        """
+        session = getattr(self.local, "session", None)
+        if session is None:
+            import requests
+
+            session = self.local.session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            with self.lock:
+                self.sessions.append(session)
+            # }
+        # }
+        return session
+    # }
+
+    def request(self, method: str, url: str, **kwargs) -> tp.Any:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        # }
+        return self.getSession().request(method, url, **kwargs)
+    # }
+
+    def get(self, url: str, **kwargs) -> tp.Any:
+        return self.request("GET", url, **kwargs)
+    # }
+
+    def post(self, url: str, **kwargs) -> tp.Any:
+        return self.request("POST", url, **kwargs)
+    # }
+
+    async def postAsync(self, url: str, body: bytes, headers: dict[str, str],
+                        timeout: float | None = None) -> tuple[int, bytes]:
+        """
+        Send POST request from a coroutine of the event loop. Returns HTTP status and the body of the response.
+        """
+        return await self.async_connections.post(url, body, headers, timeout or self.timeout)
+    # }
+
+    def getStats(self) -> tuple[int, int]:
+        """
+        Returns the counts of the requests and of the opened connections, the rest of the requests reused
+        connections.
+        """
+        requests_count: int = 0
+        connections: int = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            requests_count += pool.num_requests
+            connections += pool.num_connections
+        # }
+        requests_count += self.async_connections.requests
+        connections += self.async_connections.connections
+        return requests_count, connections
+    # }
+
+    def closeAsync(self) -> None:
+        """
+        Close the idle connections of the coroutines before their event loop is closed.
+        """
+        self.async_connections.close()
+    # }
+
+    def close(self) -> None:
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+            # }
+            self.sessions = []
+        # }
+        self.adapter.close()
+    # }
+
+# } HttpSession
+
+
+class SessionRequests:
+    """
+    The stand-in of the requests module in the module of a deep_translator provider, which calls requests.get()
+    and requests.post() for every translation, its retries included. The calls made on a thread in the scope of
+    use() go through the HttpSession of the scope, the calls out of the scope and other names go to requests.
+
+    Args:
+        requests_module: the requests module the provider module has imported.
+    """
+    local: tp.Any = threading.local()   # the session of the scope per thread
+
+    def __init__(self, requests_module: tp.Any):
+        self.requests: tp.Any = requests_module
+    # }
+
+    @classmethod
+    def install(cls, module: tp.Any) -> None:
+        """
+        Replace requests in the provider module once, a module without requests is not changed.
+        """
+        requests_module = getattr(module, "requests", None)
+        if requests_module is not None and not isinstance(requests_module, cls):
+            module.requests = cls(requests_module)
+        # }
+    # }
+
+    @classmethod
+    @contextlib.contextmanager
+    def use(cls, session: HttpSession) -> tp.Iterator[None]:
+        """
+        The scope where requests of the provider modules on the current thread are sent through the session.
+        """
+        previous = getattr(cls.local, "session", None)
+        cls.local.session = session
+        try:
+            yield
+        finally:
+            cls.local.session = previous
+        # }
+    # }
+
+    def get(self, url: str, **kwargs) -> tp.Any:
+        return (getattr(self.local, "session", None) or self.requests).get(url, **kwargs)
+    # }
+
+    def post(self, url: str, **kwargs) -> tp.Any:
+        return (getattr(self.local, "session", None) or self.requests).post(url, **kwargs)
+    # }
+
+    def __getattr__(self, name: str) -> tp.Any:
+        return getattr(self.requests, name)
+    # }
+
+# } SessionRequests
+
+
+class DeepTranslatorBackend(TranslationBackend):
+    """
+    Backend of deep_translator providers (see PROVIDERS). The provider object keeps the parameters of the request
+    between its calls, so every thread uses its own one. The requests of the provider are sent through the session
+    by SessionRequests.
+
+    Args:
+        provider: str - provider name, e.g. google.
+        source: str - source language code.
+        target: str - target language code.
+        proxies: dict[str, str] | None - proxies for requests.
+        session: HttpSession | None - the session to send requests of the provider module through or None.
+        kwargs - other arguments of the provider, e.g. api_key.
+    """
+    def __init__(self, provider: str, source: str, target: str, proxies: dict[str, str] | None = None,
+                 session: HttpSession | None = None, **kwargs):
+        super().__init__(source, target)
+        import deep_translator as dt
+
+        class_name = PROVIDERS.get(provider, provider)
+        self.translator_class: tp.Any = getattr(dt, class_name, None)
+        if self.translator_class is None:
+            raise ValueError(f"Unknown translation provider {provider}!")
+        # }
+        self.kwargs: dict[str, tp.Any] = dict(source=source, target=target, proxies=proxies, **kwargs)
+        self.session: HttpSession | None = session
+        self.local: tp.Any = threading.local()  # the provider object per thread
+        self.getTranslator()    # the arguments and the credentials are checked on creation of the backend
+        if session is not None:
+            SessionRequests.install(sys.modules[self.translator_class.__module__])
+        # }
+    # }
+
+    def getTranslator(self) -> tp.Any:
+        """
+        Returns the provider object of the current thread, it is created on demand.
+        """
+        translator = getattr(self.local, "translator", None)
+        if translator is None:
+            translator = self.local.translator = self.translator_class(**self.kwargs)
+        # }
+        return translator
+    # }
+
+    def translate(self, text: str) -> str:
+        translator = self.getTranslator()
+        if self.session is None:
+            return translator.translate(text)
+        # }
+        with SessionRequests.use(self.session):
+            return translator.translate(text)
+        # }
+    # }
+
+# } DeepTranslatorBackend
+
+
+class MockBackend(TranslationBackend):
+    """
+    Backend of the local MockServer for load testing.
+
+    Args:
+        url: str - URL of the server, e.g. http://127.0.0.1:8765.
+        source: str - source language code.
+        target: str - target language code.
+        timeout: float - request timeout in seconds (default 60).
+        session: HttpSession | None - the session to send requests through or None for a connection per request.
+    """
+    def __init__(self, url: str, source: str, target: str, timeout: float = 60.0, session: HttpSession | None = None):
+        super().__init__(source, target)
+        self.url: str = url.rstrip("/") + "/translate"
+        self.timeout: float = timeout
+        self.session: HttpSession | None = session
+    # }
+
+    def makeBody(self, text: str) -> bytes:
+        return json.dumps({"q": text, "source": self.source, "target": self.target}).encode("utf-8")
+    # }
+
+    @staticmethod
+    def checkStatus(status: int, body: bytes) -> str:
+        if status == 429:
+            raise BackendThrottled("Too many requests (429)")
+        # }
+        if status != 200:
+            raise Exception(f"Mock server error ({status})")
+        # }
+        return json.loads(body)["text"]
+    # }
+
+    def translate(self, text: str) -> str:
+        if self.session is not None:
+            response = self.session.post(self.url, data=self.makeBody(text), timeout=self.timeout,
+                                         headers={"Content-Type": "application/json"})
+            return self.checkStatus(response.status_code, response.content)
+        # }
+        request = urllib.request.Request(self.url, data=self.makeBody(text), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return self.checkStatus(response.status, response.read())
+            # }
+        except urllib.error.HTTPError as exc:
+            return self.checkStatus(exc.code, b"")
+        # }
+    # }
+
+    async def translate_async(self, text: str) -> str:
+        """
+        HTTP request by asyncio streams, so many requests are handled by one thread. The requests of the session
+        reuse its keep-alive connections, without the session a request opens HTTP/1.0 connection.
+        """
+        if self.session is not None:
+            status, response_body = await self.session.postAsync(self.url, self.makeBody(text),
+                                                                 {"Content-Type": "application/json"}, self.timeout)
+            return self.checkStatus(status, response_body)
+        # }
+        url = urllib.parse.urlparse(self.url)
+        body = self.makeBody(text)
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(url.hostname, url.port or 80), self.timeout)
+        try:
+            writer.write(f"POST {url.path} HTTP/1.0\r\nHost: {url.hostname}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), self.timeout)
+        finally:
+            writer.close()
+        # }
+        header, _, response_body = response.partition(b"\r\n\r\n")
+        status = int(header.split(b" ", 2)[1])
+        return self.checkStatus(status, response_body)
+    # }
+
+# } MockBackend
+
+
+class MockServer:
+    """
+    Local HTTP server which imitates the translation service for load testing: it returns the text as is after
+    a random delay, fails with the error rate and answers 429 if the rate of requests exceeds the limit.
+
+    Args:
+        port: int - port to listen on 127.0.0.1, 0 (default) to select a free one.
+        latency: float - median of the response time in seconds (default 0.5).
+        sigma: float - sigma of lognormal distribution of the response time (default 0.5), 0 for constant.
+        error_rate: float - probability of HTTP 500 error (default 0).
+        max_rps: float - requests per second to answer 429 above, 0 (default) for no limit.
+    """
+    def __init__(self, port: int = 0, latency: float = 0.5, sigma: float = 0.5, error_rate: float = 0.0,
+                 max_rps: float = 0.0):
+        self.latency: float = latency
+        self.sigma: float = sigma
+        self.error_rate: float = error_rate
+        self.max_rps: float = max_rps
+        self.requests: int = 0
+        self.connections: int = 0
+        self.errors: int = 0
+        self.throttled: int = 0
+        self.recent: list[float] = []
+        self.latencies: list[float] = []   # response times of the answered requests
+        self.lock: tp.Any = threading.Lock()
+        self.server: tp.Any = ThreadingHTTPServer(("127.0.0.1", port), self.makeHandler())
+        self.server.daemon_threads = True
+        self.thread: tp.Any = None
+    # }
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+    # }
+
+    def makeHandler(self) -> type:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive connections of HTTP/1.1 clients
+            disable_nagle_algorithm = True  # the headers and the body are sent by separate writes
+
+            def setup(self):
+                super().setup()
+                with mock.lock:
+                    mock.connections += 1
+                # }
+            # }
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, text = mock.handle(json.loads(body or b"{}").get("q", ""))
+                data = json.dumps({"text": text}, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                try:
+                    self.end_headers()
+                    self.wfile.write(data)
+                except ConnectionError:     # the client gave up waiting, e.g. the task timed out
+                    self.close_connection = True
+                # }
+            # }
+
+            def log_message(self, format, *args):
+                pass
+            # }
+        # }
+        return Handler
+    # }
+
+    def handle(self, text: str) -> tuple[int, str]:
+        """
+        Returns HTTP status and the "translated" text. It calls from the thread of the request.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.requests += 1
+            if self.max_rps > 0:
+                self.recent = [t for t in self.recent if now - t < 1.0]
+                if len(self.recent) >= self.max_rps:
+                    self.throttled += 1
+                    return 429, ""
+                # }
+                self.recent.append(now)
+            # }
+        # }
+        if self.latency > 0:
+            delay = lognormvariate(math.log(self.latency), self.sigma) if self.sigma > 0 else self.latency
+            time.sleep(delay)
+        # }
+        with self.lock:
+            self.latencies.append(time.monotonic() - now)
+            if random() < self.error_rate:
+                self.errors += 1
+                return 500, ""
+            # }
+        # }
+        return 200, text
+    # }
+
+    def start(self) -> Self:
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    # }
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+    # }
+
+# } MockServer
+
+
+def parse_backend_args(name: str) -> tuple[str, dict[str, tp.Any]]:
+    """
+    Returns the provider and its arguments of the backend name <provider>[:<argument>=<value>;...], e.g.
+    deepl:api_key=$DEEPL_KEY;use_free_api=false. A value $NAME is read from the environment variable NAME,
+    true and false are booleans.
+    """
+    provider, _, args = name.partition(":")
+    kwargs: dict[str, tp.Any] = {}
+    for item in args.split(";"):
+        if "=" not in item:
+            continue
+        # }
+        arg, value = (part.strip() for part in item.split("=", 1))
+        if value.startswith("$"):
+            value = os.environ.get(value[1:], "")
+        # }
+        kwargs[arg] = {"true": True, "false": False}.get(value.lower(), value)
+    # }
+    return provider.strip(), kwargs
+# }
+
+
+def create_backend(name: str, source: str, target: str, proxies: dict[str, str] | None = None,
+                   session: HttpSession | None = None) -> TranslationBackend:
+    """
+    Create the backend by name: a provider of deep_translator (see PROVIDERS) with its arguments, e.g. the
+    credentials (see parse_backend_args()), or mock:<url> of MockServer. The providers with an API key read it
+    from their environment variables as well (DEEPL_API_KEY, MICROSOFT_API_KEY, YANDEX_API_KEY, ...).
+    """
+    if name.startswith("mock:"):
+        return MockBackend(name[5:], source, target, session=session)
+    # }
+    provider, kwargs = parse_backend_args(name)
+    return DeepTranslatorBackend(provider, source, target, proxies, session, **kwargs)
+# }
+
+
+#
+if __name__ == '__main__':
+    # python translation_backends.py <port> [<latency> [<sigma> [<error rate> [<max rps>]]]]
+    argv = sys.argv[1:]
+    params = [float(arg) for arg in argv[1:5]]
+    mock_server = MockServer(int(argv[0]) if argv else 8765, *params)
+    print(f"Mock translation server is listening on {mock_server.url}. Press Ctrl-C to stop.")
+    try:
+        mock_server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    # }
+# }
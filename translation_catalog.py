@@ -0,0 +1,287 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+import heapq
+import operator
+import sys
+import typing as tp
+from itertools import compress
+
+__all__ = ['StringCatalog', 'CatalogColumn']
+
+
+class StringCatalog:
+    """
+    The keys of the strings of a run interned once and numbered by ids. The strings of every language are kept in
+    a CatalogColumn: the list of the values indexed by the key id, so a language costs one reference per key
+    instead of a dict with its own copies of the keys, and the sorted order of the keys is computed once for all
+    the languages. All methods should be called from the main thread.
+
+    Args:
+        keys: tp.Iterable[str] - the keys of the source strings.
+    """
+    def __init__(self, keys: tp.Iterable[str] = ()):
+        self.keys: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.sorted_ids: list[int] | None = None    # ids of the sorted keys, the keys added later are merged in
+        for key in keys:
+            self.intern(key)
+        # }
+    # }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+    # }
+
+    def intern(self, key: str) -> int:
+        """
+        Returns the id of the key, a new key is added to the catalog.
+        """
+        key_id = self.ids.get(key)
+        if key_id is None:
+            key_id = len(self.keys)
+            key = sys.intern(key)
+            self.keys.append(key)
+            self.ids[key] = key_id
+        # }
+        return key_id
+    # }
+
+    def getSortedIds(self) -> list[int]:
+        """
+        Returns the ids of the keys in the sorted order. The keys are sorted once, the keys added after that are
+        sorted alone and merged with the sorted ones.
+        """
+        keys = self.keys
+        if self.sorted_ids is None:
+            self.sorted_ids = sorted(range(len(keys)), key=keys.__getitem__)
+        elif len(self.sorted_ids) < len(keys):
+            new_ids = sorted(range(len(self.sorted_ids), len(keys)), key=keys.__getitem__)
+            self.sorted_ids = list(heapq.merge(self.sorted_ids, new_ids, key=keys.__getitem__))
+        # }
+        return self.sorted_ids
+    # }
+
+    def column(self, strings: dict[str, str] | None = None) -> "CatalogColumn":
+        """
+        Returns the new column filled with the strings. The strings dict can be dropped after that.
+        """
+        column = CatalogColumn(self)
+        if strings:
+            ids = self.ids
+            values = column.values
+            for key, value in strings.items():
+                key_id = ids.get(key)
+                if key_id is None or value is None:     # a key which is absent in the source
+                    if value is not None:
+                        column[key] = value
+                    # }
+                    continue
+                # }
+                values[key_id] = value
+                column.count += 1
+            # }
+        # }
+        return column
+    # }
+
+# } StringCatalog
+
+
+class CatalogColumn:
+    """
+    The strings of one language in StringCatalog with the dict-like interface used by the translator: key lookups,
+    assignment, pop(), len() and items(). A missing key has None value in the list.
+
+    Args:
+        catalog: StringCatalog - the catalog of the keys.
+    """
+    def __init__(self, catalog: StringCatalog):
+        self.catalog: StringCatalog = catalog
+        self.values: list[str | None] = [None] * len(catalog)
+        self.count: int = 0
+        self.sizes: list[int] | None = None     # cached sizes of the values in bytes, -1 - not computed yet
+    # }
+
+    def __len__(self) -> int:
+        return self.count
+    # }
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+    # }
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        # }
+        return value
+    # }
+
+    def __setitem__(self, key: str, value: str) -> None:
+        key_id = self.catalog.intern(key)
+        values = self.values
+        if key_id >= len(values):   # the key was added to the catalog after the column was created
+            values.extend([None] * (key_id + 1 - len(values)))
+        # }
+        if values[key_id] is None:
+            self.count += 1
+        # }
+        values[key_id] = value
+        self.sizes = None
+    # }
+
+    def get(self, key: str, default: tp.Any = None) -> tp.Any:
+        key_id = self.catalog.ids.get(key)
+        if key_id is None or key_id >= len(self.values):
+            return default
+        # }
+        value = self.values[key_id]
+        return default if value is None else value
+    # }
+
+    def pop(self, key: str, default: tp.Any = None) -> tp.Any:
+        value = self.get(key)
+        if value is None:
+            return default
+        # }
+        self.values[self.catalog.ids[key]] = None
+        self.count -= 1
+        self.sizes = None
+        return value
+    # }
+
+    def update(self, strings: dict[str, str]) -> int:
+        """
+        Replace the values of the column by the strings, e.g. by the next version of the source. Only the keys which
+        are absent in the catalog are interned, the keys absent in the strings get None, the cached sizes of the
+        unchanged values are kept. Returns the count of the new and changed values.
+        """
+        ids = self.catalog.ids
+        old_values = self.values
+        old_len = len(old_values)
+        values: list[str | None] = [None] * len(self.catalog)
+        changed: list[int] = []
+        count: int = 0
+        for key, value in strings.items():
+            if value is None:
+                continue
+            # }
+            key_id = ids.get(key)
+            if key_id is None:  # a new key
+                key_id = self.catalog.intern(key)
+                values.append(None)
+            # }
+            values[key_id] = value
+            count += 1
+            if key_id >= old_len or old_values[key_id] != value:
+                changed.append(key_id)
+            # }
+        # }
+        sizes = self.sizes
+        if sizes is not None and len(sizes) == old_len:
+            sizes.extend([-1] * (len(values) - old_len))
+            for key_id in changed:
+                sizes[key_id] = -1
+            # }
+        # }
+        self.values = values
+        self.count = count
+        return len(changed)
+    # }
+
+    def missingIds(self, size: int) -> list[int]:
+        """
+        Returns the ids of the first size keys which have no value or an empty one in the column.
+        """
+        values = self.values
+        missing = list(compress(range(size), map(operator.not_, values[:size])))
+        if len(values) < size:
+            missing.extend(range(len(values), size))
+        # }
+        return missing
+    # }
+
+    def sameIds(self, other: "CatalogColumn") -> list[int]:
+        """
+        Returns the ids of the keys which have the same value in both columns.
+        """
+        same = compress(range(len(self.values)), map(operator.eq, self.values, other.values))
+        return [key_id for key_id in same if self.values[key_id] is not None]
+    # }
+
+    def copyFrom(self, other: "CatalogColumn", ids: tp.Iterable[int]) -> int:
+        """
+        Copy the values of the keys from the other column of the catalog where it has them. Returns their count.
+        """
+        values = self.values
+        other_values = other.values
+        other_len = len(other_values)
+        ids = [key_id for key_id in ids if key_id < other_len and other_values[key_id]]
+        if not ids:
+            return 0
+        # }
+        last = max(ids)
+        if last >= len(values):
+            values.extend([None] * (last + 1 - len(values)))
+        # }
+        for key_id in ids:
+            if values[key_id] is None:
+                self.count += 1
+            # }
+            values[key_id] = other_values[key_id]
+        # }
+        self.sizes = None
+        return len(ids)
+    # }
+
+    def byteSizes(self, ids: list[int], encoding: str = "utf-8") -> list[int]:
+        """
+        Returns the sizes in bytes of the values of the keys (0 for a missing value). The size of a value is
+        computed once and cached until the column is changed.
+        """
+        sizes = self.sizes
+        if sizes is None or len(sizes) != len(self.values):
+            sizes = self.sizes = [-1] * len(self.values)
+        # }
+        values = self.values
+        result: list[int] = []
+        for key_id in ids:
+            size = sizes[key_id]
+            if size < 0:
+                value = values[key_id]
+                size = sizes[key_id] = len(value.encode(encoding)) if value else 0
+            # }
+            result.append(size)
+        # }
+        return result
+    # }
+
+    def items(self) -> tp.Iterator[tuple[str, str]]:
+        keys = self.catalog.keys
+        return ((keys[key_id], value) for key_id, value in enumerate(self.values) if value is not None)
+    # }
+
+    def sortedItems(self) -> tp.Iterator[tuple[str, str]]:
+        """
+        Returns the items sorted by the keys in the order shared by all the columns of the catalog.
+        """
+        keys = self.catalog.keys
+        values = self.values
+        size = len(values)
+        return ((keys[key_id], values[key_id]) for key_id in self.catalog.getSortedIds()
+                if key_id < size and values[key_id] is not None)
+    # }
+
+    def toDict(self) -> dict[str, str]:
+        """
+        Returns the dict of the strings sorted by the keys to be serialized.
+        """
+        return dict(self.sortedItems())
+    # }
+
+# } CatalogColumn
@@ -0,0 +1,96 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+import json
+import os
+import typing as tp
+
+__all__ = ['TranslationJournal']
+
+
+class TranslationJournal:
+    """
+    The append-only journal of the translated strings of a run. Every line is a JSON array
+    [target language, key, translation]. Lines are flushed to disk after every saved batch, so the translations
+    are not lost if the run is interrupted and can be replayed by the next run.
+    All methods should be called from the main thread.
+
+    Args:
+        file_name: str - journal file name.
+        encoding: str - file encoding (default utf-8).
+    """
+    def __init__(self, file_name: str, encoding: str = "utf-8"):
+        self.file_name: str = file_name
+        self.encoding: str = encoding
+        self.file: tp.Any = None
+        self.written: int = 0
+    # }
+
+    def __del__(self):
+        self.close()
+    # }
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.file_name)
+    # }
+
+    def replay(self) -> dict[str, dict[str, str]]:
+        """
+        Read the journal. Returns the dict target language -> dict key -> translation. A line broken by
+        interruption of the previous run is skipped.
+        """
+        result: dict[str, dict[str, str]] = {}
+        if not self.exists():
+            return result
+        # }
+        with open(file=self.file_name, encoding=self.encoding) as f:
+            for line in f:
+                try:
+                    tgt_lang, key, translation = json.loads(line)
+                except ValueError:
+                    continue
+                # }
+                result.setdefault(tgt_lang, {})[key] = translation
+            # }
+        # }
+        return result
+    # }
+
+    def open(self, append: bool) -> None:
+        """
+        Open the journal to write. If append is false, the previous journal is discarded.
+        """
+        self.file = open(file=self.file_name, mode="a" if append else "w", encoding=self.encoding)
+    # }
+
+    def write(self, tgt_lang: str, key: str, translation: str) -> None:
+        if self.file is not None:
+            self.file.write(json.dumps([tgt_lang, key, translation], ensure_ascii=False) + "\n")
+            self.written += 1
+        # }
+    # }
+
+    def flush(self) -> None:
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        # }
+    # }
+
+    def close(self, remove: bool = False) -> None:
+        """
+        Close the journal. If remove is true, the journal file is deleted as all its translations were saved.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        # }
+        if remove and self.exists():
+            os.remove(self.file_name)
+        # }
+    # }
+
+# } TranslationJournal
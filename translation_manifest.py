@@ -0,0 +1,99 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+import hashlib
+import json
+import os
+
+__all__ = ['TranslationManifest']
+
+
+class TranslationManifest:
+    """
+    The sidecar file of the hashes of the source strings at the time of their translation, per pair of languages.
+    A translated key is dirty when the hash of its current source text differs from the saved one, so the strings
+    edited upstream are translated again, and the keys which were deleted from the source can be pruned from the
+    target. All methods should be called from the main thread.
+
+    Args:
+        file_name: str - manifest file name.
+        encoding: str - file encoding (default utf-8).
+    """
+    def __init__(self, file_name: str, encoding: str = "utf-8"):
+        self.file_name: str = file_name
+        self.encoding: str = encoding
+        self.pairs: dict[str, dict[str, str]] = {}      # "src>tgt" -> key -> hash of the source text
+        self.modified: bool = False
+        if os.path.isfile(file_name):
+            try:
+                with open(file=file_name, encoding=encoding) as f:
+                    self.pairs = json.load(f)
+                # }
+            except ValueError:
+                print(f"The manifest {os.path.basename(file_name)} is broken, all the strings are treated as unchanged.")
+            # }
+        # }
+    # }
+
+    @staticmethod
+    def hashText(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+    # }
+
+    @staticmethod
+    def hashStrings(strings: dict[str, str]) -> dict[str, str]:
+        """
+        Returns the dict key -> hash of the source text to be shared by all target languages.
+        """
+        hash_text = TranslationManifest.hashText
+        return {key: hash_text(text) for key, text in strings.items()}
+    # }
+
+    def getPair(self, csr_lang: str, tgt_lang: str) -> dict[str, str]:
+        return self.pairs.setdefault(f"{csr_lang}>{tgt_lang}", {})
+    # }
+
+    def diff(self, csr_lang: str, tgt_lang: str, source_hashes: dict[str, str]) -> tuple[set[str], set[str]]:
+        """
+        Returns the keys which source text was changed and the keys which were deleted from the source since they
+        were translated.
+        """
+        pair = self.getPair(csr_lang, tgt_lang)
+        changed = {key for key, h in pair.items() if key in source_hashes and source_hashes[key] != h}
+        deleted = pair.keys() - source_hashes.keys()
+        return changed, deleted
+    # }
+
+    def put(self, csr_lang: str, tgt_lang: str, key: str, source_hash: str) -> None:
+        pair = self.getPair(csr_lang, tgt_lang)
+        if pair.get(key) != source_hash:
+            pair[key] = source_hash
+            self.modified = True
+        # }
+    # }
+
+    def remove(self, csr_lang: str, tgt_lang: str, key: str) -> None:
+        if self.getPair(csr_lang, tgt_lang).pop(key, None) is not None:
+            self.modified = True
+        # }
+    # }
+
+    def save(self) -> None:
+        """
+        Write the manifest if it was modified. The file is replaced atomically.
+        """
+        if not self.modified:
+            return
+        # }
+        tmp_file_name = self.file_name + ".tmp"
+        with open(file=tmp_file_name, mode="w", encoding=self.encoding) as f:
+            json.dump(self.pairs, f, ensure_ascii=False, separators=(",", ":"))
+        # }
+        os.replace(tmp_file_name, self.file_name)
+        self.modified = False
+    # }
+
+# } TranslationManifest
@@ -0,0 +1,107 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+import sqlite3
+import typing as tp
+
+__all__ = ['TranslationMemory']
+
+
+class TranslationMemory:
+    """
+    The on-disk translation memory keyed by (source language, target language, source text). It is used to
+    reuse translations of the same text under different keys and from previous runs instead of sending the text
+    to the translator again.
+
+    Translations of a language pair are loaded into a dict on the first request; new translations are buffered
+    and written to SQLite database by flush(). All methods should be called from the main thread.
+
+    Args:
+        file_name: str - SQLite database file name or ":memory:" to keep the memory for the current run only.
+    """
+    def __init__(self, file_name: str):
+        self.file_name: str = file_name
+        self.hits: int = 0
+        self.misses: int = 0
+        self.added: int = 0
+        self.cache: dict[tuple[str, str], dict[str, str]] = {}
+        self.new_rows: list[tuple[str, str, str, str]] = []
+        self.connection: tp.Any = None
+        self.connection = sqlite3.connect(file_name)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS memory (src_lang TEXT NOT NULL, tgt_lang TEXT NOT NULL, "
+                                "source TEXT NOT NULL, target TEXT NOT NULL, "
+                                "PRIMARY KEY (src_lang, tgt_lang, source)) WITHOUT ROWID")
+        self.connection.commit()
+    # }
+
+    def __del__(self):
+        self.close()
+    # }
+
+    def getLanguagePair(self, csr_lang: str, tgt_lang: str) -> dict[str, str]:
+        """
+        Returns the dict source text -> translation for the pair of languages. It is loaded from database on demand.
+        """
+        pair = self.cache.get((csr_lang, tgt_lang))
+        if pair is None:
+            cursor = self.connection.execute("SELECT source, target FROM memory WHERE src_lang=? AND tgt_lang=?",
+                                             (csr_lang, tgt_lang))
+            pair = dict(cursor.fetchall())
+            self.cache[(csr_lang, tgt_lang)] = pair
+        # }
+        return pair
+    # }
+
+    def get(self, csr_lang: str, tgt_lang: str, text: str) -> str | None:
+        """
+        Returns the translation of the text or None and counts hits and misses.
+        """
+        result = self.getLanguagePair(csr_lang, tgt_lang).get(text)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        # }
+        return result
+    # }
+
+    def put(self, csr_lang: str, tgt_lang: str, text: str, translation: str) -> None:
+        """
+        Add the translation of the text to the memory. Empty translations and the ones equal to the source text are
+        ignored as they are not useful to be reused.
+        """
+        if not translation or translation == text:
+            return
+        # }
+        pair = self.getLanguagePair(csr_lang, tgt_lang)
+        if pair.get(text) != translation:
+            pair[text] = translation
+            self.new_rows.append((csr_lang, tgt_lang, text, translation))
+            self.added += 1
+        # }
+    # }
+
+    def flush(self) -> None:
+        """
+        Write buffered translations to database.
+        """
+        if self.new_rows and self.connection is not None:
+            self.connection.executemany("INSERT OR REPLACE INTO memory (src_lang, tgt_lang, source, target) "
+                                        "VALUES (?, ?, ?, ?)", self.new_rows)
+            self.connection.commit()
+            self.new_rows = []
+        # }
+    # }
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.flush()
+            self.connection.close()
+            self.connection = None
+        # }
+    # }
+
+# } TranslationMemory
@@ -0,0 +1,102 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+__all__ = ['SourcePlanner']
+
+
+class SourcePlanner:
+    """
+    The plan of the source languages of a run. The keys absent in the source language (-from) are translated from
+    the first fallback language which has them: the fallbacks are given explicitly or ordered by their coverage of
+    the absent keys and their Percentage in Translations.json. A target language may be translated from a pivot,
+    a closely related language (en -> de -> nl) whose strings are used as the source where it has a real
+    translation, not a copy of the source string. A pivot which is translated in the same run is used when it is
+    completed.
+
+    Args:
+        csr_lang: str - the source language code.
+        pivots: dict[str, str] | None - the pivot language by the target language.
+    """
+    def __init__(self, csr_lang: str, pivots: dict[str, str] | None = None):
+        self.csr_lang: str = csr_lang
+        self.pivots: dict[str, str] = {tgt_lang: pivot for tgt_lang, pivot in (pivots or {}).items()
+                                       if pivot != csr_lang and pivot != tgt_lang}
+        self.candidates: dict[str, dict[str, str]] = {}     # language -> its strings absent in the source language
+        self.coverage: dict[str, tuple[int, float]] = {}    # language -> count of the candidates and Percentage
+        self.extra: dict[str, str] = {}         # key -> text of the keys absent in the source language
+        self.extra_langs: dict[str, str] = {}   # key -> language of its text in extra
+        self.counts: dict[str, int] = {}        # fallback language -> count of the keys taken from it
+    # }
+
+    @staticmethod
+    def parsePivots(text: str | None) -> dict[str, str]:
+        """
+        Parse the pivots "nl=de,sk=cs": the target language is translated from the pivot one.
+        """
+        pivots: dict[str, str] = {}
+        for item in (text or "").split(","):
+            if "=" in item:
+                tgt_lang, pivot = item.split("=", 1)
+                pivots[tgt_lang.strip()] = pivot.strip()
+            # }
+        # }
+        return pivots
+    # }
+
+    def addCandidate(self, lang: str, strings: dict[str, str], source: dict[str, str], percentage: float = 0.0) -> int:
+        """
+        Keep the strings of the language which keys are absent in the source strings as a fallback candidate,
+        the strings dict can be dropped after that. Returns the count of the kept strings.
+        """
+        if lang == self.csr_lang:
+            return 0
+        # }
+        self.candidates[lang] = {key: text for key, text in strings.items() if text and key not in source}
+        self.coverage[lang] = (len(self.candidates[lang]), percentage)
+        return len(self.candidates[lang])
+    # }
+
+    def plan(self, order: list[str] | None = None) -> None:
+        """
+        Choose the fallback of every key absent in the source: the first candidate in the order or, by default, the
+        candidate with the highest coverage of the absent keys (then by Percentage) first.
+        """
+        if order is None:
+            order = sorted(self.candidates, key=self.coverage.__getitem__, reverse=True)
+        # }
+        for lang in order:
+            added: int = 0
+            for key, text in self.candidates.get(lang, {}).items():
+                if key not in self.extra:
+                    self.extra[key] = text
+                    self.extra_langs[key] = lang
+                    added += 1
+                # }
+            # }
+            if added > 0:
+                self.counts[lang] = added
+            # }
+        # }
+        self.candidates = {}
+    # }
+
+    def mergeSource(self, source: dict[str, str]) -> dict[str, str]:
+        """
+        Returns the source strings with the keys taken from the fallbacks after them or the source itself.
+        """
+        if not self.extra:
+            return source
+        # }
+        merged = dict(source)
+        merged.update(self.extra)
+        return merged
+    # }
+
+    def getPivot(self, tgt_lang: str) -> str | None:
+        return self.pivots.get(tgt_lang)
+    # }
+
+# } SourcePlanner
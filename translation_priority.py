@@ -0,0 +1,75 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+import json
+
+__all__ = ['KeyPriorities']
+
+
+class KeyPriorities:
+    """
+    The priorities of the keys of the strings, e.g. the usage frequency or the importance in the UI: the strings of
+    higher priority are translated first. The file is either a JSON object {key: priority} or a text file with a
+    key and its priority on every line separated by white space, # starts a comment. A key ending with * is a
+    prefix rule; the exact key takes precedence over the rules, the longest prefix wins. The keys without a
+    priority get the default one.
+
+    Args:
+        file_name: str | None - priorities file name or None for the default priority of all keys.
+        encoding: str - file encoding (default utf-8).
+        default: float - priority of the keys which are not in the file (default 0).
+    """
+    def __init__(self, file_name: str | None = None, encoding: str = "utf-8", default: float = 0.0):
+        self.default: float = default
+        self.keys: dict[str, float] = {}
+        self.prefixes: list[tuple[str, float]] = []     # sorted by length, the longest first
+        if file_name is not None:
+            with open(file=file_name, encoding=encoding) as f:
+                text = f.read()
+            # }
+            if text.lstrip().startswith("{"):
+                items = json.loads(text).items()
+            else:
+                items = [line.split("#", 1)[0].rsplit(None, 1) for line in text.splitlines()]
+            # }
+            for item in items:
+                if len(item) == 2:
+                    self.add(item[0], float(item[1]))
+                # }
+            # }
+        # }
+    # }
+
+    def __len__(self) -> int:
+        return len(self.keys) + len(self.prefixes)
+    # }
+
+    def add(self, key: str, priority: float) -> None:
+        """
+        Set the priority of the key or, if the key ends with *, of the keys with its prefix.
+        """
+        if key.endswith("*"):
+            self.prefixes.append((key[:-1], priority))
+            self.prefixes.sort(key=lambda rule: len(rule[0]), reverse=True)
+        else:
+            self.keys[key] = priority
+        # }
+    # }
+
+    def get(self, key: str) -> float:
+        priority = self.keys.get(key)
+        if priority is not None:
+            return priority
+        # }
+        for prefix, priority in self.prefixes:
+            if key.startswith(prefix):
+                return priority
+            # }
+        # }
+        return self.default
+    # }
+
+# } KeyPriorities
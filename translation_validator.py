@@ -0,0 +1,125 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+from collections import Counter
+
+from translation_backends import FORMAT_RE
+
+__all__ = ['TranslationValidator', 'REJECT_REASONS']
+
+REJECT_REASONS: tuple[str, ...] = ("empty", "placeholders", "length", "untranslated")
+SOFT_REASONS: frozenset[str] = frozenset(("length", "untranslated"))   # may be right, checked on the first try only
+
+
+class TranslationValidator:
+    """
+    The validation stage of the translated batches. It checks every string of the result: empty translation, changed
+    format placeholders and markup, the ratio of the length of the translation to the source and the source returned
+    untranslated. For the target languages which opted in, the first letter of the translation is lowered if the
+    source starts with a lower case letter. A rejected string is set to None in the result, so it is queued to be
+    translated again alone instead of failing the batch. The length and untranslated checks may reject right
+    translations (a short word, a name), so they are applied on the first try of a string only.
+
+    validate() is called by the task in its working thread or worker process right after the translation of the
+    batch, so it is not done by the main thread. count() collects the totals and should be called from the main
+    thread.
+
+    Args:
+        min_ratio: float - minimal ratio of the length of the translation to the length of the source (default 0.2).
+        max_ratio: float - maximal ratio of the lengths (default 4.0).
+        min_length: int - the length of the source from which the ratio is checked (default 20).
+        check_untranslated: bool - reject the source returned as is (default True).
+        fix_case_langs: set[str] | None - the target languages to lower the first letter of, "*" for all of them
+            or None (default) for no one. It is wrong for the languages which capitalize nouns, e.g. German.
+    """
+    def __init__(self, min_ratio: float = 0.2, max_ratio: float = 4.0, min_length: int = 20,
+                 check_untranslated: bool = True, fix_case_langs: set[str] | None = None):
+        self.min_ratio: float = min_ratio
+        self.max_ratio: float = max_ratio
+        self.min_length: int = min_length
+        self.check_untranslated: bool = check_untranslated
+        self.fix_case_langs: set[str] = fix_case_langs or set()
+        self.totals: dict[str, int] = dict.fromkeys(REJECT_REASONS, 0)
+    # }
+
+    def check(self, source: str, translation: str | None, first_try: bool) -> str | None:
+        """
+        Returns the reason to reject the translation of the source string or None if it is accepted.
+        """
+        if not translation or translation.isspace():
+            return "empty"
+        # }
+        if "{" in source or "<" in source or "&" in source or "{" in translation or "<" in translation:
+            if Counter(FORMAT_RE.findall(source)) != Counter(FORMAT_RE.findall(translation)):
+                return "placeholders"
+            # }
+        # }
+        if not first_try:
+            return None
+        # }
+        if len(source) >= self.min_length:
+            ratio = len(translation) / len(source)
+            if ratio < self.min_ratio or ratio > self.max_ratio:
+                return "length"
+            # }
+        # }
+        if self.check_untranslated and translation == source and sum(w.isalpha() for w in source.split()) > 1:
+            return "untranslated"
+        # }
+        return None
+    # }
+
+    def isFixCase(self, tgt_lang: str) -> bool:
+        return tgt_lang in self.fix_case_langs or "*" in self.fix_case_langs
+    # }
+
+    @staticmethod
+    def fixCase(source: str, translation: str) -> str:
+        """
+        Lower the first letter of the translation if the source string starts with a lower case letter as well.
+        A string starting with a placeholder, a bracket or a digit is kept as is.
+        """
+        if source and translation and source[0].islower() and translation[0].isalpha() and translation[0].isupper():
+            return translation[0].lower() + translation[1:]
+        # }
+        return translation
+    # }
+
+    def validate(self, text_batch: list[str], result: list[str | None], first_try: bool,
+                 tgt_lang: str = "") -> dict[int, str]:
+        """
+        Validate the result of the batch in place: the rejected strings are set to None. The strings lost by the
+        translator are not checked. The case of the target language is fixed if it opted in. Returns the reasons
+        of the rejected strings by their indexes in the batch.
+        """
+        fix_case = self.isFixCase(tgt_lang)
+        rejected: dict[int, str] = {}
+        for i, (source, translation) in enumerate(zip(text_batch, result)):
+            if translation is None:
+                continue
+            # }
+            reason = self.check(source, translation, first_try)
+            if reason is None:
+                result[i] = self.fixCase(source, translation) if fix_case else translation
+            else:
+                result[i] = None
+                rejected[i] = reason
+            # }
+        # }
+        return rejected
+    # }
+
+    def count(self, rejected: dict[int, str]) -> None:
+        for reason in rejected.values():
+            self.totals[reason] += 1
+        # }
+    # }
+
+    def rejectedTotal(self) -> int:
+        return sum(self.totals.values())
+    # }
+
+# } TranslationValidator
@@ -0,0 +1,389 @@
+# author Oleksander Kechedzhy
+# version 1.0
+#
+__author__ = 'Oleksander Kechedzhy (alex.ithk@gmail.com)'
+__version__ = '1.0'
+
+import json
+import os
+import re
+import typing as tp
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from typing_extensions import Self
+
+try:
+    import orjson   # optional fast encoder
+except ImportError:
+    orjson = None
+# }
+
+__all__ = ['TranslationsFile', 'OutputWriter', 'dump_json', 'write_atomic']
+
+TOP_KEY_TAB = re.compile(r'^\t("(?:[^"\\\n]|\\.)*")\s*:\s*', re.MULTILINE)
+WHITESPACE = re.compile(r'\s*')
+
+
+def reindent(text: str, indent: str) -> str:
+    """
+    Replace the indent of 2 spaces per level of orjson by the indent. All new lines of JSON text are structural,
+    the new lines of the strings are escaped.
+    """
+    depth = 1
+    while "\n" + "  " * depth in text:
+        depth += 1
+    # }
+    for level in range(depth - 1, 0, -1):   # the deepest first, a shallower indent is a prefix of it
+        text = text.replace("\n" + "  " * level, "\n" + indent * level)
+    # }
+    return text
+# }
+
+
+def dump_json(obj: tp.Any, indent: str | None = "\t") -> str:
+    """
+    Serialize the object to JSON text in the format of Manager.io files, None or empty indent - compact JSON.
+    The text is made by orjson if it is installed and by json otherwise, the output is the same.
+    """
+    if orjson is not None:
+        try:
+            if not indent:
+                return orjson.dumps(obj).decode()
+            # }
+            return reindent(orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode(), indent)
+        except TypeError:   # e.g. a lone surrogate in a string, json serializes it
+            pass
+        # }
+    # }
+    if not indent:
+        return json.dumps(obj, skipkeys=False, ensure_ascii=False, separators=(",", ":"))
+    # }
+    return json.dumps(obj, skipkeys=False, ensure_ascii=False, indent=indent)
+# }
+
+
+def write_atomic(file_name: str, text: str, encoding: str = "utf-8") -> None:
+    """
+    Write the text to the temporary file next to the file and replace the file by it, so a reader never sees
+    a partially written file.
+    """
+    tmp_name = f"{file_name}.{os.getpid()}.tmp"
+    try:
+        with open(file=tmp_name, mode="w", encoding=encoding) as outfile:
+            outfile.write(text)
+        # }
+        os.replace(tmp_name, file_name)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        # }
+        raise
+    # }
+# }
+
+
+class TranslationsFile:
+    """
+    The lazy reader and writer of Translations.json. The file is kept as text with the index of the positions of
+    the languages, a language is parsed only when it is accessed by translations[lang] or translations.get(lang).
+    The write() method copies the text of the languages which were not accessed as is and serializes the
+    accessed ones, so the other languages of the file are never materialized.
+
+    Args:
+        file_name: str | None - file name to load or None to create an empty object.
+        encoding: str - file encoding (default utf-8).
+        indent: str | None - indent of JSON file (default tab), None - compact JSON.
+    """
+    def __init__(self, file_name: str | None = None, encoding: str = "utf-8", indent: str | None = "\t"):
+        self.encoding: str = encoding
+        self.indent: str = indent or ""
+        self.text: str = ""
+        self.index: dict[str, tuple[int, int]] = {}     # language -> start and end of its value in the text
+        self.order: list[str] = []
+        self.languages: dict[str, tp.Any] = {}          # parsed languages
+        self.strings_json: dict[str, str] = {}          # serialized "Strings" of the language to reuse by write()
+        self.taken: set[str] = set()                    # languages which "Strings" were taken by takeStrings()
+        if file_name is not None:
+            with open(file=file_name, encoding=encoding) as f:
+                self.text = f.read()
+            # }
+            self.buildIndex()
+        # }
+    # }
+
+    def buildIndex(self) -> None:
+        """
+        Find the positions of the top level values. Files written with the tab indent are indexed by regular
+        expressions without parsing, other files are parsed value by value.
+        """
+        text = self.text
+        if text.startswith('{\n\t"'):
+            for match in TOP_KEY_TAB.finditer(text):
+                start = match.end()
+                if text.startswith("{\n", start):
+                    end = text.find("\n\t}", start)
+                    if end < 0:
+                        break
+                    # }
+                    end += 3
+                else:
+                    _, end = json.JSONDecoder().raw_decode(text, start)
+                # }
+                self.index[json.loads(match.group(1))] = (start, end)
+            # }
+            if self.index and text.rstrip().endswith("}"):
+                self.order = list(self.index)
+                return
+            # }
+            self.index = {}
+        # }
+        self.scanIndex()
+    # }
+
+    def scanIndex(self) -> None:
+        """
+        Index the top level values of the file in any format. Every value is parsed and dropped at once.
+        """
+        text = self.text
+        decoder = json.JSONDecoder()
+        pos = WHITESPACE.match(text, 0).end()
+        if not text.startswith("{", pos):
+            raise ValueError("Translations JSON file should contain an object!")
+        # }
+        pos = WHITESPACE.match(text, pos + 1).end()
+        while not text.startswith("}", pos):
+            key, pos = decoder.raw_decode(text, pos)
+            pos = WHITESPACE.match(text, pos).end()
+            if not text.startswith(":", pos):
+                raise ValueError(f"Expecting ':' at position {pos}!")
+            # }
+            start = WHITESPACE.match(text, pos + 1).end()
+            _, end = decoder.raw_decode(text, start)
+            self.index[key] = (start, end)
+            pos = WHITESPACE.match(text, end).end()
+            if text.startswith(",", pos):
+                pos = WHITESPACE.match(text, pos + 1).end()
+            # }
+        # }
+        self.order = list(self.index)
+    # }
+
+    def __contains__(self, lang: str) -> bool:
+        return lang in self.index or lang in self.languages
+    # }
+
+    def __iter__(self) -> tp.Iterator[str]:
+        return iter(list(self.order))
+    # }
+
+    def __len__(self) -> int:
+        return len(self.order)
+    # }
+
+    def __getitem__(self, lang: str) -> tp.Any:
+        value = self.languages.get(lang)
+        if value is None:
+            start, end = self.index[lang]
+            value = json.loads(self.text[start:end])
+            self.languages[lang] = value
+        # }
+        return value
+    # }
+
+    def __setitem__(self, lang: str, value: tp.Any) -> None:
+        if lang not in self:
+            self.order.append(lang)
+        # }
+        self.languages[lang] = value
+        self.strings_json.pop(lang, None)
+        self.taken.discard(lang)
+    # }
+
+    def get(self, lang: str, default: tp.Any = None) -> tp.Any:
+        if lang not in self:
+            return default
+        # }
+        return self[lang]
+    # }
+
+    def has(self, lang: str) -> bool:
+        """
+        Returns true if the language has a non-empty value. An object of the language loaded from the file is not
+        parsed for that.
+        """
+        if lang in self.index and lang not in self.languages:
+            start, _ = self.index[lang]
+            if self.text.startswith("{", start):
+                return not self.text.startswith("}", WHITESPACE.match(self.text, start + 1).end())
+            # }
+        # }
+        return bool(self.get(lang))
+    # }
+
+    def rawText(self, lang: str) -> str | None:
+        """
+        Returns the text of the value of the language as it is in the file or None if the language is parsed or set.
+        """
+        if lang not in self.index or lang in self.languages:
+            return None
+        # }
+        start, end = self.index[lang]
+        return self.text[start:end]
+    # }
+
+    def release(self, lang: str) -> None:
+        """
+        Drop the parsed value of the language loaded from the file, write() copies its text as is again.
+        """
+        if lang in self.index:
+            self.languages.pop(lang, None)
+            self.strings_json.pop(lang, None)
+            self.taken.discard(lang)
+        # }
+    # }
+
+    def takeStrings(self, lang: str) -> dict[str, str]:
+        """
+        Returns the parsed "Strings" of the language and drops them from the parsed value, the other fields are
+        kept parsed. The text of the language loaded from the file is written as is until its strings are set by
+        setStringsJson(), so the language is never parsed again to be saved.
+        """
+        value = self[lang]
+        strings = value.get("Strings") or {}
+        value["Strings"] = None     # keeps the order of the fields
+        if lang in self.index:
+            self.taken.add(lang)
+        # }
+        return strings
+    # }
+
+    def setStringsJson(self, lang: str, strings_json: str) -> None:
+        """
+        Set serialized "Strings" of the language made by dump_json() to be reused by write().
+        """
+        self.strings_json[lang] = strings_json
+    # }
+
+    def write(self, file_name: str) -> None:
+        """
+        Write the file. Languages which were not accessed are written as is. The file is written to a temporary
+        file which replaces it, so a reader (e.g. Manager.io or the watch mode) never sees a partially written file.
+        """
+        indent = self.indent
+        new_line = "\n" if indent else ""
+        colon = ": " if indent else ":"
+        tmp_name = f"{file_name}.{os.getpid()}.tmp"
+        try:
+            with open(file=tmp_name, mode="w", encoding=self.encoding) as outfile:
+                outfile.write("{")
+                for n, lang in enumerate(self.order):
+                    outfile.write("," + new_line if n else new_line)
+                    outfile.write(f'{indent}{dump_json(lang)}{colon}')
+                    if lang in self.languages and (lang not in self.taken or lang in self.strings_json):
+                        self.writeLanguage(outfile, lang)
+                    else:
+                        start, end = self.index[lang]
+                        outfile.write(self.text[start:end])
+                    # }
+                # }
+                outfile.write(new_line + "}")
+            # }
+            os.replace(tmp_name, file_name)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            # }
+            raise
+        # }
+    # }
+
+    def writeLanguage(self, outfile: tp.Any, lang: str) -> None:
+        indent = self.indent
+        new_line = "\n" if indent else ""
+        colon = ": " if indent else ":"
+        value = self.languages[lang]
+        strings_json = self.strings_json.get(lang)
+        if strings_json is None or not isinstance(value, dict):
+            outfile.write(dump_json(value, indent).replace("\n", "\n" + indent))
+            return
+        # }
+        outfile.write("{")
+        for n, (key, item) in enumerate(value.items()):
+            outfile.write("," + new_line if n else new_line)
+            outfile.write(f'{indent * 2}{dump_json(key)}{colon}')
+            if key == "Strings":
+                outfile.write(strings_json.replace("\n", "\n" + indent * 2) if indent else strings_json)
+            else:
+                outfile.write(dump_json(item, indent).replace("\n", "\n" + indent * 2))
+            # }
+        # }
+        outfile.write(f"{new_line}{indent}}}")
+    # }
+
+# } TranslationsFile
+
+
+class OutputWriter:
+    """
+    The output stage of a run. The texts are serialized once by the main thread and the files are written by the
+    background threads, so the outputs of the target languages are written concurrently while the main thread goes
+    on with the results of the other batches. Every file is written to a temporary file which replaces it, so a
+    crash never leaves a truncated file. wait() waits for all the files and raises the first error.
+
+    Args:
+        encoding: str - file encoding (default utf-8).
+        indent: str | None - indent of JSON files (default tab), None - compact JSON.
+        max_workers: int - maximum number of the files written at once (default 4).
+    """
+    def __init__(self, encoding: str = "utf-8", indent: str | None = "\t", max_workers: int = 4):
+        self.encoding: str = encoding
+        self.indent: str | None = indent
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers, thread_name_prefix="OutputWriter")
+        self.futures: list[Future] = []
+        self.written: int = 0
+    # }
+
+    def __enter__(self) -> Self:
+        return self
+    # }
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    # }
+
+    def dumps(self, obj: tp.Any) -> str:
+        return dump_json(obj, self.indent)
+    # }
+
+    def writeText(self, file_name: str, text: str) -> None:
+        self.futures.append(self.executor.submit(write_atomic, file_name, text, self.encoding))
+    # }
+
+    def writeTranslations(self, translations: TranslationsFile, file_name: str) -> None:
+        """
+        Write TranslationsFile. The object should not be changed until the file is written.
+        """
+        self.futures.append(self.executor.submit(translations.write, file_name))
+    # }
+
+    def wait(self) -> int:
+        """
+        Wait until the files are written. Returns the count of the files written since the previous call.
+        """
+        futures, self.futures = self.futures, []
+        for future in futures:
+            future.result()
+        # }
+        self.written += len(futures)
+        return len(futures)
+    # }
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            self.executor.shutdown()
+        # }
+    # }
+
+# } OutputWriter